@@ -0,0 +1,44 @@
+"""add llm_usage_daily
+
+Revision ID: 3f9a6c2d8e14
+Revises: b5e81f03c6d2
+Create Date: 2026-10-16 14:22:05.417302
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f9a6c2d8e14'
+down_revision: Union[str, None] = 'b5e81f03c6d2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'llm_usage_daily',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('user_id', sa.String(), nullable=False),
+        sa.Column('operation', sa.String(length=64), nullable=False),
+        sa.Column('model', sa.String(length=128), nullable=False),
+        sa.Column('calls', sa.Integer(), nullable=False),
+        sa.Column('failures', sa.Integer(), nullable=False),
+        sa.Column('prompt_tokens', sa.BigInteger(), nullable=False),
+        sa.Column('cached_tokens', sa.BigInteger(), nullable=False),
+        sa.Column('output_tokens', sa.BigInteger(), nullable=False),
+        sa.Column('total_tokens', sa.BigInteger(), nullable=False),
+        sa.Column('latency_ms', sa.BigInteger(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('day', 'user_id', 'operation', 'model', name='uq_llm_usage_daily_key'),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('llm_usage_daily')
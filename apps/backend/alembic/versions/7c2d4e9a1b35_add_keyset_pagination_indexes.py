@@ -0,0 +1,46 @@
+"""add keyset pagination indexes
+
+Revision ID: 7c2d4e9a1b35
+Revises: f0e057e3d644
+Create Date: 2026-10-16 09:12:41.502318
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7c2d4e9a1b35'
+down_revision: Union[str, None] = 'f0e057e3d644'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Composite indexes serve both the user filter and the (created_at DESC, id DESC)
+    # ordering, so the single-column user_id indexes become redundant.
+    op.create_index(
+        'ix_journal_entries_user_id_created_at_id',
+        'journal_entries',
+        ['user_id', sa.text('created_at DESC'), sa.text('id DESC')],
+        unique=False,
+    )
+    op.drop_index(op.f('ix_journal_entries_user_id'), table_name='journal_entries')
+    op.create_index(
+        'ix_todos_user_id_created_at_id',
+        'todos',
+        ['user_id', sa.text('created_at DESC'), sa.text('id DESC')],
+        unique=False,
+    )
+    op.drop_index(op.f('ix_todos_user_id'), table_name='todos')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.create_index(op.f('ix_todos_user_id'), 'todos', ['user_id'], unique=False)
+    op.drop_index('ix_todos_user_id_created_at_id', table_name='todos')
+    op.create_index(op.f('ix_journal_entries_user_id'), 'journal_entries', ['user_id'], unique=False)
+    op.drop_index('ix_journal_entries_user_id_created_at_id', table_name='journal_entries')
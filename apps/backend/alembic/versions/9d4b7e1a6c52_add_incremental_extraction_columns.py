@@ -0,0 +1,38 @@
+"""add incremental extraction columns
+
+Revision ID: 9d4b7e1a6c52
+Revises: 3f9a6c2d8e14
+Create Date: 2026-10-16 15:47:38.602114
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9d4b7e1a6c52'
+down_revision: Union[str, None] = '3f9a6c2d8e14'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('journal_entries', sa.Column('extraction_segments', postgresql.JSONB(), nullable=True))
+    op.add_column('todos', sa.Column('extraction_ref', sa.String(length=64), nullable=True))
+    op.create_index(
+        'ix_todos_journal_entry_id_extraction_ref',
+        'todos',
+        ['journal_entry_id', 'extraction_ref'],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_todos_journal_entry_id_extraction_ref', table_name='todos')
+    op.drop_column('todos', 'extraction_ref')
+    op.drop_column('journal_entries', 'extraction_segments')
@@ -0,0 +1,46 @@
+"""add search_vector to journal_entries
+
+Revision ID: b5e81f03c6d2
+Revises: 7c2d4e9a1b35
+Create Date: 2026-10-16 10:03:27.118904
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b5e81f03c6d2'
+down_revision: Union[str, None] = '7c2d4e9a1b35'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('journal_entries', sa.Column(
+        'search_vector',
+        postgresql.TSVECTOR(),
+        sa.Computed(
+            "setweight(to_tsvector('english', coalesce(title, '')), 'A') || "
+            "setweight(to_tsvector('english', content), 'B')",
+            persisted=True,
+        ),
+        nullable=True,
+    ))
+    op.create_index(
+        'ix_journal_entries_search_vector',
+        'journal_entries',
+        ['search_vector'],
+        unique=False,
+        postgresql_using='gin',
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_journal_entries_search_vector', table_name='journal_entries')
+    op.drop_column('journal_entries', 'search_vector')
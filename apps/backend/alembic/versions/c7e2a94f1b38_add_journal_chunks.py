@@ -0,0 +1,39 @@
+"""add journal_chunks
+
+Revision ID: c7e2a94f1b38
+Revises: 9d4b7e1a6c52
+Create Date: 2026-10-17 09:41:27.115846
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c7e2a94f1b38'
+down_revision: Union[str, None] = '9d4b7e1a6c52'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'journal_chunks',
+        sa.Column('vector_id', sa.String(length=255), nullable=False),
+        sa.Column('journal_entry_id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.String(), nullable=False),
+        sa.Column('text', sa.Text(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['journal_entry_id'], ['journal_entries.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('vector_id'),
+    )
+    op.create_index(op.f('ix_journal_chunks_journal_entry_id'), 'journal_chunks', ['journal_entry_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_journal_chunks_journal_entry_id'), table_name='journal_chunks')
+    op.drop_table('journal_chunks')
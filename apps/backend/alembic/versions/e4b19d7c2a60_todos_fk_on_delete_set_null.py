@@ -0,0 +1,36 @@
+"""todos.journal_entry_id on delete set null
+
+Revision ID: e4b19d7c2a60
+Revises: c7e2a94f1b38
+Create Date: 2026-10-17 13:05:52.804117
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e4b19d7c2a60'
+down_revision: Union[str, None] = 'c7e2a94f1b38'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # The constraint was created unnamed; this is PostgreSQL's default name for it
+    op.drop_constraint('todos_journal_entry_id_fkey', 'todos', type_='foreignkey')
+    op.create_foreign_key(
+        'todos_journal_entry_id_fkey', 'todos', 'journal_entries',
+        ['journal_entry_id'], ['id'], ondelete='SET NULL',
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_constraint('todos_journal_entry_id_fkey', 'todos', type_='foreignkey')
+    op.create_foreign_key(
+        'todos_journal_entry_id_fkey', 'todos', 'journal_entries',
+        ['journal_entry_id'], ['id'],
+    )
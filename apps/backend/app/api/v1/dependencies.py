@@ -3,9 +3,9 @@ FastAPI dependencies for authentication and database access.
 """
 from typing import Optional
 from fastapi import Depends, HTTPException, status, Request
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core.database import get_auth_db
+from app.core.database import get_async_auth_db
 from app.core.config import get_settings
 from app.core.security import verify_session_token
 from app.schemas.user import CurrentUser
@@ -20,9 +20,9 @@ def get_session_token(request: Request) -> Optional[str]:
     return request.cookies.get(settings.session_cookie_name)
 
 
-def get_current_user(
+async def get_current_user(
     request: Request,
-    db: Session = Depends(get_auth_db),
+    db: AsyncSession = Depends(get_async_auth_db),
 ) -> CurrentUser:
     """
     Dependency to get the current authenticated user.
@@ -42,7 +42,7 @@ def get_current_user(
             headers={"WWW-Authenticate": "Bearer"},
         )
 
-    user_data = verify_session_token(db, session_token)
+    user_data = await verify_session_token(db, session_token)
 
     if not user_data:
         raise HTTPException(
@@ -54,9 +54,9 @@ def get_current_user(
     return CurrentUser(**user_data)
 
 
-def get_current_user_optional(
+async def get_current_user_optional(
     request: Request,
-    db: Session = Depends(get_auth_db),
+    db: AsyncSession = Depends(get_async_auth_db),
 ) -> Optional[CurrentUser]:
     """
     Optional version of get_current_user.
@@ -67,7 +67,7 @@ def get_current_user_optional(
     if not session_token:
         return None
 
-    user_data = verify_session_token(db, session_token)
+    user_data = await verify_session_token(db, session_token)
 
     if not user_data:
         return None
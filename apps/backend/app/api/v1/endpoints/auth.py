@@ -2,10 +2,10 @@
 Authentication endpoints for Better Auth integration.
 """
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.api.v1.dependencies import get_current_user
-from app.core.database import get_auth_db
+from app.core.database import get_async_auth_db
 from app.schemas.user import CurrentUser
 from app.services import AuthService
 
@@ -24,9 +24,9 @@ async def get_current_user_info(
 
 
 @router.post("/refresh-token")
-def refresh_google_access_token(
+async def refresh_google_access_token(
     current_user: CurrentUser = Depends(get_current_user),
-    db: Session = Depends(get_auth_db),
+    db: AsyncSession = Depends(get_async_auth_db),
 ):
     """
     Manually refresh Google OAuth access token.
@@ -36,7 +36,7 @@ def refresh_google_access_token(
         raise HTTPException(status_code=400, detail="User ID not found")
 
     auth_service = AuthService(db)
-    new_token = auth_service.ensure_valid_google_token(current_user.id)
+    new_token = await auth_service.ensure_valid_google_token(current_user.id)
 
     if new_token:
         return {"message": "Token refreshed successfully", "access_token": new_token[:10] + "..."}
@@ -13,6 +13,7 @@ from app.schemas.calendar import (
     EventListResponse,
     DeleteResponse,
 )
+from app.services.answer_cache_service import invalidate_user_answers
 from app.services.calendar_service import GoogleCalendarService
 from app.core.config import get_settings
 
@@ -67,6 +68,7 @@ async def create_event(
             attendees=[a.model_dump(exclude_none=True) for a in event.attendees] if event.attendees else None,
             reminders=event.reminders.model_dump(exclude_none=True) if event.reminders else None,
         )
+        await invalidate_user_answers(current_user.id)
         return EventResponse(**created_event)
     except Exception as e:
         raise HTTPException(
@@ -155,6 +157,7 @@ async def update_event(
             location=event.location,
             attendees=[a.model_dump(exclude_none=True) for a in event.attendees] if event.attendees else None,
         )
+        await invalidate_user_answers(current_user.id)
         return EventResponse(**updated_event)
     except Exception as e:
         raise HTTPException(
@@ -176,6 +179,7 @@ async def delete_event(
     
     try:
         service.delete_event(calendar_id=calendar_id, event_id=event_id)
+        await invalidate_user_answers(current_user.id)
         return DeleteResponse(
             success=True,
             message="Event deleted successfully",
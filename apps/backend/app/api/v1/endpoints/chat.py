@@ -1,19 +1,58 @@
+import json
+import uuid
+from typing import Optional
 from fastapi import APIRouter
+from fastapi.responses import StreamingResponse
 from app.services.chat_service import ChatService
 from app.schemas.chat import ChatRequest, ChatResponse
 router = APIRouter()
 
 chat_service = ChatService()
 
+def _session_id(request: ChatRequest) -> Optional[str]:
+    # Legacy clients that send previous_chat without a session keep client-side history
+    if request.session_id or request.previous_chat:
+        return request.session_id
+    return uuid.uuid4().hex
+
+
 @router.post("/", response_model=ChatResponse)
 async def chat_endpoint(request: ChatRequest):
+    session_id = _session_id(request)
     response_text = await chat_service.generate_response(
         prompt=request.prompt,
         user_id=request.user_id,
-        session_id=request.session_id,
-        previous_chat=request.previous_chat
+        session_id=session_id,
+        previous_chat=request.previous_chat,
+        timezone=request.timezone or "UTC",
     )
     return ChatResponse(
         response=response_text,
-        session_id=request.session_id or "default"
-    )
\ No newline at end of file
+        session_id=session_id or "default"
+    )
+
+
+@router.post("/stream")
+async def chat_stream_endpoint(request: ChatRequest):
+    """
+    Stream the chat response as Server-Sent Events.
+
+    Events: tool_call, tool_result, delta (answer text), done, error.
+    """
+    session_id = _session_id(request)
+
+    async def event_stream():
+        async for event in chat_service.stream_response(
+            prompt=request.prompt,
+            user_id=request.user_id,
+            session_id=session_id,
+            previous_chat=request.previous_chat,
+            timezone=request.timezone or "UTC",
+        ):
+            yield f"event: {event['event']}\ndata: {json.dumps(event['data'], ensure_ascii=False)}\n\n"
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
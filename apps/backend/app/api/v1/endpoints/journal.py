@@ -2,68 +2,174 @@
 """
 Journal entry API endpoints.
 """
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from datetime import date
+from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.api.v1.dependencies import get_current_user
-from app.core.database import get_db
+from app.core.database import get_async_db
 from app.schemas.user import CurrentUser
-from app.schemas.journal_entry import JournalEntry, JournalEntryCreate, JournalEntryUpdate
+from app.schemas.journal_entry import JournalEntry, JournalEntryCreate, JournalEntryStatus, JournalEntryUpdate, JournalSearchHit
+from app.schemas.journal_import import ImportJobStatus
+from app.services.import_service import JournalImportService
 from app.services.journal_service import JournalService
 
 router = APIRouter()
 
 
 @router.get("/", response_model=List[JournalEntry])
-def read_entries(
-    skip: int = 0,
-    limit: int = 100,
-    db: Session = Depends(get_db),
+async def read_entries(
+    response: Response,
+    limit: int = Query(default=100, ge=1, le=500),
+    cursor: Optional[str] = Query(default=None, description="Opaque cursor from the X-Next-Cursor header"),
+    db: AsyncSession = Depends(get_async_db),
     current_user: CurrentUser = Depends(get_current_user),
 ):
     """
-    Get all journal entries for the current user.
+    Get journal entries for the current user, newest first.
+
+    Pages are cursor-based: when more entries exist, the token for the next
+    page is returned in the X-Next-Cursor response header.
     """
     service = JournalService(db)
-    entries = service.get_entries(current_user.id, skip=skip, limit=limit)
+    try:
+        entries, next_cursor = await service.get_entries(current_user.id, limit=limit, cursor=cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
     return entries
 
 
 @router.post("/", response_model=JournalEntry)
 async def create_entry(
     entry: JournalEntryCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: CurrentUser = Depends(get_current_user),
 ):
     """
     Create a new journal entry.
+
+    Returns immediately; extraction runs in the background.
+    Follow progress with GET /{entry_id}/status.
     """
     service = JournalService(db)
     return await service.create_entry(current_user.id, entry)
 
 
+@router.post("/import", response_model=ImportJobStatus, status_code=status.HTTP_202_ACCEPTED)
+async def import_entries(
+    request: Request,
+    timezone: str = Query(default="UTC", description="User's IANA timezone for extraction"),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: CurrentUser = Depends(get_current_user),
+):
+    """
+    Bulk-import journal entries from a streamed request body.
+
+    - Content-Type application/x-ndjson: one JSON object per line
+      ({"content": ..., "title": ..., "created_at": ...})
+    - Content-Type application/zip: archive of .ndjson/.jsonl, .json, .txt or .md files
+
+    Entries are inserted as the body is read; extraction runs in the background.
+    Follow progress with GET /import/{job_id}.
+    """
+    content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+    service = JournalImportService(db)
+    try:
+        if content_type in ("application/x-ndjson", "application/ndjson", "application/jsonl"):
+            return await service.import_ndjson(current_user.id, request.stream(), timezone)
+        if content_type in ("application/zip", "application/x-zip-compressed"):
+            return await service.import_zip(current_user.id, request.stream(), timezone)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    raise HTTPException(
+        status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+        detail="Upload must be application/x-ndjson or application/zip",
+    )
+
+
+@router.get("/import/{job_id}", response_model=ImportJobStatus)
+async def read_import_job(
+    job_id: str,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: CurrentUser = Depends(get_current_user),
+):
+    """
+    Get progress of a bulk import job.
+    """
+    service = JournalImportService(db)
+    job = await service.get_job(job_id, current_user.id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Import job not found")
+    return job
+
+
+@router.get("/search", response_model=List[JournalSearchHit])
+async def search_entries(
+    q: str = Query(..., min_length=1, description="Search query (supports \"phrases\", OR and -exclusions)"),
+    start_date: Optional[date] = Query(default=None, description="Only entries created on or after this date"),
+    end_date: Optional[date] = Query(default=None, description="Only entries created on or before this date"),
+    limit: int = Query(default=20, ge=1, le=100),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: CurrentUser = Depends(get_current_user),
+):
+    """
+    Full-text search over the current user's journal entries.
+
+    Results are ranked by relevance and include a highlighted snippet.
+    """
+    service = JournalService(db)
+    return await service.search_entries(
+        current_user.id,
+        q,
+        start_date=start_date,
+        end_date=end_date,
+        limit=limit,
+    )
+
+
 @router.get("/{entry_id}", response_model=JournalEntry)
-def read_entry(
+async def read_entry(
     entry_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: CurrentUser = Depends(get_current_user),
 ):
     """
     Get a specific journal entry by ID.
     """
     service = JournalService(db)
-    db_entry = service.get_entry(entry_id, current_user.id)
+    db_entry = await service.get_entry(entry_id, current_user.id)
     if db_entry is None:
         raise HTTPException(status_code=404, detail="Entry not found")
     return db_entry
 
 
+@router.get("/{entry_id}/status", response_model=JournalEntryStatus)
+async def read_entry_status(
+    entry_id: int,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: CurrentUser = Depends(get_current_user),
+):
+    """
+    Get the extraction pipeline status of a journal entry.
+
+    PENDING -> PROCESSING -> PROCESSED, or FAILED if extraction or any
+    downstream ingestion step failed.
+    """
+    service = JournalService(db)
+    entry_status = await service.get_status(entry_id, current_user.id)
+    if entry_status is None:
+        raise HTTPException(status_code=404, detail="Entry not found")
+    return entry_status
+
+
 @router.put("/{entry_id}", response_model=JournalEntry)
 async def update_entry(
     entry_id: int,
     entry: JournalEntryUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: CurrentUser = Depends(get_current_user),
 ):
     """
@@ -77,16 +183,16 @@ async def update_entry(
 
 
 @router.delete("/{entry_id}")
-def delete_entry(
+async def delete_entry(
     entry_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: CurrentUser = Depends(get_current_user),
 ):
     """
     Delete a journal entry.
     """
     service = JournalService(db)
-    success = service.delete_entry(entry_id, current_user.id)
+    success = await service.delete_entry(entry_id, current_user.id)
     if not success:
         raise HTTPException(status_code=404, detail="Entry not found")
     return {"message": "Entry deleted successfully"}
\ No newline at end of file
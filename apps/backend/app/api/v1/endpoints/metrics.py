@@ -0,0 +1,44 @@
+"""
+Operational metrics endpoints.
+"""
+from fastapi import APIRouter
+
+from app.core.rate_limiter import gemini_rate_limiter
+from app.core.resilience import get_resilience_stats
+from app.core.security import get_session_cache_stats
+from app.services.answer_cache_service import answer_cache
+
+router = APIRouter()
+
+
+@router.get("/session-cache")
+def read_session_cache_stats():
+    """
+    Hit/miss counters for the Better Auth session lookup cache.
+    """
+    return get_session_cache_stats()
+
+
+@router.get("/gemini-rate-limiter")
+def read_gemini_rate_limiter_stats():
+    """
+    Admission, wait and 429 counters for Gemini calls made by this process.
+    """
+    return gemini_rate_limiter.stats()
+
+
+@router.get("/gemini-resilience")
+def read_gemini_resilience_stats():
+    """
+    Circuit breaker state plus latency percentiles, retry, timeout and hedge
+    counters per kind of Gemini call, for this process.
+    """
+    return get_resilience_stats()
+
+
+@router.get("/chat-answer-cache")
+def read_chat_answer_cache_stats():
+    """
+    Hit rate and Gemini latency saved by the semantic chat answer cache, for this process.
+    """
+    return answer_cache.stats()
@@ -1,5 +1,6 @@
 # Celery app instance and task configurations
 from celery import Celery
+from celery.signals import worker_init, worker_process_init
 from app.core.config import get_settings
 
 settings = get_settings()
@@ -8,7 +9,7 @@ celery_app = Celery(
     "total_recall_backend",
     broker=settings.valkey_url,
     backend=settings.valkey_url,
-    include=["app.tasks.ai_tasks"]
+    include=["app.tasks.ai_tasks", "app.tasks.chat_tasks", "app.tasks.extraction_tasks", "app.tasks.import_tasks"]
 )
 
 # Optional configurations
@@ -18,4 +19,24 @@ celery_app.conf.update(
     result_serializer="json",
     timezone="UTC",
     enable_utc=True,
-)
\ No newline at end of file
+)
+
+@worker_init.connect
+def start_metrics_exporter(**kwargs):
+    """Expose Prometheus metrics of the worker (all pool processes with PROMETHEUS_MULTIPROC_DIR)."""
+    if not settings.celery_metrics_port:
+        return
+    from prometheus_client import start_http_server
+    from app.core.llm_usage import prometheus_registry
+
+    start_http_server(settings.celery_metrics_port, registry=prometheus_registry())
+
+
+@worker_process_init.connect
+def load_embedding_model(**kwargs):
+    """Load and warm up the shared embedding model in every pool process."""
+    if not settings.embedding_warmup_enabled:
+        return
+    from app.core.embeddings import warmup_embedding_model
+
+    warmup_embedding_model()
@@ -3,6 +3,7 @@ Configuration settings using Pydantic BaseSettings.
 Loads environment variables from .env file.
 """
 from functools import lru_cache
+from typing import Literal, Optional
 from pydantic_settings import BaseSettings
 
 
@@ -19,6 +20,19 @@ class Settings(BaseSettings):
     auth_database_url: str
     database_url: str
 
+    # Connection pool settings. Every process (uvicorn worker, Celery pool
+    # process) has an async and a sync engine per database, so it may open up to
+    # 2 * (db_pool_size + db_max_overflow) + 2 * (db_sync_pool_size + db_sync_max_overflow)
+    # connections (70 with the defaults) across both databases. Pools connect
+    # lazily; size Postgres max_connections for that total times the process count.
+    db_pool_size: int = 10
+    db_max_overflow: int = 20
+    # Sync engines only serve chunk text lookups and scripts
+    db_sync_pool_size: int = 2
+    db_sync_max_overflow: int = 3
+    db_pool_timeout: int = 30
+    db_pool_recycle: int = 1800
+
     # Google OAuth settings (same credentials as frontend)
     google_client_id: str
     google_client_secret: str
@@ -29,6 +43,13 @@ class Settings(BaseSettings):
     # Session cookie name (must match Better Auth's cookie name)
     session_cookie_name: str = "better-auth.session_token"
 
+    # Session lookup cache (in-process, keyed on session id). Invalidation only
+    # reaches the local process, so other API replicas may see user, token or
+    # session changes up to session_cache_ttl_seconds late
+    session_cache_ttl_seconds: int = 60
+    session_cache_negative_ttl_seconds: int = 5
+    session_cache_max_entries: int = 10000
+
     # Google Gemini API key for AI services
     gemini_api_key: str
 
@@ -41,9 +62,104 @@ class Settings(BaseSettings):
     # Google Gemini model name
     gemini_model: str = "gemini-2.5-flash-lite"
 
+    # Override the GenAI API endpoint, e.g. the local fake server (app.devtools.fake_gemini)
+    gemini_base_url: Optional[str] = None
+
+    # Fake Gemini server behaviour (lognormal latency, injected 503s and 429s)
+    fake_gemini_latency_median_ms: float = 800.0
+    fake_gemini_latency_sigma: float = 0.5
+    fake_gemini_error_rate: float = 0.0
+    fake_gemini_rate_limit_rate: float = 0.0
+
+    # Record per-stage pipeline timings in Valkey for the pipeline benchmark
+    pipeline_stage_log_enabled: bool = False
+    pipeline_stage_log_max_samples: int = 100_000
+
+    # Gemini context cache for the static extraction prompt prefix
+    gemini_prompt_cache_enabled: bool = True
+    gemini_prompt_cache_ttl_seconds: int = 3600
+    gemini_prompt_cache_refresh_margin_seconds: int = 300
+
+    # Gemini batch jobs for backfills and reprocessing
+    gemini_batch_max_requests: int = 500
+    gemini_batch_poll_seconds: int = 60
+
+    # Gemini rate limits, shared across processes through Valkey
+    gemini_rpm_limit: int = 1000
+    gemini_tpm_limit: int = 1_000_000
+    gemini_max_concurrency: int = 32
+    gemini_local_concurrency: int = 8
+    gemini_call_lease_seconds: int = 120
+    gemini_rate_limit_max_wait_seconds: int = 300
+
+    # Gemini call resilience (timeouts, retries, hedging, circuit breaker)
+    gemini_attempt_timeout_seconds: float = 30.0
+    gemini_call_deadline_seconds: float = 90.0
+    gemini_max_retries: int = 2
+    gemini_retry_base_seconds: float = 0.5
+    gemini_hedge_enabled: bool = True
+    gemini_hedge_percentile: float = 95.0
+    gemini_hedge_min_samples: int = 20
+    gemini_breaker_failure_threshold: int = 5
+    gemini_breaker_reset_seconds: float = 30.0
+
+    # Chat tool loop
+    chat_max_tool_steps: int = 4
+    chat_tool_timeout_seconds: float = 10.0
+
+    # Server-side chat sessions (Valkey) with rolling summaries
+    chat_history_token_budget: int = 4000
+    chat_history_keep_tokens: int = 1500
+    chat_summary_max_tokens: int = 512
+    chat_summary_lock_seconds: int = 120
+    chat_session_ttl_seconds: int = 7 * 24 * 3600
+
+    # Per-user semantic cache of chat answers
+    chat_answer_cache_enabled: bool = True
+    chat_answer_cache_threshold: float = 0.95
+    chat_answer_cache_max_entries: int = 200
+    # Answers only match questions asked on the same local day; this expires past days' entries
+    chat_answer_cache_ttl_seconds: int = 24 * 3600
+
+    # LLM usage accounting (daily per-user rollup in Postgres; Prometheus is always on)
+    llm_usage_rollup_enabled: bool = True
+    # Port for the Celery worker's Prometheus exporter (0 disables it)
+    celery_metrics_port: int = 0
+
+    # Content-defined segments for incremental re-extraction
+    extraction_segment_max_chars: int = 4000
+    extraction_segment_boundary_modulus: int = 4
+    # Longer text is split into overlapping sections extracted concurrently
+    extraction_section_max_chars: int = 6000
+    extraction_section_overlap_chars: int = 400
+
+    # What happens to an entry's todos when it is deleted: "delete" or "keep" (unlinked)
+    journal_delete_todo_policy: Literal["delete", "keep"] = "delete"
+    # Deleted entries are buffered in Valkey and cleaned up together this long after the first delete
+    journal_cleanup_delay_seconds: int = 10
+    # Entries whose graph and vector data are removed per graph / Cosdata round trip
+    journal_cleanup_batch_size: int = 100
+
+    # Extraction results cache (content-addressed, stored in Valkey)
+    extraction_cache_ttl_seconds: int = 30 * 24 * 3600
+
     # Valkey (Redis clone) URL for Celery
     valkey_url: str = "redis://localhost:6379/0"
 
+    # Bulk journal import
+    import_batch_size: int = 500
+    import_extraction_concurrency: int = 4
+    import_max_entry_chars: int = 100_000
+    import_job_ttl_seconds: int = 7 * 24 * 3600
+    import_max_zip_bytes: int = 512 * 1024 * 1024  # Compressed upload spooled to disk
+    import_max_decompressed_bytes: int = 2 * 1024 * 1024 * 1024  # All members of one archive
+
+    # Embedding model (fastembed), loaded once per process and warmed up at startup
+    embedding_model_name: str = "thenlper/gte-base"
+    embedding_warmup_enabled: bool = True
+    # Chunk embeddings cached by content hash (Valkey)
+    embedding_cache_ttl_seconds: int = 30 * 24 * 3600
+
     # Neo4j database URL
     neo4j_url: str = "bolt://localhost:7687"
     
@@ -52,6 +168,18 @@ class Settings(BaseSettings):
     cosdata_username: str = "admin"
     cosdata_password: str = "admin"
     cosdata_collection_name: str = "total_recall_collection"
+    cosdata_tf_idf_sample_threshold: int = 1000
+    cosdata_tf_idf_k1: float = 1.2
+    cosdata_tf_idf_b: float = 0.75
+
+    # Hybrid retrieval: dense and TF-IDF legs fused with reciprocal rank fusion
+    hybrid_search_enabled: bool = True
+    hybrid_search_candidates: int = 20
+    hybrid_rrf_k: int = 60
+    hybrid_dense_weight: float = 1.0
+    hybrid_text_weight: float = 1.0
+    # Default (and maximum) number of chunks a chat tool call retrieves
+    chat_search_top_k: int = 4
     
     class Config:
         env_file = ".env"
@@ -1,35 +1,57 @@
+import hashlib
+import logging
+import threading
+from typing import Any, Dict, Optional, Set
+
 from cosdata import Client
 from .config import get_settings
 
+logger = logging.getLogger(__name__)
+
+_client = None
 _collection = None
+# Per-user collections by name, created lazily
+_user_collections: Dict[str, Any] = {}
+# Collections created without TF-IDF support (before hybrid search)
+_without_text_index: Set[str] = set()
+_lock = threading.Lock()
 
-def get_collection():
-    global _collection
-    if _collection is None:
-        print("DEBUG: Initializing Cosdata Client")
+
+def get_client() -> Client:
+    global _client
+    if _client is None:
         settings = get_settings()
-        print(f"DEBUG: Cosdata settings - Host: {settings.cosdata_host}, Username: {settings.cosdata_username}, Password: {settings.cosdata_password}, Collection: {settings.cosdata_collection_name}")
-        client = Client(
+        logger.info(f"Connecting to Cosdata at {settings.cosdata_host} as {settings.cosdata_username}")
+        _client = Client(
             host=settings.cosdata_host,
             username=settings.cosdata_username,
             password="admin",
             verify=False
         )
-        print("DEBUG: Client initialized successfully")
-        try:
-            print("DEBUG: Attempting to get collection")
-            collection = client.get_collection(settings.cosdata_collection_name)
-            print("DEBUG: Collection retrieved")
-        except Exception as e:
-            print(f"DEBUG: Collection not found, creating new one. Error: {e}")
-            collection = client.create_collection(
-                name=settings.cosdata_collection_name,
-                dimension=768,
-                description="vector collection"
-            )
-            print("DEBUG: Collection created")
+    return _client
+
+
+def _open_collection(name: str, create: bool = True):
+    """
+    Get a collection by name, creating it and its indexes if needed (None if
+    absent and not `create`). Collections created before hybrid search get
+    their TF-IDF index when first opened.
+    """
+    client = get_client()
+    try:
+        collection = client.get_collection(name)
+    except Exception as e:
+        if not create:
+            logger.debug(f"Cosdata collection {name} not found: {e}")
+            return None
+        logger.info(f"Creating Cosdata collection {name} ({e})")
+        collection = client.create_collection(
+            name=name,
+            dimension=768,
+            description="vector collection",
+            tf_idf_options={"enabled": True},
+        )
         try:
-            print("DEBUG: Attempting to create index")
             collection.create_index(
                 distance_metric="cosine",
                 num_layers=10,
@@ -39,8 +61,97 @@ def get_collection():
                 neighbors_count=32,
                 level_0_neighbors_count=64
             )
-            print("DEBUG: Index created")
         except Exception as e:
-            print(f"DEBUG: Index creation failed or already exists. Error: {e}")
-        _collection = collection
-    return _collection
\ No newline at end of file
+            logger.warning(f"Could not create dense index for Cosdata collection {name}: {e}")
+        try:
+            _create_tf_idf_index(collection)
+        except Exception as e:
+            logger.warning(f"Could not create TF-IDF index for Cosdata collection {name}: {e}")
+        return collection
+
+    _ensure_tf_idf_index(collection)
+    return collection
+
+
+def _create_tf_idf_index(collection) -> None:
+    """BM25 index over the chunk texts, for the lexical leg of hybrid search."""
+    settings = get_settings()
+    collection.create_tf_idf_index(
+        name=f"{collection.name}_tf_idf",
+        sample_threshold=settings.cosdata_tf_idf_sample_threshold,
+        k1=settings.cosdata_tf_idf_k1,
+        b=settings.cosdata_tf_idf_b,
+    )
+
+
+def _ensure_tf_idf_index(collection) -> None:
+    """Create the TF-IDF index of an existing collection if it supports one."""
+    try:
+        options = collection.get_info().get("tf_idf_options")
+    except Exception as e:
+        logger.warning(f"Could not read Cosdata collection {collection.name}: {e}")
+        return
+    if options is not None and not options.get("enabled"):
+        # TF-IDF support is fixed when a collection is created
+        logger.warning(
+            f"Cosdata collection {collection.name} was created without TF-IDF support; "
+            f"text search is disabled for it until it is rebuilt (rebuild_user_collection)"
+        )
+        _without_text_index.add(collection.name)
+        return
+    try:
+        _create_tf_idf_index(collection)
+        logger.info(f"Created TF-IDF index for Cosdata collection {collection.name}")
+    except Exception as e:
+        # Usually because the index already exists
+        logger.info(f"TF-IDF index of Cosdata collection {collection.name} not created: {e}")
+
+
+def has_text_index(collection) -> bool:
+    """Whether the lexical (TF-IDF) leg of hybrid search can run on this collection."""
+    return collection.name not in _without_text_index
+
+
+def get_collection():
+    """Shared collection used before vectors were split per user."""
+    global _collection
+    if _collection is None:
+        _collection = _open_collection(get_settings().cosdata_collection_name)
+    return _collection
+
+
+def user_collection_name(user_id: str) -> str:
+    # User ids are not guaranteed to be valid collection names
+    return f"{get_settings().cosdata_collection_name}_u_{hashlib.sha256(user_id.encode()).hexdigest()[:16]}"
+
+
+def get_user_collection(user_id: str, create: bool = True):
+    """
+    Collection holding only this user's vectors, so searches are scoped by the
+    index itself and cost the same however many users exist.
+
+    Returns:
+        The collection, or None if it does not exist and `create` is False
+    """
+    name = user_collection_name(user_id)
+    collection = _user_collections.get(name)
+    if collection is not None:
+        return collection
+    with _lock:
+        collection = _user_collections.get(name)
+        if collection is None:
+            collection = _open_collection(name, create=create)
+            if collection is not None:
+                _user_collections[name] = collection
+    return collection
+
+
+def drop_user_collection(user_id: str) -> None:
+    """Delete the user's collection (e.g. to rebuild it with current options)."""
+    name = user_collection_name(user_id)
+    with _lock:
+        collection = _user_collections.pop(name, None) or _open_collection(name, create=False)
+        _without_text_index.discard(name)
+        if collection is not None:
+            collection.delete()
+            logger.info(f"Deleted Cosdata collection {name}")
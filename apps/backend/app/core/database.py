@@ -1,19 +1,49 @@
 """
 Database connection managers for main application and Better Auth databases.
+Provides sync engines (Alembic, scripts) and async engines (API, Celery tasks).
 """
-from typing import Generator
+from typing import AsyncGenerator, Generator
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, Session
 
 from app.core.config import get_settings
 
 settings = get_settings()
 
+pool_options = {
+    "pool_pre_ping": True,
+    "pool_size": settings.db_pool_size,
+    "max_overflow": settings.db_max_overflow,
+    "pool_timeout": settings.db_pool_timeout,
+    "pool_recycle": settings.db_pool_recycle,
+}
+
+# The sync engines are only used for chunk text lookups and scripts
+sync_pool_options = {
+    **pool_options,
+    "pool_size": settings.db_sync_pool_size,
+    "max_overflow": settings.db_sync_max_overflow,
+}
+
+
+def to_async_url(url: str) -> str:
+    """
+    Convert a sync PostgreSQL URL (postgresql://, postgresql+psycopg2://)
+    into its asyncpg equivalent.
+    """
+    parsed = make_url(url)
+    if parsed.drivername in ("postgres", "postgresql", "postgresql+psycopg2"):
+        parsed = parsed.set(drivername="postgresql+asyncpg")
+    return parsed.render_as_string(hide_password=False)
+
+
 # Main application database
 engine = create_engine(
     settings.database_url,
     echo=settings.debug,
-    pool_pre_ping=True,
+    **sync_pool_options,
 )
 
 SessionLocal = sessionmaker(
@@ -22,11 +52,23 @@ SessionLocal = sessionmaker(
     bind=engine
 )
 
+async_engine = create_async_engine(
+    to_async_url(settings.database_url),
+    echo=settings.debug,
+    **pool_options,
+)
+
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine,
+    autoflush=False,
+    expire_on_commit=False,
+)
+
 # Better Auth database (separate from main app database)
 auth_engine = create_engine(
     settings.auth_database_url,
     echo=settings.debug,
-    pool_pre_ping=True,
+    **sync_pool_options,
 )
 
 AuthSessionLocal = sessionmaker(
@@ -35,6 +77,18 @@ AuthSessionLocal = sessionmaker(
     bind=auth_engine
 )
 
+async_auth_engine = create_async_engine(
+    to_async_url(settings.auth_database_url),
+    echo=settings.debug,
+    **pool_options,
+)
+
+AsyncAuthSessionLocal = async_sessionmaker(
+    bind=async_auth_engine,
+    autoflush=False,
+    expire_on_commit=False,
+)
+
 
 def get_db() -> Generator[Session, None, None]:
     """
@@ -55,4 +109,20 @@ def get_auth_db() -> Generator[Session, None, None]:
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+
+async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
+    """
+    Dependency for async main application database session.
+    """
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+async def get_async_auth_db() -> AsyncGenerator[AsyncSession, None]:
+    """
+    Dependency for async Better Auth database session.
+    """
+    async with AsyncAuthSessionLocal() as db:
+        yield db
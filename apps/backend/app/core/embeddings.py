@@ -0,0 +1,99 @@
+"""
+Process-wide text embedding model.
+
+The ONNX model is loaded once per process (eagerly by the Celery
+worker_process_init hook and the FastAPI lifespan, lazily anywhere else)
+and shared by every VectorService. Chunk embeddings are cached in Valkey
+by content hash, so unchanged text is never embedded twice.
+"""
+import hashlib
+import logging
+import threading
+import time
+from typing import List, Optional
+
+import numpy as np
+from fastembed import TextEmbedding
+from prometheus_client import Counter
+from valkey.exceptions import ValkeyError
+
+from app.core.config import get_settings
+from app.core.valkey_client import get_valkey
+
+logger = logging.getLogger(__name__)
+
+_model: Optional[TextEmbedding] = None
+_load_lock = threading.Lock()
+# Inference is serialized: ONNX Runtime already uses every core for one call,
+# and the tokenizer's padding/truncation state is shared by the whole model
+_embed_lock = threading.Lock()
+
+EMBEDDING_CACHE = Counter("embedding_cache_requests_total", "Chunk embedding cache lookups", ["result"])
+
+
+def get_embedding_model() -> TextEmbedding:
+    """Return the shared embedding model, loading it on first use."""
+    global _model
+    if _model is None:
+        with _load_lock:
+            if _model is None:
+                started = time.monotonic()
+                _model = TextEmbedding(model_name=get_settings().embedding_model_name)
+                logger.info(f"Loaded embedding model in {time.monotonic() - started:.2f}s")
+    return _model
+
+
+def embed_texts(texts: List[str]) -> List[List[float]]:
+    """Embed texts with the shared model (thread-safe)."""
+    model = get_embedding_model()
+    with _embed_lock:
+        return [embedding.tolist() for embedding in model.embed(texts)]
+
+
+def warmup_embedding_model() -> None:
+    """Load the model and run one inference so the first real request is not slowed down."""
+    started = time.monotonic()
+    embed_texts(["warmup"])
+    logger.info(f"Embedding model warm after {time.monotonic() - started:.2f}s")
+
+
+def embed_texts_cached(texts: List[str]) -> List[List[float]]:
+    """
+    Embed texts, reusing embeddings cached by (model, text hash).
+
+    Cache failures fall back to embedding everything.
+    """
+    if not texts:
+        return []
+    settings = get_settings()
+    keys = [
+        f"embedding:{settings.embedding_model_name}:{hashlib.sha256(text.encode()).hexdigest()}"
+        for text in texts
+    ]
+    valkey = get_valkey()
+    try:
+        cached = valkey.mget(keys)
+    except ValkeyError as e:
+        logger.warning(f"Embedding cache unavailable: {e}")
+        cached = [None] * len(texts)
+
+    missing = [index for index, raw in enumerate(cached) if raw is None]
+    EMBEDDING_CACHE.labels("hit").inc(len(texts) - len(missing))
+    EMBEDDING_CACHE.labels("miss").inc(len(missing))
+    fresh = embed_texts([texts[index] for index in missing]) if missing else []
+
+    if fresh:
+        pipeline = valkey.pipeline(transaction=False)
+        for index, embedding in zip(missing, fresh):
+            pipeline.set(keys[index], np.asarray(embedding, dtype=np.float32).tobytes(),
+                         ex=settings.embedding_cache_ttl_seconds)
+        try:
+            pipeline.execute()
+        except ValkeyError as e:
+            logger.warning(f"Could not cache embeddings: {e}")
+
+    embeddings = dict(zip(missing, fresh))
+    return [
+        embeddings[index] if raw is None else np.frombuffer(raw, dtype=np.float32).tolist()
+        for index, raw in enumerate(cached)
+    ]
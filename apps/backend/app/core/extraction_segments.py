@@ -0,0 +1,215 @@
+"""
+Segment-level extraction helpers.
+
+Entries are split into content-defined segments (groups of paragraphs whose
+boundaries depend only on the paragraphs themselves), so an edit changes only
+the segments it touches. Each segment is extracted on its own; its ids are
+namespaced by the segment hash, which keeps them stable while the segment is
+unchanged. Segment results are merged into one ExtractionResult, and two
+merged results can be diffed to find what downstream stores must update.
+
+Text longer than the extraction section limit (typically a single huge
+paragraph) is further split into overlapping sections that are extracted
+concurrently and merged the same way.
+"""
+import hashlib
+import re
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from app.schemas.extraction import Entity, Event, ExtractionMetadata, ExtractionResult, Relationship, Todo
+
+PARAGRAPH_SPLIT = re.compile(r"\n\s*\n")
+SENTENCE_SPLIT = re.compile(r"(?<=[.!?])\s+|\n+")
+
+
+def segment_hash(text: str) -> str:
+    """Hash of a segment, insensitive to whitespace-only changes."""
+    normalized = " ".join(text.split())
+    return hashlib.sha256(normalized.encode()).hexdigest()[:12]
+
+
+def split_segments(content: str, max_chars: int, boundary_modulus: int) -> List[str]:
+    """
+    Split content into segments of whole paragraphs.
+
+    A segment ends after a paragraph whose hash is divisible by
+    `boundary_modulus`, or before it would exceed `max_chars`, so boundaries
+    move only around edited paragraphs.
+    """
+    paragraphs = [p.strip() for p in PARAGRAPH_SPLIT.split(content) if p.strip()]
+    segments: List[str] = []
+    current: List[str] = []
+    size = 0
+    for paragraph in paragraphs:
+        if current and size + len(paragraph) > max_chars:
+            segments.append("\n\n".join(current))
+            current, size = [], 0
+        current.append(paragraph)
+        size += len(paragraph) + 2
+        if int(segment_hash(paragraph), 16) % boundary_modulus == 0:
+            segments.append("\n\n".join(current))
+            current, size = [], 0
+    if current:
+        segments.append("\n\n".join(current))
+    return segments
+
+
+def split_sections(content: str, max_chars: int, overlap_chars: int) -> List[str]:
+    """
+    Split text into sections of at most about `max_chars`, on sentence
+    boundaries where possible. Each section repeats the last sentences
+    (up to `overlap_chars`) of the previous one, so facts spanning a
+    boundary are seen whole by at least one section.
+    """
+    if len(content) <= max_chars:
+        return [content]
+
+    pieces: List[str] = []
+    for sentence in SENTENCE_SPLIT.split(content):
+        sentence = sentence.strip()
+        while len(sentence) > max_chars:
+            pieces.append(sentence[:max_chars])
+            sentence = sentence[max_chars:]
+        if sentence:
+            pieces.append(sentence)
+
+    sections: List[str] = []
+    current: List[str] = []
+    size = 0
+    for piece in pieces:
+        if current and size + len(piece) > max_chars:
+            sections.append(" ".join(current))
+            carry: List[str] = []
+            carried = 0
+            for previous in reversed(current):
+                if carried + len(previous) > overlap_chars:
+                    break
+                carry.insert(0, previous)
+                carried += len(previous) + 1
+            current, size = carry, carried
+        current.append(piece)
+        size += len(piece) + 1
+    if current:
+        sections.append(" ".join(current))
+    return sections
+
+
+def namespace_extraction(result: ExtractionResult, prefix: str) -> ExtractionResult:
+    """Prefix every id (and every reference to one) with `prefix`."""
+    def ns(local_id: str) -> str:
+        return f"{prefix}_{local_id}"
+
+    return ExtractionResult(
+        metadata=result.metadata,
+        entities=[entity.model_copy(update={"id": ns(entity.id)}) for entity in result.entities],
+        relationships=[
+            rel.model_copy(update={"source": ns(rel.source), "target": ns(rel.target)})
+            for rel in result.relationships
+            if rel.target != "null"
+        ],
+        todos=[
+            todo.model_copy(update={"id": ns(todo.id), "related_entities": [ns(e) for e in todo.related_entities]})
+            for todo in result.todos
+        ],
+        events=[
+            event.model_copy(update={"id": ns(event.id), "related_entities": [ns(e) for e in event.related_entities]})
+            for event in result.events
+        ],
+    )
+
+
+def _entity_key(entity: Entity) -> Tuple[str, str]:
+    return ((entity.normalized_name or entity.name).strip().lower(), entity.type.strip().lower())
+
+
+def merge_extractions(results: Iterable[ExtractionResult]) -> ExtractionResult:
+    """
+    Merge extraction results in order.
+
+    Entities with the same normalized name and type collapse into the first
+    occurrence; references to the duplicates are remapped to its id.
+    Relationships, todos and events repeated across results are kept once.
+    """
+    metadata = ExtractionMetadata()
+    entities: List[Entity] = []
+    by_key: Dict[Tuple[str, str], Entity] = {}
+    id_map: Dict[str, str] = {}
+    relationships: Dict[Tuple[str, str, str], Relationship] = {}
+    todos: Dict[str, Todo] = {}
+    events: Dict[Tuple[str, Optional[str]], Event] = {}
+
+    results = list(results)
+    for result in results:
+        for field in ExtractionMetadata.model_fields:
+            if getattr(metadata, field) is None:
+                setattr(metadata, field, getattr(result.metadata, field))
+
+        for entity in result.entities:
+            existing = by_key.get(_entity_key(entity))
+            if existing is None:
+                entity = entity.model_copy(deep=True)
+                by_key[_entity_key(entity)] = entity
+                entities.append(entity)
+                id_map[entity.id] = entity.id
+            else:
+                id_map[entity.id] = existing.id
+                existing.attributes = {**entity.attributes, **existing.attributes}
+
+    def remap(ids: List[str]) -> List[str]:
+        return list(dict.fromkeys(id_map.get(entity_id, entity_id) for entity_id in ids))
+
+    for result in results:
+        for rel in result.relationships:
+            rel = rel.model_copy(update={"source": id_map.get(rel.source, rel.source), "target": id_map.get(rel.target, rel.target)})
+            relationships.setdefault((rel.source, rel.type.lower(), rel.target), rel)
+        for todo in result.todos:
+            key = " ".join(todo.task.lower().split())
+            todos.setdefault(key, todo.model_copy(update={"related_entities": remap(todo.related_entities)}))
+        for event in result.events:
+            key = (" ".join(event.title.lower().split()), event.datetime)
+            events.setdefault(key, event.model_copy(update={"related_entities": remap(event.related_entities)}))
+
+    return ExtractionResult(
+        metadata=metadata,
+        entities=entities,
+        relationships=list(relationships.values()),
+        todos=list(todos.values()),
+        events=list(events.values()),
+    )
+
+
+def diff_extractions(old: ExtractionResult, new: ExtractionResult) -> Tuple[ExtractionResult, Dict[str, list]]:
+    """
+    Compare two merged results.
+
+    Returns:
+        Tuple of (changed, removed). `changed` holds the items of `new` that are
+        added or differ from `old`; `removed` lists ids of entities, todos and
+        events only in `old`, and [source, type, target] of removed relationships.
+    """
+    def changed_items(old_items, new_items):
+        previous = {item.id: item for item in old_items}
+        return [item for item in new_items if previous.get(item.id) != item]
+
+    def rel_key(rel: Relationship) -> Tuple[str, str, str]:
+        # Relationship types are compared case-insensitively, as in merge_extractions
+        return rel.source, rel.type.lower(), rel.target
+
+    old_rels = {rel_key(rel): rel for rel in old.relationships}
+    new_rels = {rel_key(rel): rel for rel in new.relationships}
+    new_ids = {item.id for item in [*new.entities, *new.todos, *new.events]}
+
+    changed = ExtractionResult(
+        metadata=new.metadata,
+        entities=changed_items(old.entities, new.entities),
+        relationships=[rel for key, rel in new_rels.items() if old_rels.get(key) != rel],
+        todos=changed_items(old.todos, new.todos),
+        events=changed_items(old.events, new.events),
+    )
+    removed = {
+        "entities": [entity.id for entity in old.entities if entity.id not in new_ids],
+        "todos": [todo.id for todo in old.todos if todo.id not in new_ids],
+        "events": [event.id for event in old.events if event.id not in new_ids],
+        "relationships": [list(key) for key in old_rels if key not in new_rels],
+    }
+    return changed, removed
@@ -4,6 +4,7 @@ Provides a reusable client for AI services, similar to database connections.
 """
 from functools import lru_cache
 import google.genai as genai
+from google.genai import types
 
 from app.core.config import get_settings
 
@@ -15,4 +16,9 @@ def get_genai_client() -> genai.Client:
     Uses LRU cache to avoid recreating the client on every call.
     """
     settings = get_settings()
-    return genai.Client(api_key=settings.gemini_api_key)
\ No newline at end of file
+    if settings.gemini_base_url:
+        return genai.Client(
+            api_key=settings.gemini_api_key,
+            http_options=types.HttpOptions(base_url=settings.gemini_base_url),
+        )
+    return genai.Client(api_key=settings.gemini_api_key)
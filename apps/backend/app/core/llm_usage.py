@@ -0,0 +1,163 @@
+"""
+LLM usage accounting.
+
+Every Gemini call is recorded twice: in Prometheus metrics labelled by
+operation, model and outcome, and in the llm_usage_daily Postgres rollup
+keyed by day, user, operation and model.
+"""
+import logging
+import os
+import time
+from contextlib import asynccontextmanager
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from prometheus_client import CollectorRegistry, Counter, Histogram, REGISTRY
+from prometheus_client import multiprocess
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.exc import SQLAlchemyError
+
+from app.core.config import get_settings
+from app.core.database import AsyncSessionLocal
+from app.models.llm_usage import LLMUsageDaily
+
+logger = logging.getLogger(__name__)
+
+LLM_CALLS = Counter(
+    "llm_calls_total", "Gemini calls", ["operation", "model", "outcome"],
+)
+LLM_TOKENS = Counter(
+    "llm_tokens_total", "Gemini tokens by kind (prompt, cached, output, total)", ["operation", "model", "kind"],
+)
+LLM_LATENCY = Histogram(
+    "llm_call_latency_seconds", "Gemini call latency", ["operation", "model"],
+    buckets=(0.25, 0.5, 1, 2, 4, 8, 15, 30, 60, 120),
+)
+
+# Summed columns of the llm_usage_daily rollup
+ROLLUP_COLUMNS = ("calls", "failures", "prompt_tokens", "cached_tokens", "output_tokens", "total_tokens", "latency_ms")
+
+
+class LLMCall:
+    """Mutable record of one tracked call; `observe` the response (or the last stream chunk)."""
+
+    def __init__(self, operation: str, user_id: str, model: str, reference: Optional[str] = None):
+        self.operation = operation
+        self.user_id = user_id
+        self.model = model
+        self.reference = reference
+        self.usage: Any = None
+
+    def observe(self, response: Any) -> None:
+        usage = getattr(response, "usage_metadata", None)
+        if usage is not None:
+            self.usage = usage
+
+    def tokens(self) -> dict:
+        usage = self.usage
+        return {
+            "prompt": (usage.prompt_token_count or 0) if usage else 0,
+            "cached": (usage.cached_content_token_count or 0) if usage else 0,
+            "output": (usage.candidates_token_count or 0) if usage else 0,
+            "total": (usage.total_token_count or 0) if usage else 0,
+        }
+
+
+@asynccontextmanager
+async def track_llm_call(operation: str, user_id: str, model: Optional[str] = None,
+                         reference: Optional[str] = None) -> AsyncIterator[LLMCall]:
+    """
+    Measure a Gemini call and record its usage.
+
+    Usage:
+        async with track_llm_call("extraction", user_id, reference=f"journal:{id}") as call:
+            response = await client.aio.models.generate_content(...)
+            call.observe(response)
+    """
+    call = LLMCall(operation, user_id, model or get_settings().gemini_model, reference)
+    started = time.monotonic()
+    outcome = "success"
+    try:
+        yield call
+    except Exception:
+        outcome = "error"
+        raise
+    except BaseException:
+        outcome = "cancelled"
+        raise
+    finally:
+        await record_llm_call(call, time.monotonic() - started, outcome)
+
+
+async def record_llm_call(call: LLMCall, latency: float, outcome: str = "success") -> None:
+    """Record a finished call in Prometheus and the daily Postgres rollup."""
+    await record_llm_calls([(call, outcome)], latency)
+
+
+async def record_llm_calls(calls: List[Tuple[LLMCall, str]], latency: Optional[float] = None) -> None:
+    """
+    Record finished calls with their outcomes, upserting the rollup once per
+    (user, operation, model) in a single statement.
+
+    Args:
+        calls: (call, outcome) pairs
+        latency: Per-call latency in seconds; None when it was not measured
+            (e.g. batch job results), which records neither a latency sample
+            nor rollup latency
+    """
+    rows: Dict[Tuple[str, str, str], Dict[str, int]] = {}
+    for call, outcome in calls:
+        tokens = call.tokens()
+        LLM_CALLS.labels(call.operation, call.model, outcome).inc()
+        if latency is not None:
+            LLM_LATENCY.labels(call.operation, call.model).observe(latency)
+        for kind, count in tokens.items():
+            if count:
+                LLM_TOKENS.labels(call.operation, call.model, kind).inc(count)
+
+        if call.reference:
+            logger.info(
+                f"LLM {call.operation} for {call.reference}: {tokens['total']} tokens "
+                f"({tokens['cached']} cached), {latency or 0:.2f}s, {outcome}"
+            )
+
+        values = rows.setdefault((call.user_id, call.operation, call.model), dict.fromkeys(ROLLUP_COLUMNS, 0))
+        values["calls"] += 1
+        values["failures"] += 0 if outcome == "success" else 1
+        values["prompt_tokens"] += tokens["prompt"]
+        values["cached_tokens"] += tokens["cached"]
+        values["output_tokens"] += tokens["output"]
+        values["total_tokens"] += tokens["total"]
+        values["latency_ms"] += int((latency or 0) * 1000)
+
+    if not rows or not get_settings().llm_usage_rollup_enabled:
+        return
+
+    day = datetime.utcnow().date()
+    stmt = insert(LLMUsageDaily).values([
+        {"day": day, "user_id": user_id, "operation": operation, "model": model, **values}
+        # Sorted so concurrent upserts lock rows in the same order
+        for (user_id, operation, model), values in sorted(rows.items())
+    ])
+    stmt = stmt.on_conflict_do_update(
+        constraint="uq_llm_usage_daily_key",
+        set_={column: getattr(LLMUsageDaily, column) + stmt.excluded[column] for column in ROLLUP_COLUMNS},
+    )
+    try:
+        async with AsyncSessionLocal() as db:
+            await db.execute(stmt)
+            await db.commit()
+    except SQLAlchemyError as e:
+        logger.warning(f"Could not record LLM usage: {e}")
+
+
+def prometheus_registry() -> CollectorRegistry:
+    """
+    Registry to expose. With PROMETHEUS_MULTIPROC_DIR set (multiple uvicorn
+    or Celery worker processes), metrics of all processes are aggregated.
+    """
+    if "PROMETHEUS_MULTIPROC_DIR" not in os.environ:
+        return REGISTRY
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    return registry
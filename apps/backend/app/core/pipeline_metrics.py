@@ -0,0 +1,70 @@
+"""
+Per-stage timing of the journal pipeline.
+
+Every stage (extraction, graph, vector, todo) is observed in a Prometheus
+histogram. With `pipeline_stage_log_enabled`, each duration is also pushed to
+a capped Valkey list, so the pipeline benchmark can compute exact percentiles
+across all worker processes.
+"""
+import json
+import logging
+import time
+from contextlib import contextmanager
+from typing import Iterator
+
+from prometheus_client import Histogram
+from valkey.exceptions import ValkeyError
+
+from app.core.config import get_settings
+from app.core.valkey_client import get_valkey
+
+logger = logging.getLogger(__name__)
+
+PIPELINE_STAGES = ("extraction", "graph", "vector", "todo")
+
+STAGE_LATENCY = Histogram(
+    "pipeline_stage_seconds", "Journal pipeline stage duration", ["stage", "outcome"],
+    buckets=(0.05, 0.1, 0.25, 0.5, 1, 2, 4, 8, 15, 30, 60, 120),
+)
+
+
+def stage_log_key(stage: str) -> str:
+    return f"pipeline_stage:{stage}"
+
+
+@contextmanager
+def track_stage(stage: str) -> Iterator[None]:
+    """
+    Time one pipeline stage.
+
+    Usage:
+        with track_stage("graph"):
+            graph_service.ingest_extraction(...)
+    """
+    started = time.monotonic()
+    outcome = "success"
+    try:
+        yield
+    except BaseException:
+        outcome = "error"
+        raise
+    finally:
+        elapsed = time.monotonic() - started
+        STAGE_LATENCY.labels(stage, outcome).observe(elapsed)
+        _log_stage(stage, elapsed, outcome)
+
+
+def _log_stage(stage: str, seconds: float, outcome: str) -> None:
+    settings = get_settings()
+    if not settings.pipeline_stage_log_enabled:
+        return
+    key = stage_log_key(stage)
+    try:
+        (
+            get_valkey().pipeline(transaction=False)
+            .lpush(key, json.dumps({"seconds": seconds, "outcome": outcome}))
+            .ltrim(key, 0, settings.pipeline_stage_log_max_samples - 1)
+            .execute()
+        )
+    except ValkeyError as e:
+        logger.warning(f"Could not log pipeline stage timing: {e}")
@@ -1,6 +1,7 @@
 """
 Prompts for LLM extraction from journal entries.
 """
+import hashlib
 
 SYSTEM_PROMPT = """
 You are an AI assistant specialized in extracting structured information from personal journal entries. Your task is to analyze the provided journal entry and extract the following components in a specific JSON format:
@@ -160,6 +161,9 @@ Output:
 }
 """
 
+# Changes whenever the static extraction prompt changes; used to key caches
+PROMPT_VERSION = hashlib.sha256(f"{SYSTEM_PROMPT}\n\n{FEW_SHOT_EXAMPLES}".encode()).hexdigest()[:12]
+
 
 def build_extraction_prompt(journal_content: str, current_date: str, timezone: str = "UTC") -> str:
     """
@@ -0,0 +1,262 @@
+"""
+Gemini rate limiting shared by every process (API replicas and Celery workers).
+
+Requests and tokens per minute are enforced with token buckets held in Valkey,
+total concurrency with a leased in-flight set, and per-process concurrency with
+a local semaphore. A 429 from the API pauses all processes for the advertised
+retry delay instead of failing the call.
+"""
+import asyncio
+import logging
+import random
+import re
+import time
+import uuid
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Awaitable, Callable, Dict, Optional, TypeVar
+
+from google.genai import errors
+from valkey.exceptions import ValkeyError
+
+from app.core.config import get_settings
+from app.core.valkey_client import get_async_valkey
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Rough characters-per-token ratio used to estimate request size before sending
+CHARS_PER_TOKEN = 4
+
+# Longest single sleep between admission attempts
+MAX_POLL_SECONDS = 1.0
+
+# KEYS: rpm bucket, tpm bucket, in-flight set, cooldown
+# ARGV: rpm, tpm, tokens, max concurrency, lease ms, member
+# Returns 0 when admitted, otherwise the suggested wait in milliseconds.
+ACQUIRE_SCRIPT = """
+local cooldown = redis.call('PTTL', KEYS[4])
+if cooldown > 0 then return cooldown end
+
+local time = redis.call('TIME')
+local now = tonumber(time[1]) * 1000 + math.floor(tonumber(time[2]) / 1000)
+local rpm = tonumber(ARGV[1])
+local tpm = tonumber(ARGV[2])
+local need = math.min(tonumber(ARGV[3]), tpm)
+
+local function refill(key, capacity)
+    local state = redis.call('HMGET', key, 'tokens', 'ts')
+    local tokens = tonumber(state[1]) or capacity
+    local ts = tonumber(state[2]) or now
+    return math.min(capacity, tokens + (now - ts) * capacity / 60000)
+end
+
+local requests = refill(KEYS[1], rpm)
+local tokens = refill(KEYS[2], tpm)
+local wait = 0
+if requests < 1 then wait = math.max(wait, (1 - requests) * 60000 / rpm) end
+if tokens < need then wait = math.max(wait, (need - tokens) * 60000 / tpm) end
+
+redis.call('ZREMRANGEBYSCORE', KEYS[3], '-inf', now)
+if wait == 0 and redis.call('ZCARD', KEYS[3]) >= tonumber(ARGV[4]) then wait = 50 end
+if wait > 0 then return math.ceil(wait) end
+
+redis.call('HSET', KEYS[1], 'tokens', requests - 1, 'ts', now)
+redis.call('HSET', KEYS[2], 'tokens', tokens - need, 'ts', now)
+redis.call('PEXPIRE', KEYS[1], 120000)
+redis.call('PEXPIRE', KEYS[2], 120000)
+redis.call('ZADD', KEYS[3], now + tonumber(ARGV[5]), ARGV[6])
+redis.call('PEXPIRE', KEYS[3], tonumber(ARGV[5]) * 2)
+return 0
+"""
+
+
+class RateLimitTimeout(RuntimeError):
+    """Raised when a call could not be admitted within the configured wait."""
+
+
+def estimate_tokens(*texts: Optional[str]) -> int:
+    """Estimate the token count of the given prompt parts."""
+    return sum(len(text) for text in texts if text) // CHARS_PER_TOKEN + 1
+
+
+class GeminiRateLimiter:
+    """
+    Process-wide admission control for Gemini calls.
+
+    Use `run` for a call with 429 handling, `stream` for a streamed response,
+    or `slot` to hold a permit around a call whose errors are handled elsewhere.
+    """
+
+    def __init__(self):
+        settings = get_settings()
+        self._local = asyncio.Semaphore(settings.gemini_local_concurrency)
+        self._script = None
+        self.admitted = 0
+        self.waits = 0
+        self.throttled = 0
+        self.wait_seconds = 0.0
+
+    def _keys(self, model: str):
+        prefix = f"gemini_rate:{model}"
+        return [f"{prefix}:rpm", f"{prefix}:tpm", f"{prefix}:inflight", f"{prefix}:cooldown"]
+
+    async def run(self, call: Callable[[], Awaitable[T]], estimated_tokens: int = 1, model: Optional[str] = None) -> T:
+        """
+        Run `call` once admitted, retrying after rate limit (429) responses.
+
+        Args:
+            call: Zero-argument callable returning the API coroutine
+            estimated_tokens: Expected prompt + response tokens, debited from the TPM bucket
+            model: Model whose limits apply (defaults to the configured model)
+
+        Raises:
+            RateLimitTimeout: If the call was not admitted within gemini_rate_limit_max_wait_seconds.
+        """
+        settings = get_settings()
+        model = model or settings.gemini_model
+        deadline = time.monotonic() + settings.gemini_rate_limit_max_wait_seconds
+        attempt = 0
+        while True:
+            async with self.slot(estimated_tokens, model, deadline):
+                try:
+                    return await call()
+                except errors.APIError as e:
+                    delay = await self._throttled(e, model, attempt)
+            attempt += 1
+            if time.monotonic() + delay > deadline:
+                raise RateLimitTimeout("Gemini rate limit wait exceeded")
+            await self._sleep(delay)
+
+    async def stream(self, call: Callable[[], Awaitable[AsyncIterator[T]]], estimated_tokens: int = 1,
+                     model: Optional[str] = None) -> AsyncIterator[T]:
+        """
+        Like `run` for a streamed response: the permit is held until the stream
+        ends, and a 429 before the first chunk is retried after the cooldown.
+
+        Args:
+            call: Zero-argument callable opening the stream
+            estimated_tokens: Expected prompt + response tokens, debited from the TPM bucket
+            model: Model whose limits apply (defaults to the configured model)
+
+        Raises:
+            RateLimitTimeout: If the call was not admitted within gemini_rate_limit_max_wait_seconds.
+        """
+        settings = get_settings()
+        model = model or settings.gemini_model
+        deadline = time.monotonic() + settings.gemini_rate_limit_max_wait_seconds
+        attempt = 0
+        while True:
+            async with self.slot(estimated_tokens, model, deadline):
+                try:
+                    chunks = aiter(await call())
+                    first = await anext(chunks)
+                except StopAsyncIteration:
+                    return
+                except errors.APIError as e:
+                    delay = await self._throttled(e, model, attempt)
+                else:
+                    yield first
+                    async for chunk in chunks:
+                        yield chunk
+                    return
+            attempt += 1
+            if time.monotonic() + delay > deadline:
+                raise RateLimitTimeout("Gemini rate limit wait exceeded")
+            await self._sleep(delay)
+
+    @asynccontextmanager
+    async def slot(self, estimated_tokens: int = 1, model: Optional[str] = None, deadline: Optional[float] = None) -> AsyncIterator[None]:
+        """Hold a local and a shared concurrency permit for the duration of a call."""
+        settings = get_settings()
+        model = model or settings.gemini_model
+        if deadline is None:
+            deadline = time.monotonic() + settings.gemini_rate_limit_max_wait_seconds
+
+        async with self._local:
+            member = await self._acquire(model, estimated_tokens, deadline)
+            try:
+                yield
+            finally:
+                if member is not None:
+                    await self._release(model, member)
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "admitted": self.admitted,
+            "waits": self.waits,
+            "throttled": self.throttled,
+            "wait_seconds": round(self.wait_seconds, 3),
+        }
+
+    async def _acquire(self, model: str, tokens: int, deadline: float) -> Optional[str]:
+        """Wait until the shared buckets admit the call; returns the lease member."""
+        settings = get_settings()
+        member = uuid.uuid4().hex
+        keys = self._keys(model)
+        while True:
+            try:
+                if self._script is None:
+                    self._script = get_async_valkey().register_script(ACQUIRE_SCRIPT)
+                wait_ms = await self._script(keys=keys, args=[
+                    settings.gemini_rpm_limit,
+                    settings.gemini_tpm_limit,
+                    tokens,
+                    settings.gemini_max_concurrency,
+                    settings.gemini_call_lease_seconds * 1000,
+                    member,
+                ])
+            except ValkeyError as e:
+                # Degrade to the local semaphore only
+                logger.warning(f"Gemini rate limiter unavailable: {e}")
+                self.admitted += 1
+                return None
+
+            if not wait_ms:
+                self.admitted += 1
+                return member
+
+            delay = min(int(wait_ms) / 1000, MAX_POLL_SECONDS)
+            if time.monotonic() + delay > deadline:
+                raise RateLimitTimeout("Gemini rate limit wait exceeded")
+            self.waits += 1
+            await self._sleep(delay)
+
+    async def _release(self, model: str, member: str) -> None:
+        try:
+            await get_async_valkey().zrem(self._keys(model)[2], member)
+        except ValkeyError as e:
+            logger.warning(f"Could not release Gemini concurrency lease: {e}")
+
+    async def _throttled(self, error: errors.APIError, model: str, attempt: int) -> float:
+        """Start the shared cooldown for a 429 and return the delay; re-raise anything else."""
+        if error.code != 429:
+            raise error
+        delay = self._retry_delay(error, attempt)
+        self.throttled += 1
+        logger.warning(f"Gemini rate limited, pausing {delay:.1f}s")
+        await self._cool_down(model, delay)
+        return delay
+
+    async def _cool_down(self, model: str, delay: float) -> None:
+        """Pause admission in every process sharing this Valkey."""
+        try:
+            await get_async_valkey().set(self._keys(model)[3], "1", px=max(int(delay * 1000), 1))
+        except ValkeyError as e:
+            logger.warning(f"Could not share Gemini rate limit pause: {e}")
+
+    async def _sleep(self, delay: float) -> None:
+        delay *= random.uniform(1.0, 1.2)  # Spread out waiters released together
+        self.wait_seconds += delay
+        await asyncio.sleep(delay)
+
+    @staticmethod
+    def _retry_delay(error: errors.APIError, attempt: int) -> float:
+        """Use the server's RetryInfo delay when present, else exponential backoff."""
+        match = re.search(r"retryDelay['\"]?\s*[:=]\s*['\"]?(\d+(?:\.\d+)?)s", str(error.details or ""))
+        if match:
+            return float(match.group(1))
+        return min(2 ** attempt, 60)
+
+
+gemini_rate_limiter = GeminiRateLimiter()
@@ -0,0 +1,299 @@
+"""
+Resilience policies for Gemini calls.
+
+Every call gets a per-attempt timeout and an overall deadline, retryable
+failures are retried with jittered exponential backoff, slow attempts can be
+hedged with a duplicate request once they exceed a latency percentile, and a
+shared circuit breaker fails fast while the upstream is unhealthy. Each
+request sent (every retry and every hedge) is admitted by the rate limiter on
+its own.
+"""
+import asyncio
+import logging
+import random
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional, Tuple, TypeVar
+
+import httpx
+from google.genai import errors
+
+from app.core.config import get_settings
+from app.core.rate_limiter import gemini_rate_limiter
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Number of recent latencies kept per operation for percentile estimates
+LATENCY_WINDOW = 500
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised instead of calling the upstream while the circuit is open."""
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker.
+
+    Opens after `failure_threshold` consecutive upstream failures. After
+    `reset_seconds` one trial call is let through (half-open); its outcome
+    closes or re-opens the circuit.
+    """
+
+    def __init__(self, failure_threshold: int, reset_seconds: float):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+        self.times_opened = 0
+        # Number of half-open trials granted so far; identifies the current one
+        self.trials = 0
+        self._trial_in_flight = False
+
+    def allow(self) -> bool:
+        if self.state == "closed":
+            return True
+        if self.state == "open" and time.monotonic() - self.opened_at >= self.reset_seconds:
+            self.state = "half_open"
+            self._trial_in_flight = False
+        if self.state == "half_open" and not self._trial_in_flight:
+            self._trial_in_flight = True
+            self.trials += 1
+            return True
+        return False
+
+    def release_trial(self, trial: int) -> None:
+        """Give up a half-open trial that ended without a result (e.g. it was cancelled)."""
+        if self.state == "half_open" and self.trials == trial:
+            self._trial_in_flight = False
+
+    def record_success(self) -> None:
+        self.state = "closed"
+        self.failures = 0
+        self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        if self.state == "half_open" or self.failures >= self.failure_threshold:
+            if self.state != "open":
+                logger.warning(f"Gemini circuit opened after {self.failures} failures")
+                self.times_opened += 1
+            self.state = "open"
+            self.opened_at = time.monotonic()
+            self._trial_in_flight = False
+
+    def stats(self) -> Dict[str, Any]:
+        return {"state": self.state, "consecutive_failures": self.failures, "times_opened": self.times_opened}
+
+
+class LatencyTracker:
+    """Rolling window of successful call latencies (seconds)."""
+
+    def __init__(self, window: int = LATENCY_WINDOW):
+        self._samples: Deque[float] = deque(maxlen=window)
+
+    def record(self, seconds: float) -> None:
+        self._samples.append(seconds)
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def percentile(self, p: float) -> Optional[float]:
+        if not self._samples:
+            return None
+        ordered = sorted(self._samples)
+        index = min(int(len(ordered) * p / 100), len(ordered) - 1)
+        return ordered[index]
+
+
+class ResilientCaller:
+    """
+    Applies deadlines, retries, hedging and the circuit breaker to one kind of call.
+
+    Usage:
+        response = await extraction_caller.call(lambda: client.aio.models.generate_content(...), estimated_tokens=tokens)
+    """
+
+    def __init__(self, name: str, breaker: CircuitBreaker):
+        self.name = name
+        self.breaker = breaker
+        self.latency = LatencyTracker()
+        self.calls = 0
+        self.successes = 0
+        self.failures = 0
+        self.retries = 0
+        self.timeouts = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+        self.rejected = 0
+
+    async def call(self, factory: Callable[[], Awaitable[T]], hedge: bool = True,
+                   estimated_tokens: Optional[int] = None) -> T:
+        """
+        Run `factory()` under the resilience policy.
+
+        Args:
+            factory: Zero-argument callable creating a fresh call coroutine per attempt
+            hedge: Allow a duplicate request for slow attempts (disable for calls
+                whose result holds a resource, such as an open stream)
+            estimated_tokens: Admit every request through the Gemini rate limiter,
+                debiting this many tokens each time. The per-attempt timeout starts
+                once a request is admitted. None if `factory` admits itself.
+
+        Raises:
+            CircuitOpenError: If the circuit is open.
+            TimeoutError: If the overall deadline passed.
+            RateLimitTimeout: If a request was not admitted in time.
+        """
+        self.calls += 1
+        if not self.breaker.allow():
+            self.rejected += 1
+            raise CircuitOpenError("Gemini is unavailable (circuit open)")
+
+        # While half-open only the trial call gets here; if it ends without
+        # recording an outcome (cancelled), the next call becomes the trial
+        trial = self.breaker.trials if self.breaker.state == "half_open" else None
+        try:
+            return await self._call(factory, hedge, estimated_tokens)
+        finally:
+            if trial is not None:
+                self.breaker.release_trial(trial)
+
+    async def _call(self, factory: Callable[[], Awaitable[T]], hedge: bool, estimated_tokens: Optional[int]) -> T:
+        settings = get_settings()
+        deadline = time.monotonic() + settings.gemini_call_deadline_seconds
+        attempt = 0
+        while True:
+            remaining = deadline - time.monotonic()
+            try:
+                result = await self._attempt(
+                    factory, min(settings.gemini_attempt_timeout_seconds, remaining), hedge, estimated_tokens,
+                )
+            except Exception as e:
+                if not self._retryable(e):
+                    # Client errors say nothing about upstream health
+                    if self.breaker.state == "half_open":
+                        self.breaker.record_success()
+                    self.failures += 1
+                    raise
+                if isinstance(e, TimeoutError):
+                    self.timeouts += 1
+                self.breaker.record_failure()
+
+                backoff = random.uniform(0, settings.gemini_retry_base_seconds * 2 ** attempt)
+                if attempt >= settings.gemini_max_retries or self.breaker.state == "open" \
+                        or time.monotonic() + backoff >= deadline:
+                    self.failures += 1
+                    raise
+                attempt += 1
+                self.retries += 1
+                logger.warning(f"Retrying {self.name} Gemini call (attempt {attempt}) after {type(e).__name__}: {e}")
+                await asyncio.sleep(backoff)
+                continue
+
+            self.breaker.record_success()
+            self.successes += 1
+            return result
+
+    async def _attempt(self, factory: Callable[[], Awaitable[T]], timeout: float, hedge: bool,
+                       estimated_tokens: Optional[int]) -> T:
+        """One attempt, duplicated after the hedge delay if it is still running."""
+
+        def launch() -> asyncio.Task:
+            return asyncio.ensure_future(self._request(factory, timeout, estimated_tokens))
+
+        primary = launch()
+        pending = {primary}
+        error: Optional[BaseException] = None
+        try:
+            hedge_after = self._hedge_delay() if hedge else None
+            if hedge_after is not None:
+                done, _ = await asyncio.wait(pending, timeout=hedge_after)
+                if not done:
+                    self.hedges += 1
+                    pending.add(launch())
+
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        result, seconds = task.result()
+                        self.latency.record(seconds)
+                        if task is not primary:
+                            self.hedge_wins += 1
+                        return result
+                    error = task.exception()
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
+
+    @staticmethod
+    async def _request(factory: Callable[[], Awaitable[T]], timeout: float,
+                       estimated_tokens: Optional[int]) -> Tuple[T, float]:
+        """
+        Send one request, admitted by the rate limiter unless `estimated_tokens` is None.
+
+        Returns:
+            Tuple of (result, seconds spent after admission)
+        """
+        async def timed() -> Tuple[T, float]:
+            started = time.monotonic()
+            async with asyncio.timeout(timeout):
+                result = await factory()
+            return result, time.monotonic() - started
+
+        if estimated_tokens is None:
+            return await timed()
+        return await gemini_rate_limiter.run(timed, estimated_tokens=estimated_tokens)
+
+    def _hedge_delay(self) -> Optional[float]:
+        settings = get_settings()
+        if not settings.gemini_hedge_enabled or len(self.latency) < settings.gemini_hedge_min_samples:
+            return None
+        return self.latency.percentile(settings.gemini_hedge_percentile)
+
+    @staticmethod
+    def _retryable(error: BaseException) -> bool:
+        return isinstance(error, (TimeoutError, errors.ServerError, httpx.TransportError))
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "calls": self.calls,
+            "successes": self.successes,
+            "failures": self.failures,
+            "retries": self.retries,
+            "timeouts": self.timeouts,
+            "hedges": self.hedges,
+            "hedge_wins": self.hedge_wins,
+            "rejected": self.rejected,
+            "latency_p50": self.latency.percentile(50),
+            "latency_p95": self.latency.percentile(95),
+            "latency_p99": self.latency.percentile(99),
+        }
+
+
+def _build_breaker() -> CircuitBreaker:
+    settings = get_settings()
+    return CircuitBreaker(settings.gemini_breaker_failure_threshold, settings.gemini_breaker_reset_seconds)
+
+
+# One breaker per process for the Gemini API, one caller per kind of call
+gemini_breaker = _build_breaker()
+extraction_caller = ResilientCaller("extraction", gemini_breaker)
+chat_caller = ResilientCaller("chat", gemini_breaker)
+# Streams keep their own latency window: time to first chunk is not comparable
+# to a full response and must not drive the hedge delay of chat calls
+chat_stream_caller = ResilientCaller("chat_stream", gemini_breaker)
+
+
+def get_resilience_stats() -> Dict[str, Any]:
+    return {
+        "breaker": gemini_breaker.stats(),
+        extraction_caller.name: extraction_caller.stats(),
+        chat_caller.name: chat_caller.stats(),
+        chat_stream_caller.name: chat_stream_caller.stats(),
+    }
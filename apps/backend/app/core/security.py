@@ -3,15 +3,54 @@ Security utilities for Better Auth session verification.
 This module reads and validates sessions created by Better Auth on the frontend.
 """
 from datetime import datetime, timezone
-from typing import Optional
+from typing import Any, Dict, Optional
 from sqlalchemy import select
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.cache import TTLCache
+from app.core.config import get_settings
 from app.models.auth import User, Session as AuthSession, Account
 
+settings = get_settings()
 
-def verify_session_token(
-    db: Session,
+# Session id -> user data dict (or None for unknown/expired sessions).
+# The cache is per process: invalidate_user_sessions only clears this
+# replica, so other replicas may serve a changed user row or OAuth token for
+# up to session_cache_ttl_seconds (a revoked session for as long).
+_session_cache = TTLCache(
+    max_entries=settings.session_cache_max_entries,
+    default_ttl=settings.session_cache_ttl_seconds,
+)
+
+
+def _seconds_until(expires_at: datetime) -> float:
+    """Seconds from now until the given (naive UTC or aware) datetime."""
+    if expires_at.tzinfo is None:
+        expires_at = expires_at.replace(tzinfo=timezone.utc)
+    return (expires_at - datetime.now(timezone.utc)).total_seconds()
+
+
+def get_session_cache_stats() -> Dict[str, Any]:
+    """Return hit/miss counters for the session lookup cache."""
+    return _session_cache.stats()
+
+
+def invalidate_user_sessions(user_id: str) -> int:
+    """
+    Drop every cached session belonging to a user from this process's cache.
+    Call this whenever the user's row or OAuth tokens change; other
+    processes pick the change up when their entries expire.
+
+    Returns:
+        Number of cached sessions removed
+    """
+    return _session_cache.delete_where(
+        lambda user_data: user_data is not None and user_data["id"] == user_id
+    )
+
+
+async def verify_session_token(
+    db: AsyncSession,
     session_token: str
 ) -> Optional[dict]:
     """
@@ -20,8 +59,12 @@ def verify_session_token(
     Better Auth session cookies have format: sessionId.signature
     The token column in the database contains the sessionId.
 
+    Lookups are cached per session id for `session_cache_ttl_seconds`
+    (never beyond the session's own expiry). Unknown or expired sessions
+    are cached as None for `session_cache_negative_ttl_seconds`.
+
     Args:
-        db: Auth database session
+        db: Async auth database session
         session_token: The session token from the cookie
 
     Returns:
@@ -33,6 +76,27 @@ def verify_session_token(
     # Extract session ID from token (first part before dot)
     session_id = session_token.split('.')[0]
 
+    found, cached = _session_cache.get(session_id)
+    if found:
+        return dict(cached) if cached is not None else None
+
+    user_data = await _load_session(db, session_id)
+    if user_data is None:
+        _session_cache.set(session_id, None, ttl=settings.session_cache_negative_ttl_seconds)
+        return None
+
+    ttl = min(settings.session_cache_ttl_seconds, _seconds_until(user_data.pop("session_expires_at")))
+    _session_cache.set(session_id, user_data, ttl=ttl)
+    return dict(user_data)
+
+
+async def _load_session(db: AsyncSession, session_id: str) -> Optional[dict]:
+    """
+    Load session, user and Google account data from the auth database.
+
+    Returns:
+        User data dict including `session_expires_at`, or None if invalid/expired
+    """
     # Query the session with user data using ORM
     stmt = (
         select(AuthSession, User)
@@ -40,19 +104,19 @@ def verify_session_token(
         .where(AuthSession.token == session_id)
     )
 
-    result = db.execute(stmt)
+    result = await db.execute(stmt)
     row = result.first()
-    
+
     if not row:
         return None
-    
+
     session_row, user_row = row
 
     if not session_row or not user_row:
         return None
 
     # Check if session is expired
-    if session_row.expiresAt < datetime.now(timezone.utc):
+    if _seconds_until(session_row.expiresAt) <= 0:
         return None
 
     # Query Google account for OAuth tokens
@@ -61,7 +125,7 @@ def verify_session_token(
         .where(Account.userId == user_row.id)
         .where(Account.providerId == "google")
     )
-    account_result = db.execute(account_stmt)
+    account_result = await db.execute(account_stmt)
     account_row = account_result.scalar_one_or_none()
 
     user_data = {
@@ -73,5 +137,6 @@ def verify_session_token(
         "google_access_token": account_row.accessToken if account_row else None,
         "google_refresh_token": account_row.refreshToken if account_row else None,
         "google_token_expiry": account_row.accessTokenExpiresAt if account_row else None,
+        "session_expires_at": session_row.expiresAt,
     }
-    return user_data
\ No newline at end of file
+    return user_data
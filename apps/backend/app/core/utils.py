@@ -1 +1,41 @@
-# Shared helper functions (e.g., date formatting)
\ No newline at end of file
+# Shared helper functions (e.g., date formatting)
+import asyncio
+import zoneinfo
+from datetime import date, datetime, timezone as dt_timezone
+from typing import Any, Coroutine, Optional, TypeVar
+
+T = TypeVar("T")
+
+_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+def run_async(coro: Coroutine[Any, Any, T]) -> T:
+    """
+    Run a coroutine to completion from synchronous code (e.g. Celery tasks).
+
+    A single event loop is reused per process so that pooled asyncpg
+    connections stay bound to the loop that created them.
+    """
+    global _loop
+    if _loop is None or _loop.is_closed():
+        _loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(_loop)
+    return _loop.run_until_complete(coro)
+
+
+def local_date(utc_time: datetime, timezone: str = "UTC") -> date:
+    """The user's local calendar date at a naive UTC timestamp (unknown timezones count as UTC)."""
+    try:
+        zone = zoneinfo.ZoneInfo(timezone)
+    except (zoneinfo.ZoneInfoNotFoundError, ValueError):
+        zone = zoneinfo.ZoneInfo("UTC")
+    return utc_time.replace(tzinfo=dt_timezone.utc).astimezone(zone).date()
+
+
+def format_local_date(utc_time: datetime, timezone: str = "UTC") -> str:
+    """
+    Format a naive UTC timestamp as the user's local date, e.g. "December 11, 2025".
+    Used as the "today" reference for relative dates in extraction prompts.
+    """
+    local_time = utc_time.replace(tzinfo=dt_timezone.utc).astimezone(zoneinfo.ZoneInfo(timezone))
+    return local_time.strftime("%B %d, %Y")
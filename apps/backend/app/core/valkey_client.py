@@ -0,0 +1,28 @@
+"""
+Valkey client initialization.
+Provides reusable sync and async clients for caching, progress tracking and coordination.
+"""
+from functools import lru_cache
+import valkey
+import valkey.asyncio as async_valkey
+
+from app.core.config import get_settings
+
+
+@lru_cache()
+def get_valkey() -> valkey.Valkey:
+    """
+    Get cached synchronous Valkey client.
+    """
+    settings = get_settings()
+    return valkey.Valkey.from_url(settings.valkey_url)
+
+
+@lru_cache()
+def get_async_valkey() -> async_valkey.Valkey:
+    """
+    Get cached asynchronous Valkey client.
+    Connections are created lazily on the running event loop.
+    """
+    settings = get_settings()
+    return async_valkey.Valkey.from_url(settings.valkey_url)
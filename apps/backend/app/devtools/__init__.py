@@ -0,0 +1,3 @@
+"""
+Development tools: a local fake of the Gemini API and load benchmarks.
+"""
@@ -0,0 +1,211 @@
+"""
+Local stand-in for the Gemini Developer API.
+
+Serves generateContent, streamGenerateContent and cachedContents with
+canned, schema-valid responses, so the pipeline can be load-tested without
+quota or network. Latency follows a lognormal distribution and a share of
+calls fail with 503 or 429, as configured in Settings (fake_gemini_*).
+
+Run it and point the backend at it:
+
+    uvicorn app.devtools.fake_gemini:app --port 8090
+    GEMINI_BASE_URL=http://localhost:8090 celery -A app.celery worker
+
+Response selection:
+    - JSON response mime type: an ExtractionResult built from the prompt text
+    - Tools enabled and the last turn is not a function response: a
+      vector_search function call
+    - Otherwise: a short text answer (streamed in a few chunks)
+
+Batch jobs are not emulated.
+"""
+import asyncio
+import json
+import math
+import random
+import re
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+from app.core.config import get_settings
+from app.schemas.extraction import Entity, Event, ExtractionMetadata, ExtractionResult, Relationship, Todo
+
+app = FastAPI(title="Fake Gemini API")
+
+NAME_PATTERN = re.compile(r"\b[A-Z][a-z]{2,}\b")
+SENTENCE_PATTERN = re.compile(r"[^.!?\n]+[.!?]?")
+
+CANNED_ANSWER = "Based on your journal, here is what I found. This answer was generated by the fake Gemini server."
+
+# Fake cached contents by name (only their existence matters)
+cached_contents: Dict[str, Dict[str, Any]] = {}
+
+
+def _latency() -> float:
+    settings = get_settings()
+    median = max(settings.fake_gemini_latency_median_ms, 1.0) / 1000
+    return random.lognormvariate(math.log(median), settings.fake_gemini_latency_sigma)
+
+
+def _injected_error() -> Optional[JSONResponse]:
+    settings = get_settings()
+    roll = random.random()
+    if roll < settings.fake_gemini_rate_limit_rate:
+        return JSONResponse(status_code=429, content={"error": {
+            "code": 429,
+            "message": "Resource has been exhausted (fake).",
+            "status": "RESOURCE_EXHAUSTED",
+            "details": [{"@type": "type.googleapis.com/google.rpc.RetryInfo", "retryDelay": "1s"}],
+        }})
+    if roll < settings.fake_gemini_rate_limit_rate + settings.fake_gemini_error_rate:
+        return JSONResponse(status_code=503, content={"error": {
+            "code": 503, "message": "The model is overloaded (fake).", "status": "UNAVAILABLE",
+        }})
+    return None
+
+
+def _text_of(content: Dict[str, Any]) -> str:
+    return " ".join(part["text"] for part in content.get("parts", []) if "text" in part)
+
+
+def _extraction(text: str) -> ExtractionResult:
+    """Deterministic ExtractionResult derived from capitalized words and sentences of the text."""
+    names = list(dict.fromkeys(NAME_PATTERN.findall(text)))[:4]
+    sentences = [s.strip() for s in SENTENCE_PATTERN.findall(text) if len(s.strip()) > 10]
+    entities = [
+        Entity(id=f"e{i + 1}", name=name, normalized_name=name, type="person" if i % 2 == 0 else "location")
+        for i, name in enumerate(names)
+    ]
+    entity_ids = [entity.id for entity in entities]
+    tomorrow = (datetime.now(timezone.utc) + timedelta(days=1)).replace(hour=10, minute=0, second=0, microsecond=0)
+
+    return ExtractionResult(
+        metadata=ExtractionMetadata(),
+        entities=entities,
+        relationships=[
+            Relationship(source=entity_ids[0], type="mentioned_with", target=entity_ids[1], description="Mentioned together")
+        ] if len(entity_ids) > 1 else [],
+        todos=[
+            Todo(id="t1", task=sentences[0][:120], priority="normal", related_entities=entity_ids[:1])
+        ] if sentences else [],
+        events=[
+            Event(id="ev1", title=f"Meet {names[0]}", datetime=tomorrow.isoformat(), duration_minutes=60,
+                  related_entities=entity_ids[:1])
+        ] if names else [],
+    )
+
+
+def _answer_parts(body: Dict[str, Any]) -> List[Dict[str, Any]]:
+    contents = body.get("contents", [])
+    last = contents[-1] if contents else {}
+    generation_config = body.get("generationConfig") or {}
+
+    if generation_config.get("responseMimeType") == "application/json":
+        return [{"text": _extraction(_text_of(last)).model_dump_json()}]
+
+    mode = ((body.get("toolConfig") or {}).get("functionCallingConfig") or {}).get("mode", "AUTO")
+    answered_tool = any("functionResponse" in part for part in last.get("parts", []))
+    if body.get("tools") and mode != "NONE" and not answered_tool:
+        return [{"functionCall": {"name": "vector_search", "args": {"query": _text_of(last)[:200], "top_k": 5}}}]
+
+    return [{"text": CANNED_ANSWER}]
+
+
+def _response(parts: List[Dict[str, Any]], model: str, prompt_chars: int) -> Dict[str, Any]:
+    output_chars = len(json.dumps(parts))
+    prompt_tokens, output_tokens = prompt_chars // 4 + 1, output_chars // 4 + 1
+    return {
+        "candidates": [{"content": {"role": "model", "parts": parts}, "finishReason": "STOP", "index": 0}],
+        "usageMetadata": {
+            "promptTokenCount": prompt_tokens,
+            "candidatesTokenCount": output_tokens,
+            "totalTokenCount": prompt_tokens + output_tokens,
+        },
+        "modelVersion": model,
+    }
+
+
+@app.post("/{version}/models/{model_action}")
+async def models_action(version: str, model_action: str, request: Request):
+    model, _, action = model_action.partition(":")
+    if action not in ("generateContent", "streamGenerateContent"):
+        return JSONResponse(status_code=404, content={"error": {
+            "code": 404, "message": f"{action} is not emulated", "status": "NOT_FOUND",
+        }})
+
+    body = await request.json()
+    latency = _latency()
+    error = _injected_error()
+    if error is not None:
+        await asyncio.sleep(latency / 4)
+        return error
+
+    parts = _answer_parts(body)
+    prompt_chars = len(json.dumps(body.get("contents", [])))
+    if action == "generateContent":
+        await asyncio.sleep(latency)
+        return _response(parts, model, prompt_chars)
+    return StreamingResponse(_stream(parts, model, prompt_chars, latency), media_type="text/event-stream")
+
+
+async def _stream(parts: List[Dict[str, Any]], model: str, prompt_chars: int, latency: float) -> AsyncIterator[str]:
+    if "text" in parts[0]:
+        words = parts[0]["text"].split(" ")
+        step = max(len(words) // 4, 1)
+        chunks = [[{"text": " ".join(words[i:i + step]) + (" " if i + step < len(words) else "")}]
+                  for i in range(0, len(words), step)]
+    else:
+        chunks = [parts]
+    for chunk in chunks:
+        await asyncio.sleep(latency / len(chunks))
+        yield f"data: {json.dumps(_response(chunk, model, prompt_chars))}\r\n\r\n"
+
+
+@app.post("/{version}/cachedContents")
+async def create_cached_content(version: str, request: Request):
+    body = await request.json()
+    ttl = float(str(body.get("ttl", "3600s")).rstrip("s"))
+    name = f"cachedContents/fake-{uuid.uuid4().hex[:12]}"
+    now = datetime.now(timezone.utc)
+    cached_contents[name] = {
+        "name": name,
+        "model": body.get("model"),
+        "displayName": body.get("displayName"),
+        "createTime": now.isoformat(),
+        "updateTime": now.isoformat(),
+        "expireTime": (now + timedelta(seconds=ttl)).isoformat(),
+        "usageMetadata": {"totalTokenCount": len(json.dumps(body)) // 4},
+    }
+    return cached_contents[name]
+
+
+@app.get("/{version}/cachedContents/{cache_id}")
+async def get_cached_content(version: str, cache_id: str):
+    cached = cached_contents.get(f"cachedContents/{cache_id}")
+    if cached is None:
+        return JSONResponse(status_code=404, content={"error": {
+            "code": 404, "message": "Cached content not found", "status": "NOT_FOUND",
+        }})
+    return cached
+
+
+@app.delete("/{version}/cachedContents/{cache_id}")
+async def delete_cached_content(version: str, cache_id: str):
+    cached_contents.pop(f"cachedContents/{cache_id}", None)
+    return {}
+
+
+@app.get("/health")
+async def health_check():
+    settings = get_settings()
+    return {
+        "status": "healthy",
+        "latency_median_ms": settings.fake_gemini_latency_median_ms,
+        "latency_sigma": settings.fake_gemini_latency_sigma,
+        "error_rate": settings.fake_gemini_error_rate,
+        "rate_limit_rate": settings.fake_gemini_rate_limit_rate,
+    }
@@ -0,0 +1,188 @@
+"""
+End-to-end throughput benchmark of the journal pipeline.
+
+Creates N journal entries through JournalService (which enqueues the Celery
+extraction task), waits until every entry is PROCESSED or FAILED and reports
+throughput, end-to-end and per-stage latency percentiles, and the Celery
+queue backlog sampled while the run was in progress.
+
+Per-stage timings are written by the workers when PIPELINE_STAGE_LOG_ENABLED
+is set. To avoid real quota, point workers at the fake Gemini server:
+
+    uvicorn app.devtools.fake_gemini:app --port 8090
+    GEMINI_BASE_URL=http://localhost:8090 PIPELINE_STAGE_LOG_ENABLED=true celery -A app.celery worker
+    python -m app.devtools.pipeline_benchmark --user-id <user id> --entries 200
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import select
+
+from app.core.database import AsyncSessionLocal
+from app.core.pipeline_metrics import PIPELINE_STAGES, stage_log_key
+from app.core.valkey_client import get_async_valkey
+from app.models.journal_entry import JournalEntry, ProcessingStatus
+from app.schemas.journal_entry import JournalEntryCreate
+from app.services.journal_service import JournalService
+
+PEOPLE = ["Alice", "Bob", "Priya", "Kenji", "Maria", "Omar", "Lena", "Tom"]
+PLACES = ["Berlin", "the office", "Lisbon", "the gym", "Cafe Luna", "the library"]
+ACTIVITIES = [
+    "had coffee with {person} at {place}",
+    "went for a long walk with {person} near {place}",
+    "reviewed the quarterly plan with {person} in {place}",
+    "called {person} about the trip to {place}",
+]
+FOLLOW_UPS = [
+    "I need to send {person} the notes by Friday.",
+    "We agreed to meet again at {place} next Tuesday at 10am.",
+    "Remember to book tickets to {place}.",
+    "I should ask {person} about the budget.",
+]
+
+
+def sample_entry(rng: random.Random, paragraphs: int) -> str:
+    """Journal-like text with people, places, plans and todos."""
+    lines = []
+    for _ in range(paragraphs):
+        person, place = rng.choice(PEOPLE), rng.choice(PLACES)
+        activity = rng.choice(ACTIVITIES).format(person=person, place=place)
+        follow_up = rng.choice(FOLLOW_UPS).format(person=person, place=place)
+        lines.append(f"Today I {activity}. It was {rng.choice(['great', 'tiring', 'useful', 'fun'])}. {follow_up}")
+    return "\n\n".join(lines)
+
+
+def percentile(samples: List[float], p: float) -> Optional[float]:
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    return ordered[min(int(len(ordered) * p / 100), len(ordered) - 1)]
+
+
+async def create_entries(user_id: str, count: int, concurrency: int, paragraphs: int, seed: int) -> Dict[int, float]:
+    """Create entries through JournalService; returns entry id -> submission time."""
+    rng = random.Random(seed)
+    contents = [sample_entry(rng, paragraphs) for _ in range(count)]
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def create(index: int) -> Tuple[int, float]:
+        async with semaphore, AsyncSessionLocal() as db:
+            submitted = time.monotonic()
+            entry = await JournalService(db).create_entry(
+                user_id, JournalEntryCreate(title=f"Benchmark entry {index}", content=contents[index]),
+            )
+            return entry.id, submitted
+
+    return dict(await asyncio.gather(*(create(index) for index in range(count))))
+
+
+async def wait_for_entries(submitted: Dict[int, float], queue: str, timeout: float,
+                           poll_seconds: float) -> Tuple[Dict[int, Tuple[ProcessingStatus, float]], List[int]]:
+    """
+    Poll entry statuses until all are settled or the timeout passes.
+
+    Returns:
+        Tuple of (settled entry id -> (status, settle time), backlog samples)
+    """
+    valkey = get_async_valkey()
+    settled: Dict[int, Tuple[ProcessingStatus, float]] = {}
+    backlog: List[int] = []
+    deadline = time.monotonic() + timeout
+    pending = set(submitted)
+
+    while pending and time.monotonic() < deadline:
+        backlog.append(await valkey.llen(queue))
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                select(JournalEntry.id, JournalEntry.status).where(JournalEntry.id.in_(pending))
+            )
+            now = time.monotonic()
+            for entry_id, status in result.all():
+                if status in (ProcessingStatus.PROCESSED, ProcessingStatus.FAILED):
+                    settled[entry_id] = (status, now)
+                    pending.discard(entry_id)
+        if pending:
+            await asyncio.sleep(poll_seconds)
+    return settled, backlog
+
+
+async def stage_samples() -> Dict[str, List[dict]]:
+    valkey = get_async_valkey()
+    samples = {}
+    for stage in PIPELINE_STAGES:
+        raw = await valkey.lrange(stage_log_key(stage), 0, -1)
+        samples[stage] = [json.loads(item) for item in raw]
+    return samples
+
+
+async def delete_entries(user_id: str, entry_ids: List[int]) -> None:
+    async with AsyncSessionLocal() as db:
+        service = JournalService(db)
+        for entry_id in entry_ids:
+            await service.delete_entry(entry_id, user_id)
+
+
+def format_seconds(value: Optional[float]) -> str:
+    return f"{value:8.3f}s" if value is not None else "       -"
+
+
+def report(submitted: Dict[int, float], settled: Dict[int, Tuple[ProcessingStatus, float]],
+           backlog: List[int], stages: Dict[str, List[dict]], started: float, finished: float) -> None:
+    processed = [entry_id for entry_id, (status, _) in settled.items() if status == ProcessingStatus.PROCESSED]
+    failed = len(settled) - len(processed)
+    end_to_end = [settled[entry_id][1] - submitted[entry_id] for entry_id in processed]
+    wall = finished - started
+
+    print(f"Entries:     {len(submitted)} submitted, {len(processed)} processed, {failed} failed, "
+          f"{len(submitted) - len(settled)} timed out")
+    print(f"Wall time:   {wall:.2f}s")
+    print(f"Throughput:  {len(processed) / wall:.2f} entries/s" if wall else "Throughput:  -")
+    print(f"Queue depth: max {max(backlog, default=0)}, mean {sum(backlog) / len(backlog) if backlog else 0:.1f}")
+    print()
+    print(f"{'stage':<12}{'count':>7}{'errors':>8}{'p50':>10}{'p95':>10}{'p99':>10}")
+    rows = [("end_to_end", end_to_end, 0)]
+    for stage in PIPELINE_STAGES:
+        seconds = [sample["seconds"] for sample in stages[stage]]
+        errors = sum(1 for sample in stages[stage] if sample["outcome"] != "success")
+        rows.append((stage, seconds, errors))
+    for name, seconds, errors in rows:
+        print(f"{name:<12}{len(seconds):>7}{errors:>8}"
+              f"{format_seconds(percentile(seconds, 50)):>10}{format_seconds(percentile(seconds, 95)):>10}"
+              f"{format_seconds(percentile(seconds, 99)):>10}")
+
+
+async def main(args: argparse.Namespace) -> None:
+    valkey = get_async_valkey()
+    await valkey.delete(*(stage_log_key(stage) for stage in PIPELINE_STAGES))
+
+    started = time.monotonic()
+    submitted = await create_entries(args.user_id, args.entries, args.concurrency, args.paragraphs, args.seed)
+    print(f"Created {len(submitted)} entries in {time.monotonic() - started:.2f}s")
+    settled, backlog = await wait_for_entries(submitted, args.queue, args.timeout, args.poll_seconds)
+    finished = time.monotonic()
+
+    report(submitted, settled, backlog, await stage_samples(), started, finished)
+    if not args.keep:
+        await delete_entries(args.user_id, list(submitted))
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Journal pipeline throughput benchmark")
+    parser.add_argument("--user-id", required=True, help="Existing user that owns the benchmark entries")
+    parser.add_argument("--entries", type=int, default=100, help="Number of journal entries to create")
+    parser.add_argument("--concurrency", type=int, default=10, help="Concurrent entry creations")
+    parser.add_argument("--paragraphs", type=int, default=3, help="Paragraphs per generated entry")
+    parser.add_argument("--timeout", type=float, default=600.0, help="Seconds to wait for the pipeline")
+    parser.add_argument("--poll-seconds", type=float, default=1.0, help="Status polling interval")
+    parser.add_argument("--queue", default="celery", help="Celery queue (Valkey list) to sample")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for generated content")
+    parser.add_argument("--keep", action="store_true", help="Keep the created entries")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    asyncio.run(main(parse_args()))
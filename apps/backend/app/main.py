@@ -1,18 +1,34 @@
 """
 FastAPI application instance and global configurations.
 """
+import asyncio
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from prometheus_client import make_asgi_app
 
 from app.api.v1.endpoints.auth import router as auth_router
 from app.api.v1.endpoints.journal import router as journal_router
 from app.api.v1.endpoints.calendar import router as calendar_router
 from app.api.v1.endpoints.graph import router as graph_router
 from app.api.v1.endpoints.chat import router as chat_router
+from app.api.v1.endpoints.metrics import router as metrics_router
 from app.core.config import get_settings
+from app.core.embeddings import warmup_embedding_model
+from app.core.llm_usage import prometheus_registry
 
 settings = get_settings()
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Load the embedding model before serving, not on the first chat request
+    if settings.embedding_warmup_enabled:
+        await asyncio.to_thread(warmup_embedding_model)
+    yield
+
+
 # Create FastAPI app instance
 app = FastAPI(
     title="Total Recall Backend API",
@@ -21,6 +37,7 @@ app = FastAPI(
     docs_url="/docs",
     redoc_url="/redoc",
     redirect_slashes=False,
+    lifespan=lifespan,
 )
 
 # CORS middleware for frontend integration
@@ -38,6 +55,10 @@ app.include_router(journal_router, prefix="/api/v1/journal", tags=["journal"])
 app.include_router(calendar_router, prefix="/api/v1/calendar", tags=["calendar"])
 app.include_router(graph_router, prefix="/api/v1/graph", tags=["graph"])
 app.include_router(chat_router, prefix="/api/v1/chat", tags=["chat"])
+app.include_router(metrics_router, prefix="/api/v1/metrics", tags=["metrics"])
+
+# Prometheus scrape endpoint
+app.mount("/metrics", make_asgi_app(registry=prometheus_registry()))
 
 
 @app.get("/health")
@@ -4,6 +4,8 @@ Database models for the application.
 from .auth import User, Session, Account, Verification, AuthBase
 from .base import Base
 from .journal_entry import JournalEntry
+from .journal_chunk import JournalChunk
+from .llm_usage import LLMUsageDaily
 from .todo import Todo
 
-__all__ = ["User", "Session", "Account", "Verification", "AuthBase", "Base", "JournalEntry", "Todo"]
\ No newline at end of file
+__all__ = ["User", "Session", "Account", "Verification", "AuthBase", "Base", "JournalEntry", "JournalChunk", "LLMUsageDaily", "Todo"]
\ No newline at end of file
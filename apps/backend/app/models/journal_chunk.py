@@ -0,0 +1,21 @@
+"""
+Journal chunk text model.
+"""
+from datetime import datetime
+from sqlalchemy import Column, DateTime, ForeignKey, Integer, String, Text
+
+from app.models.base import Base
+
+
+class JournalChunk(Base):
+    """
+    Text of an indexed chunk, keyed by its Cosdata vector id.
+    Used to hydrate search results that come back without raw text.
+    """
+    __tablename__ = "journal_chunks"
+
+    vector_id = Column(String(255), primary_key=True)
+    journal_entry_id = Column(Integer, ForeignKey("journal_entries.id", ondelete="CASCADE"), nullable=False, index=True)
+    user_id = Column(String, nullable=False)
+    text = Column(Text, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
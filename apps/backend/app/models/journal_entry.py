@@ -2,7 +2,9 @@
 Journal entry model.
 """
 from datetime import datetime
-from sqlalchemy import Column, Integer, String, Text, DateTime, Enum
+from sqlalchemy import Column, Computed, Index, Integer, String, Text, DateTime, Enum
+from sqlalchemy.dialects.postgresql import JSONB, TSVECTOR
+from sqlalchemy.orm import deferred
 import enum
 
 from app.models.base import Base
@@ -15,13 +17,36 @@ class ProcessingStatus(enum.Enum):
     FAILED = "FAILED"
 
 
+# Text search configuration used by the generated search_vector column.
+# Queries must use the same configuration to hit the GIN index.
+SEARCH_CONFIG = "english"
+
+
 class JournalEntry(Base):
     __tablename__ = "journal_entries"
 
     id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(String, nullable=False, index=True)
+    user_id = Column(String, nullable=False)
     title = Column(String(255), nullable=True)
     content = Column(Text, nullable=False)
     status = Column(Enum(ProcessingStatus), default=ProcessingStatus.PENDING, nullable=False)
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
-    updated_at = Column(DateTime, default=datetime.utcnow, nullable=False)
\ No newline at end of file
+    updated_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    # Per-segment extraction results ([{"hash", "version", "result"}]) used for
+    # incremental re-extraction; None until the entry has been processed
+    extraction_segments = deferred(Column(JSONB, nullable=True))
+    # Full-text search document, title weighted above content (never loaded by default)
+    search_vector = deferred(Column(
+        TSVECTOR,
+        Computed(
+            f"setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(title, '')), 'A') || "
+            f"setweight(to_tsvector('{SEARCH_CONFIG}', content), 'B')",
+            persisted=True,
+        ),
+    ))
+
+    __table_args__ = (
+        # Keyset pagination: WHERE user_id = ? ORDER BY created_at DESC, id DESC
+        Index("ix_journal_entries_user_id_created_at_id", user_id, created_at.desc(), id.desc()),
+        Index("ix_journal_entries_search_vector", search_vector, postgresql_using="gin"),
+    )
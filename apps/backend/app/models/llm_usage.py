@@ -0,0 +1,31 @@
+"""
+Daily LLM usage rollup model.
+"""
+from sqlalchemy import BigInteger, Column, Date, Integer, String, UniqueConstraint
+
+from app.models.base import Base
+
+
+class LLMUsageDaily(Base):
+    """
+    Token and latency totals per (day, user, operation, model).
+    Rows are upserted after every Gemini call.
+    """
+    __tablename__ = "llm_usage_daily"
+
+    id = Column(Integer, primary_key=True)
+    day = Column(Date, nullable=False)
+    user_id = Column(String, nullable=False)
+    operation = Column(String(64), nullable=False)  # extraction, chat_tool_turn, chat_final_turn, ...
+    model = Column(String(128), nullable=False)
+    calls = Column(Integer, default=0, nullable=False)
+    failures = Column(Integer, default=0, nullable=False)
+    prompt_tokens = Column(BigInteger, default=0, nullable=False)
+    cached_tokens = Column(BigInteger, default=0, nullable=False)
+    output_tokens = Column(BigInteger, default=0, nullable=False)
+    total_tokens = Column(BigInteger, default=0, nullable=False)
+    latency_ms = Column(BigInteger, default=0, nullable=False)
+
+    __table_args__ = (
+        UniqueConstraint("day", "user_id", "operation", "model", name="uq_llm_usage_daily_key"),
+    )
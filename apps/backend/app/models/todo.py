@@ -2,7 +2,7 @@
 Todo model.
 """
 from datetime import datetime
-from sqlalchemy import Column, Integer, String, Text, DateTime, Enum, ForeignKey
+from sqlalchemy import Column, Index, Integer, String, Text, DateTime, Enum, ForeignKey
 import enum
 
 from app.models.base import Base
@@ -18,10 +18,19 @@ class Todo(Base):
     __tablename__ = "todos"
 
     id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(String, nullable=False, index=True)
+    user_id = Column(String, nullable=False)
     task = Column(Text, nullable=False)
     priority = Column(Enum(Priority), default=Priority.MEDIUM, nullable=False)
     due_date = Column(DateTime, nullable=True)
-    journal_entry_id = Column(Integer, ForeignKey("journal_entries.id"), nullable=True)
+    # Kept (unlinked) or deleted with the entry depending on journal_delete_todo_policy
+    journal_entry_id = Column(Integer, ForeignKey("journal_entries.id", ondelete="SET NULL"), nullable=True)
+    # Id of the extracted todo this row was created from (segment-namespaced)
+    extraction_ref = Column(String(64), nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
-    updated_at = Column(DateTime, default=datetime.utcnow, nullable=False)
\ No newline at end of file
+    updated_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    __table_args__ = (
+        # Keyset pagination: WHERE user_id = ? ORDER BY created_at DESC, id DESC
+        Index("ix_todos_user_id_created_at_id", user_id, created_at.desc(), id.desc()),
+        Index("ix_todos_journal_entry_id_extraction_ref", journal_entry_id, extraction_ref),
+    )
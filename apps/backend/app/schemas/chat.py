@@ -1,12 +1,25 @@
 from pydantic import BaseModel
-from typing import Optional
+from typing import List, Optional
 
 class ChatRequest(BaseModel):
     prompt: str
     user_id: str
-    session_id: Optional[str] = None
-    previous_chat: Optional[str] = None
+    session_id: Optional[str] = None  # History is kept server-side per session; a new one is created if omitted
+    previous_chat: Optional[str] = None  # Deprecated: ignored when a session_id is given
+    timezone: Optional[str] = None  # User's IANA timezone; cached answers are scoped to the local day
 
 class ChatResponse(BaseModel):
     response: str
     session_id: str
+
+
+class ChatTurn(BaseModel):
+    role: str  # user or model
+    text: str
+    tokens: int
+
+
+class ChatHistory(BaseModel):
+    """History prepended to a prompt: rolling summary plus recent turns, oldest first."""
+    summary: str = ""
+    turns: List[ChatTurn] = []
@@ -35,3 +35,14 @@ class JournalEntry(JournalEntryBase):
     user_id: str
     created_at: datetime
     updated_at: datetime
+
+
+class JournalSearchHit(JournalEntry):
+    rank: float
+    snippet: str  # Content excerpt with matches wrapped in <mark></mark>
+
+
+class JournalEntryStatus(BaseModel):
+    id: int
+    status: ProcessingStatus
+    updated_at: datetime
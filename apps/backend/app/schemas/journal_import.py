@@ -0,0 +1,13 @@
+"""
+Pydantic schemas for bulk journal imports.
+"""
+from pydantic import BaseModel
+
+
+class ImportJobStatus(BaseModel):
+    job_id: str
+    status: str  # receiving, queued, processing, completed, partial, failed
+    inserted: int = 0
+    extracted: int = 0
+    failed: int = 0
+    errors: int = 0  # Records rejected while parsing
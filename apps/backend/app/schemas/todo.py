@@ -17,7 +17,7 @@ class TodoBase(BaseModel):
 
 
 class TodoCreate(TodoBase):
-    pass
+    extraction_ref: Optional[str] = None
 
 
 class TodoUpdate(TodoBase):
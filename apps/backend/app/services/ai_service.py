@@ -1,11 +1,140 @@
 # AI processing logic (LLM calls, extraction)
 import asyncio
-from google.genai import types
+import hashlib
+import json
+import logging
+import time
+from typing import Dict, List, Optional
+from google.genai import errors, types
+from valkey.exceptions import ValkeyError
 from app.core.gemini_client import get_genai_client
 from app.core.config import get_settings
+from app.core.extraction_segments import merge_extractions, namespace_extraction, split_sections
+from app.core.llm_usage import LLMCall, record_llm_calls, track_llm_call
+from app.core.rate_limiter import estimate_tokens
+from app.core.resilience import extraction_caller
+from app.core.valkey_client import get_async_valkey
 from app.schemas.extraction import ExtractionResult
 from app.schemas.journal_entry import JournalEntry
-from app.core.prompts import SYSTEM_PROMPT, FEW_SHOT_EXAMPLES, build_extraction_prompt
+from app.core.prompts import SYSTEM_PROMPT, FEW_SHOT_EXAMPLES, PROMPT_VERSION, build_extraction_prompt
+
+logger = logging.getLogger(__name__)
+
+# Static parts of every extraction request, built once per process
+EXTRACTION_SYSTEM_INSTRUCTION = f"{SYSTEM_PROMPT}\n\n{FEW_SHOT_EXAMPLES}"
+EXTRACTION_SCHEMA = ExtractionResult.model_json_schema()
+INLINE_EXTRACTION_CONFIG = types.GenerateContentConfig(
+    system_instruction=EXTRACTION_SYSTEM_INSTRUCTION,
+    response_mime_type="application/json",
+    response_json_schema=EXTRACTION_SCHEMA,
+)
+
+
+class ExtractionPromptCache:
+    """
+    Process-wide handle to a Gemini cached content holding the static
+    extraction prefix (system prompt + few-shot examples).
+
+    The handle name is shared through Valkey so API replicas and Celery
+    workers reuse one cache per (model, prompt version). It is refreshed
+    before its TTL runs out; a prompt or model change yields a new key and
+    therefore a new cache.
+    """
+
+    # Seconds to wait before retrying after cache creation failed
+    FAILURE_BACKOFF = 300
+
+    def __init__(self):
+        self._lock = asyncio.Lock()
+        self._name: Optional[str] = None
+        self._model: Optional[str] = None
+        self._refresh_at = 0.0
+        self._disabled_until = 0.0
+        self._configs: Dict[str, types.GenerateContentConfig] = {}
+
+    async def get_config(self, client, model: str) -> types.GenerateContentConfig:
+        """
+        Return a GenerateContentConfig for extraction, using the cached prefix when available.
+        Falls back to sending the prefix inline if caching is disabled or unavailable.
+        """
+        settings = get_settings()
+        now = time.monotonic()
+        if not settings.gemini_prompt_cache_enabled or now < self._disabled_until:
+            return INLINE_EXTRACTION_CONFIG
+
+        if self._name is None or self._model != model or now >= self._refresh_at:
+            async with self._lock:
+                if self._name is None or self._model != model or time.monotonic() >= self._refresh_at:
+                    await self._refresh(client, model)
+
+        if self._name is None:
+            return INLINE_EXTRACTION_CONFIG
+        return self._config_for(self._name)
+
+    def invalidate(self) -> None:
+        """Forget the current handle (e.g. after the API reported it missing)."""
+        self._name = None
+        self._refresh_at = 0.0
+
+    def _config_for(self, name: str) -> types.GenerateContentConfig:
+        config = self._configs.get(name)
+        if config is None:
+            config = types.GenerateContentConfig(
+                cached_content=name,
+                response_mime_type="application/json",
+                response_json_schema=EXTRACTION_SCHEMA,
+            )
+            self._configs = {name: config}
+        return config
+
+    async def _refresh(self, client, model: str) -> None:
+        settings = get_settings()
+        ttl = settings.gemini_prompt_cache_ttl_seconds
+        usable_for = max(ttl - settings.gemini_prompt_cache_refresh_margin_seconds, 1)
+        shared_key = f"gemini_prompt_cache:{model}:{PROMPT_VERSION}"
+        valkey = get_async_valkey()
+
+        # Reuse a cache created by another process if it is still fresh
+        try:
+            shared_name = await valkey.get(shared_key)
+            shared_ttl = await valkey.ttl(shared_key) if shared_name else -2
+        except ValkeyError as e:
+            logger.warning(f"Prompt cache registry unavailable: {e}")
+            shared_name, shared_ttl = None, -2
+
+        if shared_name and shared_ttl > 0:
+            self._set(shared_name.decode(), model, shared_ttl)
+            return
+
+        try:
+            cached = await client.aio.caches.create(
+                model=model,
+                config=types.CreateCachedContentConfig(
+                    display_name=f"extraction-prefix-{PROMPT_VERSION}",
+                    system_instruction=EXTRACTION_SYSTEM_INSTRUCTION,
+                    ttl=f"{ttl}s",
+                ),
+            )
+        except Exception as e:
+            logger.warning(f"Could not create Gemini prompt cache, sending prefix inline: {e}")
+            self._name = None
+            self._disabled_until = time.monotonic() + self.FAILURE_BACKOFF
+            return
+
+        self._set(cached.name, model, usable_for)
+        try:
+            await valkey.set(shared_key, cached.name, ex=usable_for)
+        except ValkeyError as e:
+            logger.warning(f"Could not share Gemini prompt cache name: {e}")
+
+    def _set(self, name: str, model: str, usable_for: float) -> None:
+        self._name = name
+        self._model = model
+        self._refresh_at = time.monotonic() + usable_for
+
+
+extraction_prompt_cache = ExtractionPromptCache()
+
 
 class AIService:
     """
@@ -21,6 +150,11 @@ class AIService:
         """
         Extract structured information from a journal entry using LLM.
 
+        Results are cached by a hash of (content, current_date, timezone, model,
+        prompt version), so unchanged content never costs a second LLM call.
+        The static prompt prefix is served from a Gemini context cache. Long
+        content is extracted as overlapping sections in parallel and merged.
+
         Args:
             entry: The journal entry to analyze.
             current_date: Current date in format "Month DD, YYYY" for relative date context.
@@ -29,25 +163,184 @@ class AIService:
         Returns:
             ExtractionResult with metadata, entities, relationships, todos, and events.
         """
-        system_instruction = f"{SYSTEM_PROMPT}\n\n{FEW_SHOT_EXAMPLES}"
-        contents = build_extraction_prompt(entry.content, current_date, timezone)
-        
-        response = await asyncio.to_thread(
-            self.client.models.generate_content,
-            model=self.settings.gemini_model,
-            config=types.GenerateContentConfig(
-                system_instruction=system_instruction,
-                response_mime_type="application/json",
-                response_json_schema=ExtractionResult.model_json_schema(),
-            ),
-            contents=contents,
+        return await self.extract_content(entry.content, entry.user_id, current_date, timezone, reference=f"journal_entry:{entry.id}")
+
+    async def extract_content(self, content: str, user_id: str, current_date: str, timezone: str = "UTC",
+                              reference: Optional[str] = None) -> ExtractionResult:
+        """
+        Extract structured information from a piece of journal text (a whole
+        entry or one of its segments). See `extract_from_journal_entry`.
+
+        Args:
+            content: Text to analyze.
+            user_id: User the call is accounted to.
+            current_date: Current date in format "Month DD, YYYY" for relative date context.
+            timezone: User's timezone.
+            reference: Label for usage logs, e.g. "journal_entry:42".
+        """
+        sections = split_sections(
+            content, self.settings.extraction_section_max_chars, self.settings.extraction_section_overlap_chars,
         )
+        if len(sections) == 1:
+            return await self._extract_section(content, user_id, current_date, timezone, reference)
+
+        logger.info(f"Extracting {reference or 'content'} as {len(sections)} sections")
+        results = await asyncio.gather(*(
+            self._extract_section(section, user_id, current_date, timezone, f"{reference}~{index}" if reference else None)
+            for index, section in enumerate(sections)
+        ))
+        return merge_extractions(namespace_extraction(result, f"p{index}") for index, result in enumerate(results))
+
+    async def _extract_section(self, content: str, user_id: str, current_date: str, timezone: str,
+                               reference: Optional[str]) -> ExtractionResult:
+        """Extract one piece of text with a single (cached) LLM call."""
+        cache_key = self.extraction_cache_key(content, current_date, timezone)
+        cached = await self._get_cached_extraction(cache_key)
+        if cached is not None:
+            return cached
+
+        contents = build_extraction_prompt(content, current_date, timezone)
+        config = await extraction_prompt_cache.get_config(self.client, self.settings.gemini_model)
+        # Output is roughly as large as the entry itself
+        tokens = estimate_tokens(EXTRACTION_SYSTEM_INSTRUCTION, contents, content)
+
+        async with track_llm_call("extraction", user_id, reference=reference) as call:
+            try:
+                response = await self._generate(contents, config, tokens)
+            except errors.ClientError as e:
+                if config is INLINE_EXTRACTION_CONFIG:
+                    raise
+                # The cached prefix may have expired or been deleted; retry inline once
+                logger.warning(f"Extraction with cached prompt failed, retrying inline: {e}")
+                extraction_prompt_cache.invalidate()
+                response = await self._generate(contents, INLINE_EXTRACTION_CONFIG, tokens)
+            call.observe(response)
         try:
             if not response.text:
                 raise ValueError("Empty response from LLM")
-            return ExtractionResult.model_validate_json(response.text)
+            result = ExtractionResult.model_validate_json(response.text)
         except ValueError as e:
             # Handle parsing errors
             raise ValueError(f"Failed to parse LLM response: {e}")
-    
-    
\ No newline at end of file
+
+        await self._store_cached_extraction(cache_key, result)
+        return result
+
+    async def _generate(self, contents: str, config: types.GenerateContentConfig, tokens: int) -> types.GenerateContentResponse:
+        return await extraction_caller.call(
+            lambda: self.client.aio.models.generate_content(
+                model=self.settings.gemini_model,
+                config=config,
+                contents=contents,
+            ),
+            estimated_tokens=tokens,
+        )
+
+    async def submit_extraction_batch(self, requests: List[Dict[str, str]]) -> str:
+        """
+        Submit many extractions as one Gemini batch job (batch pricing and quota).
+
+        Args:
+            requests: Dicts with "content", "current_date", "timezone" and "user_id" keys.
+
+        Returns:
+            Batch job name, to be polled with `get_extraction_batch_results`.
+        """
+        inlined = [
+            types.InlinedRequest(
+                contents=build_extraction_prompt(request["content"], request["current_date"], request["timezone"]),
+                config=INLINE_EXTRACTION_CONFIG,
+            )
+            for request in requests
+        ]
+        job = await self.client.aio.batches.create(
+            model=self.settings.gemini_model,
+            src=inlined,
+            config=types.CreateBatchJobConfig(display_name=f"extraction-{PROMPT_VERSION}-{len(requests)}"),
+        )
+        return job.name
+
+    async def get_extraction_batch_results(self, name: str, requests: List[Optional[Dict[str, str]]]) -> Optional[List[Optional[ExtractionResult]]]:
+        """
+        Fetch the results of a batch submitted with `submit_extraction_batch`.
+
+        Args:
+            name: Batch job name
+            requests: The same requests, in the same order, as submitted
+                (None for requests whose results should be ignored)
+
+        Returns:
+            None while the job is still running; otherwise one result per request
+            (None where that request failed). Successful results are written to
+            the extraction cache.
+
+        Raises:
+            RuntimeError: If the batch job failed, was cancelled or expired.
+        """
+        job = await self.client.aio.batches.get(name=name)
+        state = getattr(job.state, "name", str(job.state))
+        if state in ("JOB_STATE_PENDING", "JOB_STATE_QUEUED", "JOB_STATE_RUNNING", "JOB_STATE_UNSPECIFIED"):
+            return None
+        if state not in ("JOB_STATE_SUCCEEDED", "JOB_STATE_PARTIALLY_SUCCEEDED"):
+            raise RuntimeError(f"Batch job {name} ended in state {state}")
+
+        responses = (job.dest.inlined_responses if job.dest else None) or []
+        calls = []
+        for request, inlined in zip(requests, responses):
+            if request is not None and inlined is not None:
+                call = LLMCall("extraction_batch", request["user_id"], self.settings.gemini_model)
+                call.observe(inlined.response)
+                calls.append((call, "error" if inlined.error else "success"))
+        # Per-request latency is not known for batch jobs
+        await record_llm_calls(calls)
+
+        results: List[Optional[ExtractionResult]] = []
+        for index, request in enumerate(requests):
+            inlined = responses[index] if index < len(responses) else None
+            if request is None or inlined is None or inlined.error or not inlined.response or not inlined.response.text:
+                results.append(None)
+                continue
+            try:
+                result = ExtractionResult.model_validate_json(inlined.response.text)
+            except ValueError as e:
+                logger.warning(f"Failed to parse batch result {index} of {name}: {e}")
+                results.append(None)
+                continue
+            await self._store_cached_extraction(
+                self.extraction_cache_key(request["content"], request["current_date"], request["timezone"]),
+                result,
+            )
+            results.append(result)
+        return results
+
+    def extraction_cache_key(self, content: str, current_date: str, timezone: str) -> str:
+        """Build the content-addressed cache key for an extraction request."""
+        payload = json.dumps(
+            [content, current_date, timezone, self.settings.gemini_model, PROMPT_VERSION],
+            ensure_ascii=False,
+        )
+        return f"extraction:{hashlib.sha256(payload.encode()).hexdigest()}"
+
+    async def _get_cached_extraction(self, cache_key: str) -> Optional[ExtractionResult]:
+        try:
+            raw = await get_async_valkey().get(cache_key)
+        except ValkeyError as e:
+            logger.warning(f"Extraction cache unavailable: {e}")
+            return None
+        if raw is None:
+            return None
+        try:
+            return ExtractionResult.model_validate_json(raw)
+        except ValueError:
+            logger.warning(f"Discarding unreadable cached extraction {cache_key}")
+            return None
+
+    async def _store_cached_extraction(self, cache_key: str, result: ExtractionResult) -> None:
+        try:
+            await get_async_valkey().set(
+                cache_key,
+                result.model_dump_json(),
+                ex=self.settings.extraction_cache_ttl_seconds,
+            )
+        except ValkeyError as e:
+            logger.warning(f"Could not cache extraction: {e}")
@@ -0,0 +1,132 @@
+"""
+Per-user semantic cache of chat answers.
+
+Answers are stored in Valkey together with the embedding of the question.
+A new question is answered from the cache when a previous question of the
+same user, asked on the same local day, is similar enough. Every change to the user's journal, todos or
+events bumps a per-user generation number, which orphans all cached answers.
+"""
+import base64
+import json
+import logging
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+from valkey.exceptions import ValkeyError
+
+from app.core.config import get_settings
+from app.core.valkey_client import get_async_valkey
+
+logger = logging.getLogger(__name__)
+
+
+class SemanticAnswerCache:
+    """
+    Valkey-backed answer cache keyed by (user, data generation, local date).
+
+    Counters are per process and exposed through the metrics endpoints.
+    """
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.saved_seconds = 0.0
+
+    @staticmethod
+    def _generation_key(user_id: str) -> str:
+        return f"chat_answers:{user_id}:gen"
+
+    @staticmethod
+    def _entries_key(user_id: str, generation: int, day: str) -> str:
+        return f"chat_answers:{user_id}:{generation}:{day}"
+
+    async def generation(self, user_id: str) -> Optional[int]:
+        """Current data generation of a user, or None if Valkey is unavailable."""
+        try:
+            raw = await get_async_valkey().get(self._generation_key(user_id))
+        except ValkeyError as e:
+            logger.warning(f"Answer cache unavailable: {e}")
+            return None
+        return int(raw) if raw else 0
+
+    async def lookup(self, user_id: str, generation: int, day: str, embedding: List[float]) -> Optional[str]:
+        """
+        Return the cached answer of the most similar previous question asked on
+        the same local `day`, if its cosine similarity reaches
+        `chat_answer_cache_threshold`.
+        """
+        started = time.monotonic()
+        try:
+            raw_entries = await get_async_valkey().lrange(self._entries_key(user_id, generation, day), 0, -1)
+        except ValkeyError as e:
+            logger.warning(f"Answer cache unavailable: {e}")
+            return None
+
+        best: Optional[Dict] = None
+        best_score = get_settings().chat_answer_cache_threshold
+        query = self._normalize(np.asarray(embedding, dtype=np.float32))
+        for raw in raw_entries:
+            entry = json.loads(raw)
+            vector = np.frombuffer(base64.b64decode(entry["vector"]), dtype=np.float32)
+            score = float(np.dot(query, vector))
+            if score >= best_score:
+                best, best_score = entry, score
+
+        if best is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.saved_seconds += max(best["latency"] - (time.monotonic() - started), 0.0)
+        return best["answer"]
+
+    async def store(self, user_id: str, generation: int, day: str, embedding: List[float], answer: str,
+                    latency: float) -> None:
+        """Cache an answer under the generation and local day it was computed for."""
+        settings = get_settings()
+        vector = self._normalize(np.asarray(embedding, dtype=np.float32))
+        entry = json.dumps({
+            "vector": base64.b64encode(vector.tobytes()).decode(),
+            "answer": answer,
+            "latency": latency,
+        }, ensure_ascii=False)
+        key = self._entries_key(user_id, generation, day)
+        try:
+            await (
+                get_async_valkey().pipeline(transaction=True)
+                .lpush(key, entry)
+                .ltrim(key, 0, settings.chat_answer_cache_max_entries - 1)
+                .expire(key, settings.chat_answer_cache_ttl_seconds)
+                .execute()
+            )
+        except ValkeyError as e:
+            logger.warning(f"Could not cache chat answer: {e}")
+            return
+        self.stores += 1
+
+    def stats(self) -> Dict[str, float]:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "stores": self.stores,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "saved_seconds": round(self.saved_seconds, 3),
+        }
+
+    @staticmethod
+    def _normalize(vector: np.ndarray) -> np.ndarray:
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+
+answer_cache = SemanticAnswerCache()
+
+
+async def invalidate_user_answers(user_id: str) -> None:
+    """Drop every cached chat answer of a user (call after their data changed)."""
+    try:
+        await get_async_valkey().incr(SemanticAnswerCache._generation_key(user_id))
+    except ValkeyError as e:
+        logger.warning(f"Could not invalidate cached chat answers: {e}")
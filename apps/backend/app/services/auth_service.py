@@ -4,11 +4,12 @@ Handles user data retrieval and Google OAuth token management.
 """
 from datetime import datetime, timedelta
 from typing import Optional, Dict, Any
-import requests
+import httpx
 from sqlalchemy import select
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.config import get_settings
+from app.core.security import invalidate_user_sessions
 from app.models.auth import User, Account
 
 
@@ -20,18 +21,18 @@ class AuthService:
     and token refresh operations.
     """
 
-    def __init__(self, db: Session, settings: Optional[Any] = None):
+    def __init__(self, db: AsyncSession, settings: Optional[Any] = None):
         """
         Initialize the auth service.
 
         Args:
-            db: Database session for auth operations
+            db: Async database session for auth operations
             settings: Application settings (optional, will get from config if not provided)
         """
         self.db = db
         self.settings = settings or get_settings()
 
-    def get_user(self, user_id: str) -> Optional[Dict[str, Any]]:
+    async def get_user(self, user_id: str) -> Optional[Dict[str, Any]]:
         """
         Get user data and associated Google OAuth tokens from Better Auth database.
 
@@ -43,7 +44,7 @@ class AuthService:
         """
         # Get user data
         user_stmt = select(User).where(User.id == user_id)
-        user_result = self.db.execute(user_stmt)
+        user_result = await self.db.execute(user_stmt)
         user = user_result.scalar_one_or_none()
 
         if not user:
@@ -57,7 +58,7 @@ class AuthService:
                 Account.providerId == "google"
             )
         )
-        account_result = self.db.execute(account_stmt)
+        account_result = await self.db.execute(account_stmt)
         account = account_result.scalar_one_or_none()
 
         user_data = {
@@ -77,7 +78,7 @@ class AuthService:
 
         return user_data
 
-    def refresh_google_token(self, user_id: str) -> Optional[str]:
+    async def refresh_google_token(self, user_id: str) -> Optional[str]:
         """
         Refresh Google OAuth access token using refresh token.
 
@@ -95,7 +96,7 @@ class AuthService:
                 Account.providerId == "google"
             )
         )
-        account_result = self.db.execute(account_stmt)
+        account_result = await self.db.execute(account_stmt)
         account = account_result.scalar_one_or_none()
 
         if not account or not account.refreshToken:
@@ -111,7 +112,8 @@ class AuthService:
         }
 
         try:
-            response = requests.post(token_url, data=data)
+            async with httpx.AsyncClient() as client:
+                response = await client.post(token_url, data=data)
             response.raise_for_status()
             token_data = response.json()
 
@@ -124,7 +126,9 @@ class AuthService:
                 account.accessTokenExpiresAt = datetime.utcnow() + timedelta(seconds=expires_in)
                 account.updatedAt = datetime.utcnow()
 
-                self.db.commit()
+                await self.db.commit()
+                # Cached sessions still carry the old token
+                invalidate_user_sessions(user_id)
                 return new_access_token
 
         except Exception:
@@ -133,7 +137,7 @@ class AuthService:
 
         return None
 
-    def ensure_valid_google_token(self, user_id: str) -> Optional[str]:
+    async def ensure_valid_google_token(self, user_id: str) -> Optional[str]:
         """
         Ensure user has a valid Google access token, refreshing if necessary.
 
@@ -143,7 +147,7 @@ class AuthService:
         Returns:
             Valid access token or None
         """
-        user_data = self.get_user(user_id)
+        user_data = await self.get_user(user_id)
         if not user_data or not user_data.get("google_access_token"):
             return None
 
@@ -152,6 +156,6 @@ class AuthService:
         if expires_at and isinstance(expires_at, datetime):
             if expires_at < datetime.utcnow() + timedelta(minutes=5):
                 # Token expired or expiring soon, refresh it
-                return self.refresh_google_token(user_id)
+                return await self.refresh_google_token(user_id)
 
-        return user_data["google_access_token"]
\ No newline at end of file
+        return user_data["google_access_token"]
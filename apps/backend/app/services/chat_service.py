@@ -1,20 +1,49 @@
 import asyncio
-from typing import Optional
+import logging
+import time
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
 from google.genai import types
 from app.core.gemini_client import get_genai_client
 from app.core.config import get_settings
+from app.core.llm_usage import track_llm_call
+from app.core.rate_limiter import estimate_tokens, gemini_rate_limiter
+from app.core.resilience import chat_caller, chat_stream_caller
+from app.core.utils import local_date
+from app.schemas.chat import ChatHistory
+from app.services.answer_cache_service import answer_cache
+from app.services.chat_session_service import ChatSessionStore
 from app.services.vector_service import VectorService
 
+logger = logging.getLogger(__name__)
+
+SYSTEM_INSTRUCTION = (
+    "You are the Total Recall assistant. Use the vector_search tool to fetch context from the user's "
+    "journal entries, todos, focus notes, and events before answering questions about past items, plans, "
+    "or follow-ups. If search returns nothing, ask for a little more detail (e.g., dates, names, topics) "
+    "and offer what you can infer—do NOT say you lack access. Summarize clearly and concisely using any "
+    "retrieved snippets."
+)
+
+SUMMARY_INSTRUCTION = (
+    "You maintain a running summary of a conversation between a user and their journaling assistant. "
+    "Merge the existing summary with the new turns into one concise summary. Keep names, dates, decisions, "
+    "open questions and facts the user shared; drop pleasantries and repeated content."
+)
+
 class ChatService:
     def __init__(self):
         self.client = get_genai_client()
         self.settings = get_settings()
+        self.sessions = ChatSessionStore()
+        self._vector_service: Optional[VectorService] = None
 
     def toolkit(self):
         """Define tools for function calling."""
         query_schema = types.Schema(type=types.Type.STRING, description="User's query to find relevant journal, todo, focus, or event content.")
         user_id_schema = types.Schema(type=types.Type.STRING, description="The ID of the user whose data to search.")
-        top_k_schema = types.Schema(type=types.Type.INTEGER, description="Number of top results to return (default: 5).", default=5)
+        top_k = self.settings.chat_search_top_k
+        top_k_schema = types.Schema(type=types.Type.INTEGER, description=f"Number of top results to return (default and maximum: {top_k}).", default=top_k)
 
         parameters = types.Schema(
             type=types.Type.OBJECT,
@@ -36,91 +65,291 @@ class ChatService:
         )
         return types.Tool(function_declarations=[vector_search_function])
 
-    async def generate_response(self, prompt: str, user_id: str, session_id: Optional[str] = None, previous_chat: Optional[str] = None) -> str:
-        """Generate a response using Gemini with function calling."""
-        tools = self.toolkit()
-        system_instruction = (
-            "You are the Total Recall assistant. Use the vector_search tool to fetch context from the user's "
-            "journal entries, todos, focus notes, and events before answering questions about past items, plans, "
-            "or follow-ups. If search returns nothing, ask for a little more detail (e.g., dates, names, topics) "
-            "and offer what you can infer—do NOT say you lack access. Summarize clearly and concisely using any "
-            "retrieved snippets."
-        )
+    async def generate_response(self, prompt: str, user_id: str, session_id: Optional[str] = None, previous_chat: Optional[str] = None,
+                                timezone: str = "UTC") -> str:
+        """
+        Generate a response using Gemini with function calling.
 
-        config = types.GenerateContentConfig(
-            tools=[tools],
-            system_instruction=system_instruction,
-        )
+        Runs a tool loop: every function call the model makes in a turn is
+        executed concurrently and answered with FunctionResponse parts, for up
+        to `chat_max_tool_steps` turns, after which the model must answer.
+
+        With a session_id, history comes from the server-side session (bounded
+        by `chat_history_token_budget`) and the exchange is appended to it.
+
+        Questions asked without prior conversation are answered from the
+        per-user semantic answer cache when a near-duplicate was answered
+        before on the same local day (in `timezone`).
+        """
+        started = time.monotonic()
+        contents = await self._build_contents(prompt, user_id, session_id, previous_chat)
+        cache_key = await self._answer_cache_key(prompt, user_id, contents, previous_chat, timezone)
+        if cache_key is not None:
+            cached = await answer_cache.lookup(user_id, *cache_key)
+            if cached is not None:
+                if session_id:
+                    await self.sessions.append(user_id, session_id, prompt, cached)
+                return cached
+
+        for step in range(self.settings.chat_max_tool_steps + 1):
+            config = self._tool_config(allow_tools=step < self.settings.chat_max_tool_steps)
+            async with track_llm_call("chat_final_turn", user_id) as call:
+                response = await chat_caller.call(
+                    lambda: self.client.aio.models.generate_content(
+                        model=self.settings.gemini_model,
+                        contents=contents,
+                        config=config,
+                    ),
+                    estimated_tokens=estimate_tokens(SYSTEM_INSTRUCTION, *self._texts(contents)),
+                )
+                call.observe(response)
+
+                model_content = response.candidates[0].content if response.candidates else None
+                function_calls = [part.function_call for part in self._content_parts(model_content) if part.function_call]
+                if function_calls:
+                    call.operation = "chat_tool_turn"
+            if not function_calls:
+                break
+
+            contents.append(model_content)
+            contents.append(types.Content(role="user", parts=await self._run_tools(function_calls, user_id)))
+
+        answer = response.text or "No response generated."
+        if session_id:
+            await self.sessions.append(user_id, session_id, prompt, answer)
+        if cache_key is not None and response.text:
+            await answer_cache.store(user_id, *cache_key, answer, time.monotonic() - started)
+        return answer
+
+    async def stream_response(self, prompt: str, user_id: str, session_id: Optional[str] = None, previous_chat: Optional[str] = None,
+                              timezone: str = "UTC") -> AsyncIterator[Dict[str, Any]]:
+        """
+        Stream a response as events while Gemini generates it.
+
+        Yields dicts with an "event" name and a JSON-serialisable "data" payload:
+            tool_call   - the model requested a tool ({"name", "args"})
+            tool_result - the tool finished ({"name", "results"})
+            delta       - a piece of answer text ({"text"})
+            done        - the answer is complete ({"session_id"})
+            error       - generation failed ({"message"})
+        """
+        started = time.monotonic()
+        contents = await self._build_contents(prompt, user_id, session_id, previous_chat)
+        answer: List[str] = []
+        try:
+            cache_key = await self._answer_cache_key(prompt, user_id, contents, previous_chat, timezone)
+            cached = await answer_cache.lookup(user_id, *cache_key) if cache_key is not None else None
+            if cached is not None:
+                if session_id:
+                    await self.sessions.append(user_id, session_id, prompt, cached)
+                yield {"event": "delta", "data": {"text": cached}}
+                yield {"event": "done", "data": {"session_id": session_id or "default"}}
+                return
+
+            for step in range(self.settings.chat_max_tool_steps + 1):
+                config = self._tool_config(allow_tools=step < self.settings.chat_max_tool_steps)
+                tokens = estimate_tokens(SYSTEM_INSTRUCTION, *self._texts(contents))
+                model_parts: List[types.Part] = []
+                async with track_llm_call("chat_final_turn", user_id) as call:
+                    async for chunk in self._stream(contents, config, tokens):
+                        call.observe(chunk)
+                        for part in self._parts(chunk):
+                            model_parts.append(part)
+                            if part.text and not part.thought:
+                                answer.append(part.text)
+                                yield {"event": "delta", "data": {"text": part.text}}
+
+                    function_calls = [part.function_call for part in model_parts if part.function_call]
+                    if function_calls:
+                        call.operation = "chat_tool_turn"
+                if not function_calls:
+                    break
+
+                for call in function_calls:
+                    yield {"event": "tool_call", "data": {"name": call.name, "args": dict(call.args or {})}}
+                tool_parts = await self._run_tools(function_calls, user_id)
+                for part in tool_parts:
+                    response = part.function_response.response or {}
+                    yield {"event": "tool_result", "data": {"name": part.function_response.name, "results": len(response.get("results", []))}}
+
+                contents.append(types.Content(role="model", parts=model_parts))
+                contents.append(types.Content(role="user", parts=tool_parts))
+        except Exception as e:
+            logger.error(f"Streaming chat failed: {e}")
+            yield {"event": "error", "data": {"message": "Response generation failed"}}
+            return
 
-        # Prepare contents with history
-        if previous_chat:
-            contents = f"Previous Conversation:\n{previous_chat}\n\nCurrent query: {prompt}"
-        else:
-            contents = prompt
-
-        # Initial call to Gemini
-        response = await asyncio.to_thread(
-            self.client.models.generate_content,
-            model=self.settings.gemini_model,
-            contents=contents,
-            config=config,
+        if session_id:
+            await self.sessions.append(user_id, session_id, prompt, "".join(answer))
+        if cache_key is not None and answer:
+            await answer_cache.store(user_id, *cache_key, "".join(answer), time.monotonic() - started)
+        yield {"event": "done", "data": {"session_id": session_id or "default"}}
+
+    async def _stream(self, contents: List[types.Content], config: types.GenerateContentConfig, tokens: int) -> AsyncIterator[types.GenerateContentResponse]:
+        """
+        Stream a Gemini response. Each attempt to open the stream is admitted by
+        the rate limiter, which keeps the permit until the stream ends; retries
+        only cover getting the first chunk.
+        """
+        async def open_stream() -> Tuple[Optional[types.GenerateContentResponse], AsyncIterator[types.GenerateContentResponse]]:
+            chunks = gemini_rate_limiter.stream(
+                lambda: self.client.aio.models.generate_content_stream(
+                    model=self.settings.gemini_model,
+                    contents=contents,
+                    config=config,
+                ),
+                estimated_tokens=tokens,
+            )
+            try:
+                return await anext(chunks, None), chunks
+            except BaseException:
+                await chunks.aclose()
+                raise
+
+        first, chunks = await chat_stream_caller.call(open_stream, hedge=False)
+        try:
+            if first is not None:
+                yield first
+                async for chunk in chunks:
+                    yield chunk
+        finally:
+            await chunks.aclose()
+
+    async def _run_tools(self, function_calls: List[types.FunctionCall], user_id: str) -> List[types.Part]:
+        """
+        Execute all function calls of a turn concurrently under one deadline.
+
+        Returns:
+            One FunctionResponse part per call, in call order. Calls that fail or
+            miss the deadline are answered with an error instead of dropping the turn.
+        """
+        timeout = self.settings.chat_tool_timeout_seconds
+        results = await asyncio.gather(
+            *(asyncio.wait_for(self._execute_tool(call, user_id), timeout) for call in function_calls),
+            return_exceptions=True,
         )
 
-        # Find the first function call across all candidates/parts
-        function_call = None
+        parts = []
+        for call, result in zip(function_calls, results):
+            if isinstance(result, BaseException):
+                reason = "timed out" if isinstance(result, TimeoutError) else "failed"
+                logger.warning(f"Chat tool {call.name} {reason}: {result}")
+                result = {"error": f"{call.name} {reason}"}
+            parts.append(types.Part.from_function_response(name=call.name, response=result))
+        return parts
+
+    async def _execute_tool(self, call: types.FunctionCall, user_id: str) -> Dict[str, Any]:
+        args = dict(call.args or {})
+        if call.name != "vector_search":
+            return {"error": f"Unknown tool: {call.name}"}
+
+        # Always search the requesting user's data, whatever the model passed
+        results = await self._vector_search({**args, "user_id": user_id})
+        if not results:
+            return {
+                "results": [],
+                "note": (
+                    "Vector search returned no matching entries. Ask for useful clarifications (date, names, topic) "
+                    "and give best-effort guidance without saying you lack access."
+                ),
+            }
+        return {"results": results}
+
+    @staticmethod
+    def _content_parts(content: Optional[types.Content]) -> List[types.Part]:
+        return list(content.parts or []) if content else []
+
+    @classmethod
+    def _parts(cls, response: types.GenerateContentResponse) -> List[types.Part]:
+        parts: List[types.Part] = []
         for candidate in response.candidates or []:
-            content = getattr(candidate, "content", None)
-            if not content:
-                continue
+            parts.extend(cls._content_parts(candidate.content))
+        return parts
+
+    @staticmethod
+    def _texts(contents: List[types.Content]) -> List[str]:
+        """Text of all parts, for token estimates (tool results included)."""
+        texts = []
+        for content in contents:
             for part in content.parts or []:
-                if getattr(part, "function_call", None):
-                    function_call = part.function_call
-                    break
-            if function_call:
-                break
+                if part.text:
+                    texts.append(part.text)
+                elif part.function_response:
+                    texts.append(str(part.function_response.response))
+        return texts
 
-        if function_call:
-            func_name = function_call.name
-            args = function_call.args or {}
-            print("DEBUG: Function call detected:", func_name, args)
-
-            if func_name == "vector_search":
-                print("DEBUG: Preparing to call vector_service.search")
-                vector_service = VectorService()
-                print("DEBUG: VectorService instance created")
-                result = vector_service.search(
-                    query=args.get("query", ""),
-                    user_id=args.get("user_id", ""),
-                    top_k=args.get("top_k", 5)
-                )
-                print(f"DEBUG: Vector search result: {result}")
-
-                if result:
-                    result_context = f"Vector search results: {result}"
-                else:
-                    result_context = (
-                        "Vector search returned no matching entries. Ask for useful clarifications (date, names, topic) "
-                        "and give best-effort guidance without saying you lack access."
-                    )
-
-                if previous_chat:
-                    follow_up_prompt = (
-                        f"Previous Conversation:\n{previous_chat}\n\n"
-                        f"{result_context}\n\nPlease answer the user's query: {prompt}"
-                    )
-                else:
-                    follow_up_prompt = (
-                        f"{result_context}\n\nPlease answer the user's query: {prompt}"
-                    )
-
-                final_response = await asyncio.to_thread(
-                    self.client.models.generate_content,
+    def _tool_config(self, allow_tools: bool = True) -> types.GenerateContentConfig:
+        mode = types.FunctionCallingConfigMode.AUTO if allow_tools else types.FunctionCallingConfigMode.NONE
+        return types.GenerateContentConfig(
+            tools=[self.toolkit()],
+            tool_config=types.ToolConfig(function_calling_config=types.FunctionCallingConfig(mode=mode)),
+            system_instruction=SYSTEM_INSTRUCTION,
+        )
+
+    async def summarize_history(self, user_id: str, history: ChatHistory) -> str:
+        """Fold `history.turns` into `history.summary` and return the new summary."""
+        transcript = "\n".join(f"{turn.role}: {turn.text}" for turn in history.turns)
+        contents = f"Existing summary:\n{history.summary or '(none)'}\n\nNew turns:\n{transcript}"
+        async with track_llm_call("chat_summary", user_id) as call:
+            response = await chat_caller.call(
+                lambda: self.client.aio.models.generate_content(
                     model=self.settings.gemini_model,
-                    contents=follow_up_prompt,
-                    config=types.GenerateContentConfig(),
-                )
+                    contents=contents,
+                    config=types.GenerateContentConfig(
+                        system_instruction=SUMMARY_INSTRUCTION,
+                        max_output_tokens=self.settings.chat_summary_max_tokens,
+                    ),
+                ),
+                estimated_tokens=estimate_tokens(SUMMARY_INSTRUCTION, contents) + self.settings.chat_summary_max_tokens,
+            )
+            call.observe(response)
+        return response.text or history.summary
+
+    async def _build_contents(self, prompt: str, user_id: str, session_id: Optional[str], previous_chat: Optional[str]) -> List[types.Content]:
+        if not session_id:
+            # Legacy clients resend the conversation themselves
+            if previous_chat:
+                prompt = f"Previous Conversation:\n{previous_chat}\n\nCurrent query: {prompt}"
+            return [types.Content(role="user", parts=[types.Part(text=prompt)])]
+
+        history = await self.sessions.load(user_id, session_id)
+        contents = []
+        if history.summary:
+            contents.append(types.Content(role="user", parts=[types.Part(text=f"Summary of our earlier conversation:\n{history.summary}")]))
+            contents.append(types.Content(role="model", parts=[types.Part(text="Understood.")]))
+        for turn in history.turns:
+            contents.append(types.Content(role=turn.role, parts=[types.Part(text=turn.text)]))
+        contents.append(types.Content(role="user", parts=[types.Part(text=prompt)]))
+        return contents
 
-                return final_response.text or "No response generated."
+    async def _answer_cache_key(self, prompt: str, user_id: str, contents: List[types.Content],
+                                previous_chat: Optional[str], timezone: str) -> Optional[Tuple[int, str, List[float]]]:
+        """
+        (data generation, local date, question embedding) for the answer cache,
+        or None when the question must not be cached: follow-ups depend on the
+        conversation. The date keeps answers to relative questions ("this
+        week") from outliving the day they were given on.
+        """
+        if not self.settings.chat_answer_cache_enabled or previous_chat or len(contents) != 1:
+            return None
+        generation = await answer_cache.generation(user_id)
+        if generation is None:
+            return None
+        embeddings = await asyncio.to_thread(self._vectors().generate_embeddings, [prompt])
+        return generation, local_date(datetime.utcnow(), timezone).isoformat(), embeddings[0]
 
-        # If no function call, return direct response
-        return response.text or "No response generated."
\ No newline at end of file
+    def _vectors(self) -> VectorService:
+        # The embedding model itself is shared per process
+        if self._vector_service is None:
+            self._vector_service = VectorService()
+        return self._vector_service
+
+    async def _vector_search(self, args: Dict[str, Any]) -> List[Dict[str, Any]]:
+        # Embedding and search are blocking; keep them off the event loop
+        return await asyncio.to_thread(
+            self._vectors().search,
+            query=args.get("query", ""),
+            user_id=args.get("user_id", ""),
+            # Fused retrieval is precise enough that a few chunks suffice
+            top_k=min(int(args.get("top_k", self.settings.chat_search_top_k)), self.settings.chat_search_top_k),
+        )
@@ -0,0 +1,132 @@
+"""
+Server-side chat history stored in Valkey.
+
+Each session keeps a list of recent turns plus a rolling summary of older
+turns. Prompts only include the summary and as many recent turns as fit the
+token budget; once the stored turns outgrow the budget, older turns are
+folded into the summary by a background task.
+"""
+import logging
+from typing import List, Optional
+
+from valkey.exceptions import ValkeyError
+
+from app.core.config import get_settings
+from app.core.rate_limiter import estimate_tokens
+from app.core.valkey_client import get_async_valkey
+from app.schemas.chat import ChatHistory, ChatTurn
+
+logger = logging.getLogger(__name__)
+
+
+class ChatSessionStore:
+    """
+    Valkey-backed chat sessions, keyed by (user_id, session_id).
+
+    Turns are appended to the tail of a list and compaction only trims the
+    head, so turns written while a summary is being generated are never lost.
+    """
+
+    def __init__(self):
+        self.valkey = get_async_valkey()
+        self.settings = get_settings()
+
+    @staticmethod
+    def _key(user_id: str, session_id: str) -> str:
+        return f"chat_session:{user_id}:{session_id}"
+
+    async def load(self, user_id: str, session_id: str) -> ChatHistory:
+        """Return the summary and the most recent turns that fit the token budget."""
+        key = self._key(user_id, session_id)
+        try:
+            summary, raw_turns = await (
+                self.valkey.pipeline(transaction=False)
+                .hget(f"{key}:meta", "summary")
+                .lrange(f"{key}:turns", 0, -1)
+                .execute()
+            )
+        except ValkeyError as e:
+            logger.warning(f"Chat session store unavailable: {e}")
+            return ChatHistory()
+
+        history = ChatHistory(summary=summary.decode() if summary else "")
+        budget = self.settings.chat_history_token_budget - estimate_tokens(history.summary)
+        for raw in reversed(raw_turns):
+            turn = ChatTurn.model_validate_json(raw)
+            budget -= turn.tokens
+            if budget < 0:
+                break
+            history.turns.insert(0, turn)
+        return history
+
+    async def append(self, user_id: str, session_id: str, prompt: str, answer: str) -> None:
+        """Store a completed exchange and schedule compaction when over budget."""
+        key = self._key(user_id, session_id)
+        ttl = self.settings.chat_session_ttl_seconds
+        turns = [
+            ChatTurn(role="user", text=prompt, tokens=estimate_tokens(prompt)),
+            ChatTurn(role="model", text=answer, tokens=estimate_tokens(answer)),
+        ]
+        try:
+            _, _, _, stored_tokens = await (
+                self.valkey.pipeline(transaction=True)
+                .rpush(f"{key}:turns", *(turn.model_dump_json() for turn in turns))
+                .expire(f"{key}:turns", ttl)
+                .expire(f"{key}:meta", ttl)
+                .hincrby(f"{key}:meta", "tokens", sum(turn.tokens for turn in turns))
+                .execute()
+            )
+        except ValkeyError as e:
+            logger.warning(f"Could not store chat turn: {e}")
+            return
+
+        if stored_tokens > self.settings.chat_history_token_budget:
+            # Imported here to avoid a circular import (tasks import the services)
+            from app.tasks.chat_tasks import summarize_chat_session
+
+            summarize_chat_session.delay(user_id, session_id)
+
+    async def compaction_batch(self, user_id: str, session_id: str) -> Optional[ChatHistory]:
+        """
+        Return the previous summary and the oldest turns that should be folded
+        into it, keeping the newest `chat_history_keep_tokens` verbatim.
+        None if there is nothing to compact.
+        """
+        key = self._key(user_id, session_id)
+        summary, raw_turns = await (
+            self.valkey.pipeline(transaction=False)
+            .hget(f"{key}:meta", "summary")
+            .lrange(f"{key}:turns", 0, -1)
+            .execute()
+        )
+        turns = [ChatTurn.model_validate_json(raw) for raw in raw_turns]
+
+        kept_tokens = 0
+        keep_from = len(turns)
+        while keep_from > 0 and kept_tokens + turns[keep_from - 1].tokens <= self.settings.chat_history_keep_tokens:
+            keep_from -= 1
+            kept_tokens += turns[keep_from].tokens
+        # Never split a user/model exchange
+        keep_from += keep_from % 2
+        if keep_from == 0:
+            return None
+        return ChatHistory(summary=summary.decode() if summary else "", turns=turns[:keep_from])
+
+    async def apply_compaction(self, user_id: str, session_id: str, summary: str, compacted: List[ChatTurn]) -> None:
+        """Replace the summary and drop the compacted turns from the head of the list."""
+        key = self._key(user_id, session_id)
+        await (
+            self.valkey.pipeline(transaction=True)
+            .hset(f"{key}:meta", "summary", summary)
+            .hincrby(f"{key}:meta", "tokens", -sum(turn.tokens for turn in compacted))
+            .ltrim(f"{key}:turns", len(compacted), -1)
+            .execute()
+        )
+
+    async def lock(self, user_id: str, session_id: str) -> bool:
+        """Take the per-session compaction lock; False if another worker holds it."""
+        key = f"{self._key(user_id, session_id)}:compacting"
+        return bool(await self.valkey.set(key, "1", nx=True, ex=self.settings.chat_summary_lock_seconds))
+
+    async def unlock(self, user_id: str, session_id: str) -> None:
+        await self.valkey.delete(f"{self._key(user_id, session_id)}:compacting")
@@ -0,0 +1,50 @@
+"""
+Durable store of indexed chunk texts, keyed by Cosdata vector id.
+"""
+from typing import Dict, List
+
+from sqlalchemy import delete, select
+from sqlalchemy.dialects.postgresql import insert
+
+from app.core.database import SessionLocal
+from app.models.journal_chunk import JournalChunk
+
+
+class ChunkTextStore:
+    """
+    Postgres-backed chunk texts shared by every process.
+
+    Synchronous, like VectorService, which runs in Celery tasks and in
+    worker threads of the API. Rows are removed with their journal entry
+    (ON DELETE CASCADE).
+    """
+
+    def put(self, journal_entry_id: int, user_id: str, chunks: Dict[str, str]) -> None:
+        """Insert or replace the texts of `chunks` (vector id -> text)."""
+        if not chunks:
+            return
+        stmt = insert(JournalChunk).values([
+            {"vector_id": vector_id, "journal_entry_id": journal_entry_id, "user_id": user_id, "text": text}
+            for vector_id, text in chunks.items()
+        ])
+        stmt = stmt.on_conflict_do_update(index_elements=[JournalChunk.vector_id], set_={"text": stmt.excluded.text})
+        with SessionLocal() as db:
+            db.execute(stmt)
+            db.commit()
+
+    def get_many(self, vector_ids: List[str]) -> Dict[str, str]:
+        """Texts of the given vector ids in one query; unknown ids are omitted."""
+        if not vector_ids:
+            return {}
+        with SessionLocal() as db:
+            rows = db.execute(
+                select(JournalChunk.vector_id, JournalChunk.text).where(JournalChunk.vector_id.in_(vector_ids))
+            ).all()
+        return {vector_id: text for vector_id, text in rows}
+
+    def delete(self, vector_ids: List[str]) -> None:
+        if not vector_ids:
+            return
+        with SessionLocal() as db:
+            db.execute(delete(JournalChunk).where(JournalChunk.vector_id.in_(vector_ids)))
+            db.commit()
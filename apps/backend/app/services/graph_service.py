@@ -18,7 +18,8 @@ class GraphService:
         db.set_connection(settings.neo4j_url)
         db.install_all_labels()  # Install labels and constraints
 
-    def ingest_extraction(self, extraction: ExtractionResult, journal_entry_id: int, content: str, title: Optional[str] = None):
+    def ingest_extraction(self, extraction: ExtractionResult, journal_entry_id: int, content: str,
+                          title: Optional[str] = None, removed: Optional[Dict[str, list]] = None):
         """
         Ingest extracted data into the graph database.
 
@@ -27,11 +28,17 @@ class GraphService:
             journal_entry_id: ID of the journal entry
             content: Content of the journal entry
             title: Title of the journal entry (optional)
+            removed: Ids of entities, todos and events and [source, type, target]
+                of relationships to delete. None replaces every node previously
+                extracted from the entry.
         """
         
         # Create journal entry node if not exists
         try:
             journal_node = JournalEntryNode.nodes.get(node_id=str(journal_entry_id))
+            journal_node.content = content
+            journal_node.title = title
+            journal_node.save()
         except JournalEntryNode.DoesNotExist:
             result = JournalEntryNode.get_or_create({
                 "node_id": str(journal_entry_id),
@@ -41,6 +48,21 @@ class GraphService:
             journal_node = result[0]
             print(f"DEBUG: Created journal node {journal_node.node_id}")
 
+        def prefixed(local_id: str) -> str:
+            return f"{journal_entry_id}_{local_id}"
+
+        if removed is None:
+            db.cypher_query(
+                "MATCH (j:JournalEntryNode {node_id: $id})-[:HAS_ENTITY|HAS_TODO|HAS_EVENT]->(n) DETACH DELETE n",
+                {"id": str(journal_entry_id)},
+            )
+        else:
+            self._delete_extracted(removed, prefixed)
+            # Changed relationships are re-created below with their new properties
+            self._delete_relationships(
+                [[rel.source, rel.type, rel.target] for rel in extraction.relationships], prefixed,
+            )
+
         # Ingest entities
         entity_id_map = {}
         for entity in extraction.entities:
@@ -51,6 +73,8 @@ class GraphService:
                 'name': entity.name,
                 'type': entity.type
             })[0]  # type: ignore[arg-type] - neomodel accepts dict for props
+            entity_node.name = entity.name
+            entity_node.type = entity.type
             if entity.normalized_name:
                 entity_node.normalized_name = entity.normalized_name
             entity_node.attributes = entity.attributes
@@ -68,10 +92,11 @@ class GraphService:
                 'node_id': prefixed_id,
                 'task': todo.task
             })[0]  # type: ignore[arg-type]
+            todo_node.task = todo.task
             todo_node.priority = todo.priority
             todo_node.due = todo.due
             # Update related_entities with prefixed IDs
-            prefixed_related = [entity_id_map.get(eid, eid) for eid in todo.related_entities]
+            prefixed_related = [entity_id_map.get(eid, prefixed(eid)) for eid in todo.related_entities]
             todo_node.related_entities = prefixed_related
             todo_node.save()
 
@@ -95,12 +120,13 @@ class GraphService:
                 'node_id': prefixed_id,
                 'title': event.title
             })[0]  # type: ignore[arg-type]
+            event_node.title = event.title
             event_node.datetime = event.datetime
             event_node.location = event.location
             event_node.duration_minutes = event.duration_minutes
             event_node.should_sync_calendar = event.should_sync_calendar
             # Update related_entities with prefixed IDs
-            prefixed_related = [entity_id_map.get(eid, eid) for eid in event.related_entities]
+            prefixed_related = [entity_id_map.get(eid, prefixed(eid)) for eid in event.related_entities]
             event_node.related_entities = prefixed_related
             event_node.save()
 
@@ -120,8 +146,8 @@ class GraphService:
             if relationship.target == "null":
                 print(f"DEBUG: Skipping relationship with null target: {relationship}")
                 continue
-            source_id = entity_id_map.get(relationship.source, relationship.source)
-            target_id = entity_id_map.get(relationship.target, relationship.target)
+            source_id = entity_id_map.get(relationship.source, prefixed(relationship.source))
+            target_id = entity_id_map.get(relationship.target, prefixed(relationship.target))
             try:
                 source_node = EntityNode.nodes.get(node_id=source_id)
                 target_node = EntityNode.nodes.get(node_id=target_id)
@@ -135,6 +161,41 @@ class GraphService:
             except EntityNode.DoesNotExist as e:
                 print(f"DEBUG: Entity not found for relationship: {e}")
 
+    def delete_entries(self, journal_entry_ids: List[int]) -> None:
+        """Delete journal entry nodes and everything extracted from them in one statement."""
+        if not journal_entry_ids:
+            return
+        db.cypher_query(
+            "UNWIND $ids AS id "
+            "MATCH (j:JournalEntryNode {node_id: id}) "
+            "OPTIONAL MATCH (j)-[:HAS_ENTITY|HAS_TODO|HAS_EVENT]->(n) "
+            "DETACH DELETE n, j",
+            {"ids": [str(journal_entry_id) for journal_entry_id in journal_entry_ids]},
+        )
+
+    def _delete_extracted(self, removed: Dict[str, list], prefixed) -> None:
+        """Delete removed entity, todo and event nodes and removed relationships."""
+        for label, key in (("EntityNode", "entities"), ("TodoNode", "todos"), ("EventNode", "events")):
+            ids = [prefixed(local_id) for local_id in removed.get(key, [])]
+            if ids:
+                db.cypher_query(f"MATCH (n:{label}) WHERE n.node_id IN $ids DETACH DELETE n", {"ids": ids})
+        self._delete_relationships(removed.get("relationships", []), prefixed)
+
+    def _delete_relationships(self, relationships: List[list], prefixed) -> None:
+        """Delete RELATED_TO edges given as [source, type, target] extraction ids (type matched case-insensitively)."""
+        rows = [
+            {"source": prefixed(source), "type": rel_type.lower(), "target": prefixed(target)}
+            for source, rel_type, target in relationships
+        ]
+        if rows:
+            db.cypher_query(
+                "UNWIND $rows AS row "
+                "MATCH (:EntityNode {node_id: row.source})-[r:RELATED_TO]->(:EntityNode {node_id: row.target}) "
+                "WHERE toLower(r.type) = row.type "
+                "DELETE r",
+                {"rows": rows},
+            )
+
     def get_graph_snapshot(self) -> Dict[str, Sequence[Any]]:
         """Return all nodes and relationships stored in Neo4j."""
 
@@ -0,0 +1,320 @@
+"""
+Bulk journal import service.
+Parses NDJSON or ZIP uploads incrementally, inserts entries in batches and
+queues extraction with a bounded concurrency per job.
+"""
+import json
+import logging
+import tempfile
+import uuid
+import zipfile
+from datetime import datetime, timezone as dt_timezone
+from pathlib import PurePosixPath
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional
+
+from celery import chain
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import get_settings
+from app.core.valkey_client import get_async_valkey
+from app.models.journal_entry import JournalEntry, ProcessingStatus
+from app.schemas.journal_import import ImportJobStatus
+
+logger = logging.getLogger(__name__)
+
+# Uploads larger than this are spooled from memory to a temporary file
+SPOOL_MAX_MEMORY = 8 * 1024 * 1024
+
+
+class ImportProgress:
+    """
+    Per-job import progress stored as a Valkey hash.
+    """
+
+    COUNTERS = ("inserted", "extracted", "failed", "errors")
+
+    def __init__(self):
+        self.valkey = get_async_valkey()
+        self.settings = get_settings()
+
+    @staticmethod
+    def _key(job_id: str) -> str:
+        return f"import_job:{job_id}"
+
+    async def start(self, job_id: str, user_id: str) -> None:
+        key = self._key(job_id)
+        await self.valkey.hset(key, mapping={
+            "user_id": user_id,
+            "status": "receiving",
+            **{counter: 0 for counter in self.COUNTERS},
+        })
+        await self.valkey.expire(key, self.settings.import_job_ttl_seconds)
+
+    async def set_status(self, job_id: str, status: str) -> None:
+        await self.valkey.hset(self._key(job_id), "status", status)
+
+    async def incr(self, job_id: str, counter: str, amount: int = 1) -> None:
+        await self.valkey.hincrby(self._key(job_id), counter, amount)
+
+    async def get(self, job_id: str, user_id: str) -> Optional[ImportJobStatus]:
+        """Return job progress, or None if unknown or owned by another user."""
+        raw = await self.valkey.hgetall(self._key(job_id))
+        data = {key.decode(): value.decode() for key, value in raw.items()}
+        if not data or data.get("user_id") != user_id:
+            return None
+        return ImportJobStatus(
+            job_id=job_id,
+            status=data["status"],
+            **{counter: int(data.get(counter, 0)) for counter in self.COUNTERS},
+        )
+
+
+class JournalImportService:
+    """
+    Service for importing many journal entries in one upload.
+
+    Accepted record format (one JSON object per NDJSON line or per .json file):
+        {"content": "...", "title": "...", "created_at": "2021-03-04T10:00:00Z"}
+    Plain .txt/.md files inside a ZIP become one entry each, titled by file name.
+    """
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+        self.settings = get_settings()
+        self.progress = ImportProgress()
+
+    async def import_ndjson(self, user_id: str, chunks: AsyncIterator[bytes], timezone: str = "UTC") -> ImportJobStatus:
+        """
+        Import an NDJSON body, reading it line by line as it streams in.
+        """
+        job_id = uuid.uuid4().hex
+        await self.progress.start(job_id, user_id)
+
+        entry_ids: List[int] = []
+        batch: List[Dict[str, Any]] = []
+        try:
+            async for line in self._iter_lines(chunks):
+                await self._add_record(job_id, user_id, line, batch, entry_ids)
+            await self._flush(job_id, batch, entry_ids)
+        except BaseException:
+            await self._abort(job_id, user_id, entry_ids, timezone)
+            raise
+
+        return await self._finish(job_id, user_id, entry_ids, timezone)
+
+    async def import_zip(self, user_id: str, chunks: AsyncIterator[bytes], timezone: str = "UTC") -> ImportJobStatus:
+        """
+        Import a ZIP archive of .ndjson/.jsonl, .json, .txt or .md files.
+        The archive is spooled to disk (ZIP needs random access); members are
+        decompressed one at a time. Both the upload and the total decompressed
+        size are capped.
+        """
+        job_id = uuid.uuid4().hex
+        await self.progress.start(job_id, user_id)
+
+        entry_ids: List[int] = []
+        batch: List[Dict[str, Any]] = []
+        try:
+            with tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_MEMORY) as spool:
+                async for chunk in chunks:
+                    if spool.tell() + len(chunk) > self.settings.import_max_zip_bytes:
+                        raise ValueError("ZIP archive exceeds the maximum upload size")
+                    spool.write(chunk)
+                spool.seek(0)
+
+                try:
+                    archive = zipfile.ZipFile(spool)
+                except zipfile.BadZipFile as e:
+                    raise ValueError(f"Invalid ZIP archive: {e}")
+
+                with archive:
+                    for record in self._iter_zip_records(archive):
+                        await self._add_record(job_id, user_id, record, batch, entry_ids)
+            await self._flush(job_id, batch, entry_ids)
+        except BaseException:
+            await self._abort(job_id, user_id, entry_ids, timezone)
+            raise
+
+        return await self._finish(job_id, user_id, entry_ids, timezone)
+
+    async def get_job(self, job_id: str, user_id: str) -> Optional[ImportJobStatus]:
+        return await self.progress.get(job_id, user_id)
+
+    async def _iter_lines(self, chunks: AsyncIterator[bytes]) -> AsyncIterator[Optional[bytes]]:
+        """
+        Split a byte stream into lines without buffering more than one line.
+        Oversized lines are dropped as they stream in and yielded as None.
+        """
+        max_line_bytes = self.settings.import_max_entry_chars * 4 + 1024
+        buffer = b""
+        # Inside an oversized line whose bytes are being discarded
+        skipping = False
+        async for chunk in chunks:
+            buffer += chunk
+            *lines, buffer = buffer.split(b"\n")
+            for line in lines:
+                if skipping:
+                    # End of the oversized line
+                    skipping = False
+                    yield None
+                else:
+                    yield line if len(line) <= max_line_bytes else None
+            if len(buffer) > max_line_bytes:
+                skipping, buffer = True, b""
+        if skipping:
+            yield None
+        elif buffer:
+            yield buffer
+
+    def _iter_zip_records(self, archive: zipfile.ZipFile) -> Iterator[Any]:
+        """
+        Yield raw records (bytes lines or dicts) from every supported archive member.
+        Oversized records are yielded as None. Sizes are checked on the bytes
+        actually decompressed, since the sizes in the ZIP directory may lie.
+
+        Raises:
+            ValueError: If the archive decompresses to more than import_max_decompressed_bytes.
+        """
+        max_record_bytes = self.settings.import_max_entry_chars * 4
+        max_line_bytes = max_record_bytes + 1024
+        remaining = self.settings.import_max_decompressed_bytes
+
+        def consume(data: bytes) -> bytes:
+            nonlocal remaining
+            remaining -= len(data)
+            if remaining < 0:
+                raise ValueError("ZIP archive exceeds the maximum decompressed size")
+            return data
+
+        for info in archive.infolist():
+            if info.is_dir():
+                continue
+            path = PurePosixPath(info.filename)
+            if path.name.startswith(".") or "__MACOSX" in path.parts:
+                continue
+
+            suffix = path.suffix.lower()
+            if suffix in (".ndjson", ".jsonl"):
+                with archive.open(info) as member:
+                    while line := consume(member.readline(max_line_bytes + 1)):
+                        if len(line) > max_line_bytes:
+                            # Skip the rest of the oversized line
+                            while line and not line.endswith(b"\n"):
+                                line = consume(member.readline(max_line_bytes + 1))
+                            yield None
+                            continue
+                        yield line
+            elif suffix in (".json", ".txt", ".md"):
+                if info.file_size > max_record_bytes:
+                    yield None
+                    continue
+                with archive.open(info) as member:
+                    data = consume(member.read(max_record_bytes + 1))
+                if len(data) > max_record_bytes:
+                    yield None
+                elif suffix == ".json":
+                    yield data
+                else:
+                    yield {"title": path.stem, "content": data.decode("utf-8", errors="replace")}
+
+    async def _add_record(self, job_id: str, user_id: str, record: Any, batch: List[Dict[str, Any]], entry_ids: List[int]) -> None:
+        """Validate one record, add it to the batch and flush the batch when full."""
+        if isinstance(record, bytes) and not record.strip():
+            return
+        try:
+            batch.append(self._to_row(user_id, record))
+        except ValueError as e:
+            logger.warning(f"Skipping import record in job {job_id}: {e}")
+            await self.progress.incr(job_id, "errors")
+            return
+
+        if len(batch) >= self.settings.import_batch_size:
+            entry_ids.extend(await self._insert_batch(job_id, batch))
+            batch.clear()
+
+    def _to_row(self, user_id: str, record: Any) -> Dict[str, Any]:
+        """Convert a raw record into a journal_entries row."""
+        if record is None:
+            raise ValueError("record too large")
+        if isinstance(record, bytes):
+            try:
+                record = json.loads(record)
+            except json.JSONDecodeError as e:
+                raise ValueError(f"invalid JSON: {e}")
+        if not isinstance(record, dict):
+            raise ValueError("record must be a JSON object")
+
+        content = record.get("content")
+        if not isinstance(content, str) or not content.strip():
+            raise ValueError("content is required")
+        if len(content) > self.settings.import_max_entry_chars:
+            raise ValueError("content exceeds the maximum entry size")
+
+        title = record.get("title")
+        if title is not None:
+            title = str(title)[:255]
+
+        created_at = datetime.utcnow()
+        raw_date = record.get("created_at") or record.get("date")
+        if raw_date:
+            try:
+                parsed = datetime.fromisoformat(str(raw_date).replace("Z", "+00:00"))
+            except ValueError:
+                raise ValueError(f"invalid created_at: {raw_date}")
+            if parsed.tzinfo is not None:
+                parsed = parsed.astimezone(dt_timezone.utc).replace(tzinfo=None)
+            created_at = parsed
+
+        return {
+            "user_id": user_id,
+            "title": title,
+            "content": content,
+            "status": ProcessingStatus.PENDING,
+            "created_at": created_at,
+            "updated_at": created_at,
+        }
+
+    async def _insert_batch(self, job_id: str, rows: List[Dict[str, Any]]) -> List[int]:
+        """Insert a batch of rows in one statement and return their IDs."""
+        result = await self.db.execute(insert(JournalEntry).returning(JournalEntry.id), rows)
+        ids = list(result.scalars().all())
+        await self.db.commit()
+        await self.progress.incr(job_id, "inserted", len(ids))
+        return ids
+
+    async def _flush(self, job_id: str, batch: List[Dict[str, Any]], entry_ids: List[int]) -> None:
+        """Insert the last, partially filled batch."""
+        if batch:
+            entry_ids.extend(await self._insert_batch(job_id, batch))
+            batch.clear()
+
+    async def _abort(self, job_id: str, user_id: str, entry_ids: List[int], timezone: str) -> None:
+        """
+        Settle a job whose upload failed midway. Batches already committed are
+        still extracted; the job ends "partial", or "failed" if nothing was inserted.
+        """
+        logger.warning(f"Import job {job_id} failed after inserting {len(entry_ids)} entries")
+        await self.db.rollback()
+        await self._finish(job_id, user_id, entry_ids, timezone, final_status="partial" if entry_ids else "failed")
+
+    async def _finish(self, job_id: str, user_id: str, entry_ids: List[int], timezone: str,
+                      final_status: str = "completed") -> ImportJobStatus:
+        """Queue extraction for every inserted entry; the job ends with `final_status`."""
+        if entry_ids:
+            # Imported here to avoid a circular import (tasks import the services)
+            from app.tasks.import_tasks import extract_import_batch
+
+            # Batches run one after another; each runs at most
+            # import_extraction_concurrency extractions at a time.
+            size = self.settings.import_batch_size
+            batches = [entry_ids[i:i + size] for i in range(0, len(entry_ids), size)]
+            chain(*[
+                extract_import_batch.si(job_id, ids, user_id, timezone, index == len(batches) - 1, final_status)
+                for index, ids in enumerate(batches)
+            ]).delay()
+            await self.progress.set_status(job_id, "queued")
+        else:
+            await self.progress.set_status(job_id, final_status)
+
+        return await self.progress.get(job_id, user_id)
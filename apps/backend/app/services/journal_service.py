@@ -2,162 +2,179 @@
 """
 Journal service for CRUD operations.
 """
-import asyncio
-from datetime import datetime
-from typing import List, Optional
-from sqlalchemy.orm import Session
-
-from app.models.journal_entry import JournalEntry
-from app.schemas.journal_entry import JournalEntryCreate, JournalEntryUpdate
-from app.services.ai_service import AIService
-from app.services.auth_service import AuthService
-from app.core.database import get_auth_db
+from datetime import date, datetime, timedelta
+from typing import List, Optional, Tuple
+from sqlalchemy import delete, func, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+
 from app.core.config import get_settings
-from app.tasks.ai_tasks import ingest_vectors_to_cosdata, process_todos_from_extraction, process_calendar_events_from_extraction, ingest_extraction_to_graph
+from app.models.journal_entry import JournalEntry, ProcessingStatus, SEARCH_CONFIG
+from app.models.todo import Todo
+from app.schemas.journal_entry import JournalEntry as JournalEntrySchema, JournalEntryCreate, JournalEntryStatus, JournalEntryUpdate, JournalSearchHit
+from app.core.pagination import decode_cursor, encode_cursor
+from app.services.answer_cache_service import invalidate_user_answers
+from app.tasks.ai_tasks import queue_journal_cleanup
+from app.tasks.extraction_tasks import extract_journal_entry
 
 
 class JournalService:
-    def __init__(self, db: Session):
+    def __init__(self, db: AsyncSession):
         self.db = db
 
-    def get_entries(self, user_id: str, skip: int = 0, limit: int = 100) -> List[JournalEntry]:
-        return (
-            self.db.query(JournalEntry)
-            .filter(JournalEntry.user_id == user_id)
-            .offset(skip)
-            .limit(limit)
-            .all()
+    async def get_entries(self, user_id: str, limit: int = 100, cursor: Optional[str] = None) -> Tuple[List[JournalEntry], Optional[str]]:
+        """
+        Get a page of entries, newest first, using keyset pagination.
+
+        Args:
+            user_id: User ID owning the entries
+            limit: Maximum number of entries to return
+            cursor: Opaque token from a previous page (None for the first page)
+
+        Returns:
+            Tuple of (entries, next_cursor); next_cursor is None on the last page
+
+        Raises:
+            ValueError: If the cursor is malformed
+        """
+        stmt = select(JournalEntry).where(JournalEntry.user_id == user_id)
+        if cursor:
+            created_at, entry_id = decode_cursor(cursor)
+            stmt = stmt.where(tuple_(JournalEntry.created_at, JournalEntry.id) < tuple_(created_at, entry_id))
+
+        result = await self.db.execute(
+            stmt
+            .order_by(JournalEntry.created_at.desc(), JournalEntry.id.desc())
+            .limit(limit + 1)
         )
+        entries = list(result.scalars().all())
+
+        next_cursor = None
+        if len(entries) > limit:
+            entries = entries[:limit]
+            next_cursor = encode_cursor(entries[-1].created_at, entries[-1].id)
+        return entries, next_cursor
+
+    async def search_entries(
+        self,
+        user_id: str,
+        query: str,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None,
+        limit: int = 20,
+    ) -> List[JournalSearchHit]:
+        """
+        Full-text search over the user's entries, ranked with ts_rank_cd.
+
+        Args:
+            user_id: User ID owning the entries
+            query: Web-search style query ("quoted phrases", -exclusions, or)
+            start_date: Only entries created on or after this date
+            end_date: Only entries created on or before this date
+            limit: Maximum number of hits to return
+
+        Returns:
+            Hits ordered by rank, each with a highlighted content snippet
+        """
+        ts_query = func.websearch_to_tsquery(SEARCH_CONFIG, query)
+        rank = func.ts_rank_cd(JournalEntry.search_vector, ts_query)
 
-    def get_entry(self, entry_id: int, user_id: str) -> Optional[JournalEntry]:
-        return (
-            self.db.query(JournalEntry)
-            .filter(JournalEntry.id == entry_id, JournalEntry.user_id == user_id)
-            .first()
+        # Rank and limit first so ts_headline only runs on the returned rows
+        ranked = (
+            select(JournalEntry.id.label("id"), rank.label("rank"))
+            .where(JournalEntry.user_id == user_id, JournalEntry.search_vector.op("@@")(ts_query))
         )
+        if start_date:
+            ranked = ranked.where(JournalEntry.created_at >= start_date)
+        if end_date:
+            ranked = ranked.where(JournalEntry.created_at < end_date + timedelta(days=1))
+        ranked = ranked.order_by(rank.desc(), JournalEntry.id.desc()).limit(limit).subquery()
+
+        snippet = func.ts_headline(
+            SEARCH_CONFIG,
+            JournalEntry.content,
+            ts_query,
+            "StartSel=<mark>, StopSel=</mark>, MaxWords=35, MinWords=15, MaxFragments=2",
+        )
+        result = await self.db.execute(
+            select(JournalEntry, ranked.c.rank, snippet.label("snippet"))
+            .join(ranked, ranked.c.id == JournalEntry.id)
+            .order_by(ranked.c.rank.desc(), JournalEntry.id.desc())
+        )
+        return [
+            JournalSearchHit(
+                **JournalEntrySchema.model_validate(entry).model_dump(),
+                rank=entry_rank,
+                snippet=entry_snippet,
+            )
+            for entry, entry_rank, entry_snippet in result.all()
+        ]
+
+    async def get_entry(self, entry_id: int, user_id: str) -> Optional[JournalEntry]:
+        result = await self.db.execute(
+            select(JournalEntry)
+            .where(JournalEntry.id == entry_id, JournalEntry.user_id == user_id)
+        )
+        return result.scalars().first()
 
     async def create_entry(self, user_id: str, entry: JournalEntryCreate) -> JournalEntry:
         db_entry = JournalEntry(
             user_id=user_id,
             title=entry.title,
             content=entry.content,
-            status=entry.status,
+            # Status is driven by the extraction pipeline
+            status=ProcessingStatus.PENDING,
         )
-        await asyncio.to_thread(lambda: (self.db.add(db_entry), self.db.commit(), self.db.refresh(db_entry)))
-        # Trigger extraction
-        ai_service = AIService()
-        try:
-            # Use timezone from request, or default to UTC
-            timezone = entry.timezone or "UTC"
-            
-            # Convert UTC created_at to user's timezone for date context
-            from datetime import timezone as dt_timezone
-            import zoneinfo
-            utc_time = db_entry.created_at.replace(tzinfo=dt_timezone.utc)
-            user_tz = zoneinfo.ZoneInfo(timezone)
-            local_time = utc_time.astimezone(user_tz)
-            current_date = local_time.strftime("%B %d, %Y")
-            
-            extraction = await ai_service.extract_from_journal_entry(db_entry, current_date, timezone)
-            # Trigger graph ingestion task
-            ingest_extraction_to_graph.delay(extraction.model_dump(), db_entry.id, db_entry.content, db_entry.title)
-            # Trigger vector ingestion task
-            ingest_vectors_to_cosdata.delay(extraction.model_dump(), db_entry.id, db_entry.content, db_entry.title, user_id)
-            # Trigger todo processing task
-            process_todos_from_extraction.delay(extraction.model_dump(), db_entry.id, user_id)
-            
-            # Trigger calendar events processing task with user's Google OAuth tokens
-            auth_db = next(get_auth_db())
-            try:
-                auth_service = AuthService(auth_db)
-                user_data = auth_service.get_user(user_id)
-                
-                if user_data and user_data.get("google_access_token"):
-                    settings = get_settings()
-                    process_calendar_events_from_extraction.delay(
-                        extraction.model_dump(),
-                        db_entry.id,
-                        user_id,
-                        user_data["google_access_token"],
-                        user_data["google_refresh_token"],
-                        str(user_data["google_token_expires_at"]) if user_data.get("google_token_expires_at") else None,
-                        settings.google_client_id,
-                        settings.google_client_secret,
-                        timezone  # Pass user's timezone to calendar task
-                    )
-            finally:
-                auth_db.close()
-            
-        except ValueError:
-            # Handle extraction failure, perhaps set status to failed
-            pass
+        self.db.add(db_entry)
+        await self.db.commit()
+        await self.db.refresh(db_entry)
+        await invalidate_user_answers(user_id)
+        # Trigger extraction in the background; use timezone from request, or default to UTC
+        extract_journal_entry.delay(db_entry.id, user_id, entry.timezone or "UTC")
         return db_entry
 
     async def update_entry(self, entry_id: int, user_id: str, entry: JournalEntryUpdate) -> Optional[JournalEntry]:
-        db_entry = self.get_entry(entry_id, user_id)
+        db_entry = await self.get_entry(entry_id, user_id)
         if not db_entry:
             return None
 
-        update_data = entry.model_dump(exclude_unset=True)
+        update_data = entry.model_dump(exclude_unset=True, exclude={"timezone"})
         update_data["updated_at"] = datetime.utcnow()
+        update_data["status"] = ProcessingStatus.PENDING
 
         for field, value in update_data.items():
             setattr(db_entry, field, value)
 
-        await asyncio.to_thread(lambda: (self.db.commit(), self.db.refresh(db_entry)))
-        # Trigger extraction
-        ai_service = AIService()
-        try:
-            # Use timezone from request if provided, otherwise default to UTC
-            timezone = entry.timezone if hasattr(entry, 'timezone') and entry.timezone else "UTC"
-            
-            # Convert UTC updated_at to user's timezone for date context
-            from datetime import timezone as dt_timezone
-            import zoneinfo
-            utc_time = db_entry.updated_at.replace(tzinfo=dt_timezone.utc)
-            user_tz = zoneinfo.ZoneInfo(timezone)
-            local_time = utc_time.astimezone(user_tz)
-            current_date = local_time.strftime("%B %d, %Y")
-            
-            extraction = await ai_service.extract_from_journal_entry(db_entry, current_date, timezone)
-            # Trigger graph ingestion task
-            ingest_extraction_to_graph.delay(extraction.model_dump(), db_entry.id, db_entry.content, db_entry.title)
-            # Trigger vector ingestion task
-            ingest_vectors_to_cosdata.delay(extraction.model_dump(), db_entry.id, db_entry.content, db_entry.title, user_id)
-            # Trigger todo processing task
-            process_todos_from_extraction.delay(extraction.model_dump(), db_entry.id, user_id)
-            
-            # Trigger calendar events processing task with user's Google OAuth tokens
-            auth_db = next(get_auth_db())
-            try:
-                auth_service = AuthService(auth_db)
-                user_data = auth_service.get_user(user_id)
-                
-                if user_data and user_data.get("google_access_token"):
-                    settings = get_settings()
-                    process_calendar_events_from_extraction.delay(
-                        extraction.model_dump(),
-                        db_entry.id,
-                        user_id,
-                        user_data["google_access_token"],
-                        user_data["google_refresh_token"],
-                        str(user_data["google_token_expires_at"]) if user_data.get("google_token_expires_at") else None,
-                        settings.google_client_id,
-                        settings.google_client_secret,
-                        timezone  # Pass user's timezone to calendar task
-                    )
-            finally:
-                auth_db.close()
-        except ValueError:
-            # Handle extraction failure
-            pass
+        await self.db.commit()
+        await self.db.refresh(db_entry)
+        await invalidate_user_answers(user_id)
+        # Trigger extraction in the background; use timezone from request if provided, otherwise UTC
+        extract_journal_entry.delay(db_entry.id, user_id, entry.timezone or "UTC")
         return db_entry
 
-    def delete_entry(self, entry_id: int, user_id: str) -> bool:
-        db_entry = self.get_entry(entry_id, user_id)
+    async def get_status(self, entry_id: int, user_id: str) -> Optional[JournalEntryStatus]:
+        result = await self.db.execute(
+            select(JournalEntry.id, JournalEntry.status, JournalEntry.updated_at)
+            .where(JournalEntry.id == entry_id, JournalEntry.user_id == user_id)
+        )
+        row = result.first()
+        if row is None:
+            return None
+        return JournalEntryStatus(id=row.id, status=row.status.value, updated_at=row.updated_at)
+
+    async def delete_entry(self, entry_id: int, user_id: str) -> bool:
+        """
+        Delete an entry, its todos (per `journal_delete_todo_policy`) and chunk
+        texts, and enqueue removal of its graph nodes and vectors.
+        """
+        db_entry = await self.get_entry(entry_id, user_id)
         if not db_entry:
             return False
 
-        self.db.delete(db_entry)
-        self.db.commit()
-        return True
\ No newline at end of file
+        if get_settings().journal_delete_todo_policy == "delete":
+            await self.db.execute(delete(Todo).where(Todo.journal_entry_id == entry_id, Todo.user_id == user_id))
+        # Otherwise the FK (ON DELETE SET NULL) unlinks them
+        await self.db.delete(db_entry)
+        await self.db.commit()
+        await invalidate_user_answers(user_id)
+        await queue_journal_cleanup([(entry_id, user_id)])
+        return True
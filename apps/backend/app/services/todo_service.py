@@ -2,48 +2,72 @@
 Todo service for CRUD operations.
 """
 from datetime import datetime
-from typing import List, Optional
-from sqlalchemy.orm import Session
+from typing import List, Optional, Tuple
+from sqlalchemy import delete, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.pagination import decode_cursor, encode_cursor
 from app.models.todo import Todo
 from app.schemas.todo import TodoCreate, TodoUpdate
+from app.services.answer_cache_service import invalidate_user_answers
 
 
 class TodoService:
-    def __init__(self, db: Session):
+    def __init__(self, db: AsyncSession):
         self.db = db
 
-    def get_todos(self, user_id: str, skip: int = 0, limit: int = 100) -> List[Todo]:
-        return (
-            self.db.query(Todo)
-            .filter(Todo.user_id == user_id)
-            .offset(skip)
-            .limit(limit)
-            .all()
+    async def get_todos(self, user_id: str, limit: int = 100, cursor: Optional[str] = None) -> Tuple[List[Todo], Optional[str]]:
+        """
+        Get a page of todos, newest first, using keyset pagination.
+
+        Returns:
+            Tuple of (todos, next_cursor); next_cursor is None on the last page
+
+        Raises:
+            ValueError: If the cursor is malformed
+        """
+        stmt = select(Todo).where(Todo.user_id == user_id)
+        if cursor:
+            created_at, todo_id = decode_cursor(cursor)
+            stmt = stmt.where(tuple_(Todo.created_at, Todo.id) < tuple_(created_at, todo_id))
+
+        result = await self.db.execute(
+            stmt
+            .order_by(Todo.created_at.desc(), Todo.id.desc())
+            .limit(limit + 1)
         )
+        todos = list(result.scalars().all())
+
+        next_cursor = None
+        if len(todos) > limit:
+            todos = todos[:limit]
+            next_cursor = encode_cursor(todos[-1].created_at, todos[-1].id)
+        return todos, next_cursor
 
-    def get_todo(self, todo_id: int, user_id: str) -> Optional[Todo]:
-        return (
-            self.db.query(Todo)
-            .filter(Todo.id == todo_id, Todo.user_id == user_id)
-            .first()
+    async def get_todo(self, todo_id: int, user_id: str) -> Optional[Todo]:
+        result = await self.db.execute(
+            select(Todo)
+            .where(Todo.id == todo_id, Todo.user_id == user_id)
         )
+        return result.scalars().first()
 
-    def create_todo(self, user_id: str, todo: TodoCreate) -> Todo:
+    async def create_todo(self, user_id: str, todo: TodoCreate) -> Todo:
         db_todo = Todo(
             user_id=user_id,
             task=todo.task,
             priority=todo.priority,
             due_date=todo.due_date,
             journal_entry_id=todo.journal_entry_id,
+            extraction_ref=todo.extraction_ref,
         )
         self.db.add(db_todo)
-        self.db.commit()
-        self.db.refresh(db_todo)
+        await self.db.commit()
+        await self.db.refresh(db_todo)
+        await invalidate_user_answers(user_id)
         return db_todo
 
-    def update_todo(self, todo_id: int, user_id: str, todo: TodoUpdate) -> Optional[Todo]:
-        db_todo = self.get_todo(todo_id, user_id)
+    async def update_todo(self, todo_id: int, user_id: str, todo: TodoUpdate) -> Optional[Todo]:
+        db_todo = await self.get_todo(todo_id, user_id)
         if not db_todo:
             return None
 
@@ -53,15 +77,51 @@ class TodoService:
         for field, value in update_data.items():
             setattr(db_todo, field, value)
 
-        self.db.commit()
-        self.db.refresh(db_todo)
+        await self.db.commit()
+        await self.db.refresh(db_todo)
+        await invalidate_user_answers(user_id)
         return db_todo
 
-    def delete_todo(self, todo_id: int, user_id: str) -> bool:
-        db_todo = self.get_todo(todo_id, user_id)
+    async def delete_todo(self, todo_id: int, user_id: str) -> bool:
+        db_todo = await self.get_todo(todo_id, user_id)
         if not db_todo:
             return False
 
-        self.db.delete(db_todo)
-        self.db.commit()
-        return True
\ No newline at end of file
+        await self.db.delete(db_todo)
+        await self.db.commit()
+        await invalidate_user_answers(user_id)
+        return True
+
+    async def sync_extracted_todos(self, journal_entry_id: int, user_id: str, todos: List[TodoCreate],
+                                   refs: Optional[List[str]] = None) -> None:
+        """
+        Replace todos created by extraction of a journal entry in one transaction.
+
+        Args:
+            journal_entry_id: ID of the journal entry
+            user_id: User ID owning the entry
+            todos: Todos to create
+            refs: Extraction refs to delete first; all todos of the entry if None
+        """
+        if refs is None or refs:
+            stmt = delete(Todo).where(Todo.journal_entry_id == journal_entry_id, Todo.user_id == user_id)
+            if refs is not None:
+                stmt = stmt.where(Todo.extraction_ref.in_(refs))
+            deleted = (await self.db.execute(stmt)).rowcount
+        else:
+            deleted = 0
+
+        self.db.add_all([
+            Todo(
+                user_id=user_id,
+                task=todo.task,
+                priority=todo.priority,
+                due_date=todo.due_date,
+                journal_entry_id=todo.journal_entry_id,
+                extraction_ref=todo.extraction_ref,
+            )
+            for todo in todos
+        ])
+        await self.db.commit()
+        if deleted or todos:
+            await invalidate_user_answers(user_id)
@@ -1,15 +1,61 @@
-from typing import List, Dict, Any, Optional
+from concurrent.futures import ThreadPoolExecutor
+import hashlib
+from typing import Callable, List, Dict, Any, Optional, Tuple
+import logging
 import re
-from fastembed import TextEmbedding
-from app.core.cosdata_client import get_collection 
+import time
+
+from prometheus_client import Histogram
+
+from app.core.config import get_settings
+from app.core.cosdata_client import get_collection, get_user_collection, has_text_index
+from app.core.embeddings import embed_texts, embed_texts_cached, get_embedding_model
+from app.core.extraction_segments import split_segments
 from app.schemas.extraction import ExtractionResult
+from app.services.chunk_store import ChunkTextStore
+
+logger = logging.getLogger(__name__)
+
+SEARCH_LEG_LATENCY = Histogram(
+    "vector_search_leg_seconds", "Latency of one retrieval leg of hybrid search", ["leg", "outcome"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5),
+)
+
+# Runs the retrieval legs of a search concurrently
+SEARCH_POOL = ThreadPoolExecutor(max_workers=8, thread_name_prefix="vector-search")
+
+
+def reciprocal_rank_fusion(ranked: List[Tuple[List[Dict[str, Any]], float]], k: int = 60) -> List[Dict[str, Any]]:
+    """
+    Fuse ranked result lists: score(d) = sum of weight / (k + rank) over the
+    lists containing d (rank starting at 1). The fused score replaces `score`.
+
+    Args:
+        ranked: (results, weight) per retrieval leg, each ordered best first
+        k: Rank constant damping the influence of top ranks
+    """
+    scores: Dict[str, float] = {}
+    results: Dict[str, Dict[str, Any]] = {}
+    for leg_results, weight in ranked:
+        for rank, result in enumerate(leg_results, start=1):
+            scores[result['id']] = scores.get(result['id'], 0.0) + weight / (k + rank)
+            # Keep the first copy that carries text
+            if result['id'] not in results or results[result['id']].get('text') is None:
+                results[result['id']] = result
+    ordered = sorted(scores, key=scores.get, reverse=True)
+    return [{**results[vector_id], 'score': scores[vector_id]} for vector_id in ordered]
+
+
+def chunk_hash(chunk: str) -> str:
+    return hashlib.sha256(chunk.encode()).hexdigest()[:16]
+
 
 class VectorService:
     def __init__(self):
-        # Initialize embedding model (adjust model based on dimension)
-        self.embedding_model = TextEmbedding(model_name="thenlper/gte-base")
-        # Store chunk texts for retrieval
-        self.chunk_texts = {}
+        # Shared per process; loading it is the expensive part
+        self.embedding_model = get_embedding_model()
+        # Chunk texts for results that come back without raw text
+        self.chunk_store = ChunkTextStore()
 
     def chunk_text(self, text: str, chunk_size: int = 500, overlap: int = 50) -> List[str]:
         """Simple text chunking by sentences with overlap."""
@@ -43,30 +89,44 @@ class VectorService:
 
     def generate_embeddings(self, texts: List[str]) -> List[List[float]]:
         """Generate embeddings for a list of text chunks."""
-        return [emb.tolist() for emb in self.embedding_model.embed(texts)]
+        return embed_texts(texts)
 
-    def upsert_vectors(self, vectors: List[Dict[str, Any]]) -> None:
-        """Upsert vectors to Cosdata collection."""
-        collection = get_collection()
+    def upsert_vectors(self, vectors: List[Dict[str, Any]], user_id: str) -> None:
+        """Upsert vectors to the user's Cosdata collection."""
+        collection = get_user_collection(user_id)
         with collection.transaction() as txn:
             txn.batch_upsert_vectors(vectors)
 
     def process_journal_entry(self, journal_entry_id: int, content: str, title: Optional[str],
                             extraction: ExtractionResult, user_id: str) -> None:
-        """Process journal entry: chunk, embed, and upsert vectors."""
-        # Chunk the content
-        chunks = self.chunk_text(content)
+        """
+        Process journal entry: chunk, embed, and upsert vectors.
+
+        Vector ids are derived from the chunk text, so re-indexing an edited
+        entry only embeds and upserts new chunks; chunks that no longer exist
+        are deleted in the same Cosdata transaction. Embeddings are cached by
+        chunk hash.
+        """
+        settings = get_settings()
+        document_id = f"user_{user_id}_journal_{journal_entry_id}"
+
+        # Chunk per content segment, so an edit only moves chunk boundaries inside its segment
+        chunks: Dict[str, str] = {}
+        for segment in split_segments(content, settings.extraction_segment_max_chars, settings.extraction_segment_boundary_modulus):
+            for chunk in self.chunk_text(segment):
+                chunks.setdefault(f"{document_id}_chunk_{chunk_hash(chunk)}", chunk)
 
-        # Generate embeddings
-        embeddings = self.generate_embeddings(chunks)
+        existing = {vector.id for vector in self._document_vectors(document_id, user_id)}
+        new_ids = [vector_id for vector_id in chunks if vector_id not in existing]
+        stale = [vector_id for vector_id in existing if vector_id not in chunks]
+        if not new_ids and not stale:
+            return
 
-        # Prepare vectors for upsert
+        embeddings = embed_texts_cached([chunks[vector_id] for vector_id in new_ids])
         vectors = []
-        for i, (chunk, embedding) in enumerate(zip(chunks, embeddings)):
-            vector_id = f"user_{user_id}_journal_{journal_entry_id}_chunk_{i}"
+        for vector_id, embedding in zip(new_ids, embeddings):
             metadata = {
                 "journal_entry_id": journal_entry_id,
-                "chunk_index": i,
                 "title": title or "",
                 "user_id": user_id,
                 "extraction_entities": len(extraction.entities),
@@ -77,46 +137,137 @@ class VectorService:
             vectors.append({
                 "id": vector_id,
                 "dense_values": embedding,
-                "document_id": f"user_{user_id}_journal_{journal_entry_id}",
+                "document_id": document_id,
                 "metadata": metadata,
-                "text": chunk,  # Store original chunk for hybrid search
+                "text": chunks[vector_id],  # Store original chunk for hybrid search
             })
-            # Store chunk text for retrieval
-            self.chunk_texts[vector_id] = chunk
 
-        # Upsert to Cosdata
-        self.upsert_vectors(vectors)
+        # Texts are stored first so no search result can precede its text
+        self.chunk_store.put(journal_entry_id, user_id, {vector_id: chunks[vector_id] for vector_id in new_ids})
+        collection = get_user_collection(user_id)
+        with collection.transaction() as txn:
+            if vectors:
+                txn.batch_upsert_vectors(vectors)
+            for vector_id in stale:
+                txn.delete_vector(vector_id)
+        self.chunk_store.delete(stale)
+        logger.info(
+            f"Indexed journal entry {journal_entry_id}: {len(new_ids)} new, {len(stale)} deleted, "
+            f"{len(chunks) - len(new_ids)} unchanged chunks"
+        )
+
+    def delete_entries(self, user_id: str, journal_entry_ids: List[int]) -> int:
+        """
+        Delete all vectors of the given entries of one user in one transaction.
+        Their chunk texts are removed by Postgres together with the entries.
+
+        The Cosdata API has no delete by document id, so each entry's vector
+        ids are looked up by document id and deleted one by one.
+
+        Returns:
+            Number of deleted vectors
+        """
+        collection = get_user_collection(user_id, create=False)
+        if collection is None:
+            return 0
+        vector_ids = [
+            vector.id
+            for journal_entry_id in journal_entry_ids
+            for vector in collection.vectors.get_by_document_id(f"user_{user_id}_journal_{journal_entry_id}")
+        ]
+        if vector_ids:
+            with collection.transaction() as txn:
+                for vector_id in vector_ids:
+                    txn.delete_vector(vector_id)
+        return len(vector_ids)
+
+    def _document_vectors(self, document_id: str, user_id: str) -> List[Any]:
+        """
+        Vectors stored for a document; empty if it has none yet.
+
+        Lookup errors propagate: treating them as "no vectors" would skip
+        deleting stale chunks without anyone noticing.
+        """
+        return get_user_collection(user_id).vectors.get_by_document_id(document_id)
 
     def search(self, query: str, user_id: str, top_k: int = 5) -> List[Dict[str, Any]]:
-        """Search for relevant journal entry chunks using vector similarity."""
-        print("DEBUG: Starting vector_service.search")
-        # Generate embedding for the query
-        query_embedding = self.generate_embeddings([query])[0]
-        print("DEBUG: Query embedding generated")
+        """
+        Search the user's journal chunks.
 
-        # Perform dense vector search
-        print("DEBUG: About to get collection")
-        collection = get_collection()
-        print("DEBUG: Collection obtained")
-        results = collection.search.dense(
-            query_vector=query_embedding,
-            top_k=top_k * 2,  # Retrieve more to account for filtering
-            return_raw_text=True
-        )
-        
-        print(f"DEBUG: dense search results: {results}")
-        
-        # Filter results by user_id
-        # filtered_results = [
-        #     result for result in results['results']
-        #     if result['document_id'].startswith(f"user_{user_id}_")
-        # ]
-
-        # Fetch text for results where it's null
-        # for result in filtered_results:
-        for result in results['results']:
+        The dense (embedding) and TF-IDF legs run concurrently and are fused
+        with reciprocal rank fusion; either leg failing degrades to the other.
+        """
+        settings = get_settings()
+        collection = get_user_collection(user_id, create=False)
+        if collection is None:
+            # Nothing indexed for this user yet
+            return []
+
+        hybrid = settings.hybrid_search_enabled and has_text_index(collection)
+        depth = max(top_k, settings.hybrid_search_candidates) if hybrid else top_k
+        legs = {"dense": SEARCH_POOL.submit(self._search_leg, "dense", self._dense_search, collection, query, depth)}
+        if hybrid:
+            legs["text"] = SEARCH_POOL.submit(self._search_leg, "text", self._text_search, collection, query, depth)
+
+        weights = {"dense": settings.hybrid_dense_weight, "text": settings.hybrid_text_weight}
+        ranked = []
+        for leg, future in legs.items():
+            results = future.result()
+            if results is not None:
+                # The collection only holds this user's vectors; the id check guards against misrouted writes
+                ranked.append(([result for result in results if result['id'].startswith(f"user_{user_id}_")], weights[leg]))
+        if not ranked:
+            raise RuntimeError("Every vector search leg failed")
+
+        top = reciprocal_rank_fusion(ranked, settings.hybrid_rrf_k)[:top_k]
+
+        # Fetch text for results where it's null, in one query
+        texts = self.chunk_store.get_many([result['id'] for result in top if result.get('text') is None])
+        for result in top:
             if result.get('text') is None:
-                result['text'] = self.chunk_texts.get(result['id'], None)
+                result['text'] = texts.get(result['id'])
+
+        return top
+
+    def _dense_search(self, collection: Any, query: str, top_k: int) -> List[Dict[str, Any]]:
+        query_embedding = self.generate_embeddings([query])[0]
+        return collection.search.dense(query_vector=query_embedding, top_k=top_k, return_raw_text=True)['results']
 
-        # Return top_k filtered results
-        return results['results'][:top_k]
\ No newline at end of file
+    def _text_search(self, collection: Any, query: str, top_k: int) -> List[Dict[str, Any]]:
+        return collection.search.text(query_text=query, top_k=top_k, return_raw_text=True)['results']
+
+    @staticmethod
+    def _search_leg(leg: str, search: Callable[..., List[Dict[str, Any]]], *args: Any) -> Optional[List[Dict[str, Any]]]:
+        """Run one retrieval leg, recording its latency; None if it failed."""
+        started = time.monotonic()
+        outcome = "success"
+        try:
+            return search(*args)
+        except Exception as e:
+            outcome = "error"
+            logger.warning(f"Vector search leg {leg} failed: {e}")
+            return None
+        finally:
+            SEARCH_LEG_LATENCY.labels(leg, outcome).observe(time.monotonic() - started)
+
+    def migrate_legacy_vectors(self, journal_entry_id: int, user_id: str) -> int:
+        """
+        Delete an entry's vectors from the shared pre-per-user collection
+        (after it has been re-indexed into the user's collection).
+
+        Returns:
+            Number of deleted vectors
+        """
+        document_id = f"user_{user_id}_journal_{journal_entry_id}"
+        collection = get_collection()
+        try:
+            legacy = collection.vectors.get_by_document_id(document_id)
+        except Exception as e:
+            logger.warning(f"Could not read legacy vectors of {document_id}: {e}")
+            return 0
+        if legacy:
+            with collection.transaction() as txn:
+                for vector in legacy:
+                    txn.delete_vector(vector.id)
+        self.chunk_store.delete([vector.id for vector in legacy])
+        return len(legacy)
\ No newline at end of file
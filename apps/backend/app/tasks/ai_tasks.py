@@ -1,13 +1,21 @@
 from app.celery import celery_app
-from app.schemas.extraction import ExtractionResult
+from app.models.journal_entry import JournalEntry
+from app.schemas.extraction import ExtractionMetadata, ExtractionResult
 from app.services.graph_service import GraphService
 from app.services.vector_service import VectorService
 from app.services.todo_service import TodoService
 from app.services.calendar_service import GoogleCalendarService
-from app.core.database import get_db
+from app.core.config import get_settings
+from app.core.cosdata_client import drop_user_collection
+from app.core.database import AsyncSessionLocal
+from app.core.pipeline_metrics import track_stage
+from app.core.utils import run_async
+from app.core.valkey_client import get_async_valkey, get_valkey
 from app.schemas.todo import TodoCreate, Priority
-from typing import Optional
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy import select
 from datetime import datetime, timedelta
+import json
 import logging
 
 logger = logging.getLogger(__name__)
@@ -15,7 +23,8 @@ logger = logging.getLogger(__name__)
 
 
 @celery_app.task
-def ingest_extraction_to_graph(extraction: dict, journal_entry_id: int, content: str, title: Optional[str] = None):
+def ingest_extraction_to_graph(extraction: dict, journal_entry_id: int, content: str, title: Optional[str] = None,
+                               removed: Optional[dict] = None):
     """
     Ingest extracted data from journal entry into Neo4j graph database.
 
@@ -24,12 +33,14 @@ def ingest_extraction_to_graph(extraction: dict, journal_entry_id: int, content:
         journal_entry_id: ID of the journal entry
         content: Content of the journal entry
         title: Title of the journal entry (optional)
+        removed: Ids to delete; None replaces everything previously extracted from the entry
     """
     # Convert dict back to ExtractionResult
     extraction_result = ExtractionResult(**extraction)
 
-    graph_service = GraphService()
-    graph_service.ingest_extraction(extraction_result, journal_entry_id, content, title)
+    with track_stage("graph"):
+        graph_service = GraphService()
+        graph_service.ingest_extraction(extraction_result, journal_entry_id, content, title, removed)
 
 
 @celery_app.task
@@ -48,12 +59,132 @@ def ingest_vectors_to_cosdata(extraction: dict, journal_entry_id: int, content:
     print(f"DEBUG: Starting ingest_vectors_to_cosdata for journal_entry_id: {journal_entry_id}")
     # Convert dict back to ExtractionResult
     extraction_result = ExtractionResult(**extraction)
+    with track_stage("vector"):
+        vector_service = VectorService()
+        vector_service.process_journal_entry(journal_entry_id, content, title, extraction_result, user_id)
+
+
+@celery_app.task
+def migrate_vectors_to_user_collections(user_id: Optional[str] = None):
+    """
+    Re-index journal entries into their owners' Cosdata collections and delete
+    their vectors from the shared collection used before per-user collections.
+
+    Args:
+        user_id: Migrate only this user's entries (all entries if None)
+    """
+    run_async(_migrate_vectors(user_id))
+
+
+@celery_app.task
+def rebuild_user_collection(user_id: str):
+    """
+    Delete a user's Cosdata collection and re-index all of their entries into
+    a new one, e.g. for collections created without TF-IDF support (before
+    hybrid search), which cannot gain it in place. Embeddings come from the
+    embedding cache, so only the Cosdata writes are repeated.
+
+    Args:
+        user_id: Owner of the collection
+    """
+    drop_user_collection(user_id)
+    run_async(_migrate_vectors(user_id))
+
+
+async def _migrate_vectors(user_id: Optional[str]):
+    stmt = select(JournalEntry.id).order_by(JournalEntry.id)
+    if user_id:
+        stmt = stmt.where(JournalEntry.user_id == user_id)
+    vector_service = VectorService()
+    # Only extraction counts are stored with the vectors; they are not needed here
+    extraction = ExtractionResult(metadata=ExtractionMetadata(), entities=[], relationships=[], todos=[], events=[])
+
+    async with AsyncSessionLocal() as db:
+        ids = list((await db.execute(stmt)).scalars().all())
+        for journal_entry_id in ids:
+            entry = await db.get(JournalEntry, journal_entry_id)
+            if entry is None:
+                continue
+            vector_service.process_journal_entry(entry.id, entry.content, entry.title, extraction, entry.user_id)
+            removed = vector_service.migrate_legacy_vectors(entry.id, entry.user_id)
+            logger.info(f"Migrated journal entry {entry.id} to its user collection ({removed} legacy vectors removed)")
+            db.expunge(entry)
+
+
+# Deleted (journal_entry_id, user_id) pairs waiting for cleanup, as JSON
+CLEANUP_QUEUE_KEY = "journal_cleanup:pending"
+# Set while a cleanup run is scheduled, so bursts of deletes share one run
+CLEANUP_SCHEDULED_KEY = "journal_cleanup:scheduled"
+
+
+async def queue_journal_cleanup(entries: List[Tuple[int, str]]) -> None:
+    """
+    Buffer deleted entries for removal of their graph nodes and vectors and
+    schedule a cleanup run unless one is already pending.
+
+    Args:
+        entries: (journal_entry_id, user_id) pairs
+    """
+    settings = get_settings()
+    valkey = get_async_valkey()
+    await valkey.rpush(CLEANUP_QUEUE_KEY, *(json.dumps([entry_id, user_id]) for entry_id, user_id in entries))
+    # Expires on its own in case the scheduled run is lost
+    delay = settings.journal_cleanup_delay_seconds
+    if await valkey.set(CLEANUP_SCHEDULED_KEY, "1", nx=True, ex=delay + 300):
+        cleanup_journal_entries.apply_async(countdown=delay)
+
+
+@celery_app.task
+def cleanup_journal_entries(entries: Optional[List[Tuple[int, str]]] = None):
+    """
+    Remove graph nodes and vectors of the buffered deleted journal entries,
+    `journal_cleanup_batch_size` entries per graph and Cosdata round trip.
+
+    Args:
+        entries: Extra (journal_entry_id, user_id) pairs to clean up (tasks enqueued before buffering)
+    """
+    settings = get_settings()
+    batch_size = settings.journal_cleanup_batch_size
+    valkey = get_valkey()
+    if entries:
+        valkey.rpush(CLEANUP_QUEUE_KEY, *(json.dumps(list(entry)) for entry in entries))
+    # Deletes from now on schedule a new run; pops are atomic, so runs may overlap
+    valkey.delete(CLEANUP_SCHEDULED_KEY)
+    graph_service = GraphService()
     vector_service = VectorService()
-    vector_service.process_journal_entry(journal_entry_id, content, title, extraction_result, user_id)
+    while True:
+        pipeline = valkey.pipeline(transaction=True)
+        pipeline.lrange(CLEANUP_QUEUE_KEY, 0, batch_size - 1)
+        pipeline.ltrim(CLEANUP_QUEUE_KEY, batch_size, -1)
+        raw, _ = pipeline.execute()
+        if not raw:
+            return
+        try:
+            _cleanup_batch(graph_service, vector_service, [tuple(json.loads(item)) for item in raw])
+        except Exception:
+            # Put the batch back and retry it later
+            valkey.rpush(CLEANUP_QUEUE_KEY, *raw)
+            delay = settings.journal_cleanup_delay_seconds
+            if valkey.set(CLEANUP_SCHEDULED_KEY, "1", nx=True, ex=delay + 300):
+                cleanup_journal_entries.apply_async(countdown=delay)
+            raise
+
+
+def _cleanup_batch(graph_service: GraphService, vector_service: VectorService,
+                   batch: List[Tuple[int, str]]) -> None:
+    graph_service.delete_entries([journal_entry_id for journal_entry_id, _ in batch])
+
+    by_user: Dict[str, List[int]] = {}
+    for journal_entry_id, user_id in batch:
+        by_user.setdefault(user_id, []).append(journal_entry_id)
+    for user_id, journal_entry_ids in by_user.items():
+        deleted = vector_service.delete_entries(user_id, journal_entry_ids)
+        logger.info(f"Cleaned up {len(journal_entry_ids)} deleted journal entries of user {user_id} ({deleted} vectors)")
 
 
 @celery_app.task
-def process_todos_from_extraction(extraction: dict, journal_entry_id: int, user_id: str):
+def process_todos_from_extraction(extraction: dict, journal_entry_id: int, user_id: str,
+                                  removed: Optional[List[str]] = None):
     """
     Process and create todos from extracted data.
 
@@ -61,47 +192,50 @@ def process_todos_from_extraction(extraction: dict, journal_entry_id: int, user_
         extraction: Dict representation of ExtractionResult
         journal_entry_id: ID of the journal entry
         user_id: User ID owning the entry
+        removed: Extraction ids of todos to delete; None replaces all extracted todos of the entry
     """
     print(f"DEBUG: Starting process_todos_from_extraction for journal_entry_id: {journal_entry_id}")
     # Convert dict back to ExtractionResult
     extraction_result = ExtractionResult(**extraction)
     
-    # Get database session
-    db = next(get_db())
-    todo_service = TodoService(db)
-    
-    try:
-        for todo in extraction_result.todos:
-            # Map priority string to enum
-            priority_str = todo.priority.lower() if todo.priority else "low"
-            if "must" in priority_str or "high" in priority_str:
-                priority = Priority.HIGH
-            elif "normal" in priority_str or "medium" in priority_str:
-                priority = Priority.MEDIUM
-            else:
-                priority = Priority.LOW
-            
-            # Parse due date
-            due_date = None
-            if todo.due:
-                try:
-                    due_date = datetime.fromisoformat(todo.due.replace("Z", "+00:00"))
-                except (ValueError, AttributeError):
-                    logger.warning(f"Could not parse due date: {todo.due}")
-            
-            # Create TodoCreate object
-            todo_create = TodoCreate(
-                task=todo.task,
-                priority=priority,
-                due_date=due_date,
-                journal_entry_id=journal_entry_id
-            )
-            
-            # Create the todo
-            created_todo = todo_service.create_todo(user_id, todo_create)
-            print(f"Created TODO: {created_todo.task} (ID: {created_todo.id})")
-    finally:
-        db.close()
+    with track_stage("todo"):
+        run_async(_create_todos(extraction_result, journal_entry_id, user_id, removed))
+
+
+async def _create_todos(extraction_result: ExtractionResult, journal_entry_id: int, user_id: str,
+                        removed: Optional[List[str]] = None):
+    """Sync the entry's extracted todo rows: delete removed and changed ones and create the changed ones, atomically."""
+    todos = []
+    for todo in extraction_result.todos:
+        # Map priority string to enum
+        priority_str = todo.priority.lower() if todo.priority else "low"
+        if "must" in priority_str or "high" in priority_str:
+            priority = Priority.HIGH
+        elif "normal" in priority_str or "medium" in priority_str:
+            priority = Priority.MEDIUM
+        else:
+            priority = Priority.LOW
+
+        # Parse due date
+        due_date = None
+        if todo.due:
+            try:
+                due_date = datetime.fromisoformat(todo.due.replace("Z", "+00:00"))
+            except (ValueError, AttributeError):
+                logger.warning(f"Could not parse due date: {todo.due}")
+
+        todos.append(TodoCreate(
+            task=todo.task,
+            priority=priority,
+            due_date=due_date,
+            journal_entry_id=journal_entry_id,
+            extraction_ref=todo.id,
+        ))
+
+    refs = None if removed is None else removed + [todo.extraction_ref for todo in todos]
+    async with AsyncSessionLocal() as db:
+        await TodoService(db).sync_extracted_todos(journal_entry_id, user_id, todos, refs)
+    logger.info(f"Synced {len(todos)} extracted todos of journal entry {journal_entry_id}")
 
 
 @celery_app.task
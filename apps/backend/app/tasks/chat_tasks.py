@@ -0,0 +1,39 @@
+# Tasks for server-side chat sessions
+import logging
+
+from app.celery import celery_app
+from app.core.utils import run_async
+from app.services.chat_service import ChatService
+from app.services.chat_session_service import ChatSessionStore
+
+logger = logging.getLogger(__name__)
+
+
+@celery_app.task
+def summarize_chat_session(user_id: str, session_id: str):
+    """
+    Fold the older turns of a chat session into its rolling summary.
+
+    Keeps the newest `chat_history_keep_tokens` worth of turns verbatim.
+    Only one worker compacts a session at a time.
+
+    Args:
+        user_id: User ID owning the session
+        session_id: Chat session ID
+    """
+    run_async(_summarize_chat_session(user_id, session_id))
+
+
+async def _summarize_chat_session(user_id: str, session_id: str):
+    store = ChatSessionStore()
+    if not await store.lock(user_id, session_id):
+        return
+    try:
+        batch = await store.compaction_batch(user_id, session_id)
+        if batch is None:
+            return
+        summary = await ChatService().summarize_history(user_id, batch)
+        await store.apply_compaction(user_id, session_id, summary, batch.turns)
+        logger.info(f"Compacted {len(batch.turns)} turns of chat session {session_id}")
+    finally:
+        await store.unlock(user_id, session_id)
@@ -0,0 +1,374 @@
+# Tasks driving the journal extraction pipeline
+import asyncio
+import logging
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+from celery import chord
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import undefer
+
+from app.celery import celery_app
+from app.core.config import get_settings
+from app.core.database import AsyncAuthSessionLocal, AsyncSessionLocal
+from app.core.extraction_segments import diff_extractions, merge_extractions, namespace_extraction, segment_hash, split_segments
+from app.core.pipeline_metrics import track_stage
+from app.core.prompts import PROMPT_VERSION
+from app.core.utils import format_local_date, run_async
+from app.models.journal_entry import JournalEntry, ProcessingStatus
+from app.schemas.extraction import ExtractionResult
+from app.services.ai_service import AIService
+from app.services.answer_cache_service import invalidate_user_answers
+from app.services.auth_service import AuthService
+from app.tasks.ai_tasks import (
+    ingest_extraction_to_graph,
+    ingest_vectors_to_cosdata,
+    process_calendar_events_from_extraction,
+    process_todos_from_extraction,
+    queue_journal_cleanup,
+)
+
+logger = logging.getLogger(__name__)
+
+
+@celery_app.task
+def extract_journal_entry(journal_entry_id: int, user_id: str, timezone: str = "UTC"):
+    """
+    Run LLM extraction for a journal entry and fan out to the ingestion tasks.
+
+    Drives ProcessingStatus: PENDING -> PROCESSING -> PROCESSED (once every
+    downstream task succeeded) or FAILED.
+
+    Args:
+        journal_entry_id: ID of the journal entry
+        user_id: User ID owning the entry
+        timezone: User's IANA timezone (e.g., 'Asia/Kolkata')
+    """
+    run_async(run_extraction_pipeline(journal_entry_id, user_id, timezone))
+
+
+@celery_app.task
+def mark_entry_status(journal_entry_id: int, status: str, user_id: Optional[str] = None,
+                      updated_at: Optional[str] = None):
+    """
+    Set the processing status of a journal entry.
+    Used as the chord callback (PROCESSED) and its error callback (FAILED).
+    If the entry was deleted while it was being ingested, its graph nodes and
+    vectors written in the meantime are cleaned up (requires `user_id`).
+    If `updated_at` (ISO string) is given and the entry has been edited since,
+    the status is left to the run processing the newer version.
+    """
+    seen = datetime.fromisoformat(updated_at) if updated_at else None
+    run_async(_settle_entry(journal_entry_id, ProcessingStatus(status), user_id, seen))
+
+
+async def run_extraction_pipeline(journal_entry_id: int, user_id: str, timezone: str = "UTC") -> bool:
+    """
+    Extract an entry and enqueue graph, vector, todo and calendar ingestion as a chord.
+
+    The entry is split into content-defined segments and only segments that
+    are not in the stored `extraction_segments` are sent to the LLM. When a
+    previous extraction exists, downstream tasks receive only what changed
+    plus the ids to remove. If the entry is edited while the run is in
+    flight, the run is dropped and the newer run takes over.
+
+    Returns:
+        True if extraction succeeded and the downstream tasks were enqueued
+    """
+    async with AsyncSessionLocal() as db:
+        entry = await db.get(JournalEntry, journal_entry_id, options=[undefer(JournalEntry.extraction_segments)])
+        if entry is None or entry.user_id != user_id:
+            logger.warning(f"Journal entry {journal_entry_id} not found for extraction")
+            return False
+
+        # Every later write is conditional on the entry still being this version
+        seen = entry.updated_at
+        entry.status = ProcessingStatus.PROCESSING
+        await db.commit()
+
+        stored = entry.extraction_segments or []
+        try:
+            current_date = format_local_date(entry.updated_at, timezone)
+            with track_stage("extraction"):
+                segments, changed_segments = await _extract_segments(entry, stored, current_date, timezone)
+        except Exception as e:
+            logger.error(f"Extraction failed for journal_entry_id {journal_entry_id}: {e}")
+            await _update_entry(db, journal_entry_id, seen, status=ProcessingStatus.FAILED)
+            return False
+
+        extraction = merge_extractions(ExtractionResult.model_validate(segment["result"]) for segment in segments)
+        removed = None
+        if stored:
+            previous = merge_extractions(ExtractionResult.model_validate(segment["result"]) for segment in stored)
+            extraction, removed = diff_extractions(previous, extraction)
+        logger.info(
+            f"Journal entry {journal_entry_id}: {len(changed_segments)} of {len(segments)} segments re-extracted"
+        )
+
+        if not await _update_entry(db, journal_entry_id, seen, extraction_segments=segments):
+            logger.info(f"Journal entry {journal_entry_id} changed during extraction, dropping this run")
+            return False
+        content, title = entry.content, entry.title
+
+    await _dispatch_ingestion(extraction, journal_entry_id, content, title, user_id, timezone, seen, removed=removed)
+    return True
+
+
+async def _extract_segments(entry: JournalEntry, stored: List[dict], current_date: str, timezone: str) -> Tuple[List[dict], List[dict]]:
+    """
+    Extract the segments of an entry that have no stored result.
+
+    Stored results are only reused when they were produced by the current
+    model and prompt; anything else counts as changed.
+
+    Returns:
+        Tuple of (segments, changed): every segment as {"hash", "version",
+        "result"} in document order, and the newly extracted ones as
+        {"hash", "text"}.
+    """
+    settings = get_settings()
+    texts = split_segments(entry.content, settings.extraction_segment_max_chars, settings.extraction_segment_boundary_modulus)
+    hashes = [segment_hash(text) for text in texts]
+    version = f"{settings.gemini_model}:{PROMPT_VERSION}"
+    known = {segment["hash"]: segment["result"] for segment in stored if segment.get("version") == version}
+    pending = {h: text for h, text in zip(hashes, texts) if h not in known}
+
+    ai_service = AIService()
+    results = await asyncio.gather(*(
+        ai_service.extract_content(text, entry.user_id, current_date, timezone, reference=f"journal_entry:{entry.id}#{h}")
+        for h, text in pending.items()
+    ))
+    fresh = {h: namespace_extraction(result, f"s{h}").model_dump() for h, result in zip(pending, results)}
+
+    segments = [{"hash": h, "version": version, "result": known[h] if h in known else fresh[h]} for h in hashes]
+    changed = [{"hash": h, "text": text} for h, text in pending.items()]
+    return segments, changed
+
+
+@celery_app.task
+def reprocess_entries_batch(entry_ids: Optional[List[int]] = None, user_id: Optional[str] = None, timezone: str = "UTC"):
+    """
+    Re-extract many entries through Gemini batch jobs (e.g. after a prompt or model change).
+
+    Entries are selected by ID, by user, or all entries when neither is given,
+    and submitted in jobs of at most `gemini_batch_max_requests`. Each job is
+    followed by `poll_extraction_batch`, which fans results into the usual
+    ingestion tasks.
+
+    Args:
+        entry_ids: Specific journal entry IDs to reprocess
+        user_id: Reprocess all entries of this user
+        timezone: IANA timezone used for relative date context
+    """
+    run_async(_reprocess_entries_batch(entry_ids, user_id, timezone))
+
+
+@celery_app.task(bind=True, max_retries=None)
+def poll_extraction_batch(self, batch_name: str, entries: List[Tuple[int, str]], timezone: str = "UTC"):
+    """
+    Poll a Gemini batch job and dispatch ingestion once it completes.
+
+    Args:
+        batch_name: Gemini batch job name
+        entries: (journal_entry_id, updated_at ISO string) pairs in submission order
+        timezone: IANA timezone used when the batch was submitted
+    """
+    done = run_async(_collect_extraction_batch(batch_name, entries, timezone))
+    if not done:
+        raise self.retry(countdown=get_settings().gemini_batch_poll_seconds)
+
+
+async def _reprocess_entries_batch(entry_ids: Optional[List[int]], user_id: Optional[str], timezone: str):
+    settings = get_settings()
+    ai_service = AIService()
+
+    stmt = select(JournalEntry.id).order_by(JournalEntry.id)
+    if entry_ids:
+        stmt = stmt.where(JournalEntry.id.in_(entry_ids))
+    if user_id:
+        stmt = stmt.where(JournalEntry.user_id == user_id)
+
+    async with AsyncSessionLocal() as db:
+        ids = list((await db.execute(stmt)).scalars().all())
+        size = settings.gemini_batch_max_requests
+
+        for start in range(0, len(ids), size):
+            result = await db.execute(
+                select(JournalEntry)
+                .where(JournalEntry.id.in_(ids[start:start + size]))
+                .order_by(JournalEntry.id)
+            )
+            entries = list(result.scalars().all())
+            # Long entries need several section calls, which a batch request cannot express
+            long_entries = [entry for entry in entries if len(entry.content) > settings.extraction_section_max_chars]
+            if long_entries:
+                # Drop the stored segments so the pipeline re-extracts every one of them
+                for entry in long_entries:
+                    entry.extraction_segments = None
+                await db.commit()
+            for entry in long_entries:
+                extract_journal_entry.delay(entry.id, entry.user_id, timezone)
+            entries = [entry for entry in entries if entry not in long_entries]
+            if not entries:
+                continue
+
+            requests = [_batch_request(entry, timezone) for entry in entries]
+            batch_name = await ai_service.submit_extraction_batch(requests)
+            logger.info(f"Submitted extraction batch {batch_name} with {len(entries)} entries")
+
+            for entry in entries:
+                entry.status = ProcessingStatus.PROCESSING
+            await db.commit()
+
+            poll_extraction_batch.apply_async(
+                (batch_name, [(entry.id, entry.updated_at.isoformat()) for entry in entries], timezone),
+                countdown=settings.gemini_batch_poll_seconds,
+            )
+
+
+async def _collect_extraction_batch(batch_name: str, entries: List[Tuple[int, str]], timezone: str) -> bool:
+    """
+    Returns:
+        False while the batch is still running, True once it has been handled
+    """
+    ids = [entry_id for entry_id, _ in entries]
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(select(JournalEntry).where(JournalEntry.id.in_(ids)))
+        by_id = {entry.id: entry for entry in result.scalars().all()}
+
+        # Entries edited or deleted since submission are handled by their own pipeline run
+        submitted: List[Optional[JournalEntry]] = []
+        for entry_id, updated_at in entries:
+            entry = by_id.get(entry_id)
+            if entry is not None and entry.updated_at != datetime.fromisoformat(updated_at):
+                entry = None
+            submitted.append(entry)
+        requests = [_batch_request(entry, timezone) if entry else None for entry in submitted]
+
+        try:
+            results = await AIService().get_extraction_batch_results(batch_name, requests)
+        except RuntimeError as e:
+            logger.error(str(e))
+            results = [None] * len(entries)
+        if results is None:
+            return False
+
+        dispatch = []
+        for entry, extraction in zip(submitted, results):
+            if entry is None:
+                continue
+            if extraction is None:
+                entry.status = ProcessingStatus.FAILED
+            else:
+                # Whole-entry results replace any per-segment state
+                entry.extraction_segments = None
+                dispatch.append((entry.id, entry.content, entry.title, entry.user_id, entry.updated_at, extraction))
+        await db.commit()
+
+    for journal_entry_id, content, title, owner_id, seen, extraction in dispatch:
+        await _dispatch_ingestion(extraction, journal_entry_id, content, title, owner_id, timezone, seen)
+    logger.info(f"Extraction batch {batch_name} done: {len(dispatch)}/{len(entries)} entries dispatched")
+    return True
+
+
+def _batch_request(entry: JournalEntry, timezone: str) -> dict:
+    return {
+        "content": entry.content,
+        "current_date": format_local_date(entry.updated_at, timezone),
+        "timezone": timezone,
+        "user_id": entry.user_id,
+    }
+
+
+async def _dispatch_ingestion(extraction: ExtractionResult, journal_entry_id: int, content: str,
+                              title: Optional[str], user_id: str, timezone: str, updated_at: datetime,
+                              removed: Optional[dict] = None) -> None:
+    """
+    Enqueue graph, vector, todo and calendar ingestion as a chord that settles the entry status.
+
+    Args:
+        extraction: Items to write (everything, or only what changed when `removed` is given)
+        updated_at: Version of the entry that was extracted
+        removed: Ids to delete downstream; None replaces everything previously ingested
+    """
+    header = [
+        ingest_extraction_to_graph.si(extraction.model_dump(), journal_entry_id, content, title, removed),
+        ingest_vectors_to_cosdata.si(extraction.model_dump(), journal_entry_id, content, title, user_id),
+        process_todos_from_extraction.si(
+            extraction.model_dump(), journal_entry_id, user_id, removed["todos"] if removed is not None else None,
+        ),
+    ]
+    calendar_task = await _calendar_signature(extraction, journal_entry_id, user_id, timezone)
+    if calendar_task is not None:
+        header.append(calendar_task)
+
+    version = updated_at.isoformat()
+    chord(header)(
+        mark_entry_status.si(journal_entry_id, ProcessingStatus.PROCESSED.value, user_id, version).on_error(
+            mark_entry_status.si(journal_entry_id, ProcessingStatus.FAILED.value, user_id, version)
+        )
+    )
+
+
+async def _calendar_signature(extraction: ExtractionResult, journal_entry_id: int, user_id: str, timezone: str):
+    """Build the calendar sync task with the user's Google OAuth tokens, if connected."""
+    if not any(event.should_sync_calendar for event in extraction.events):
+        return None
+
+    async with AsyncAuthSessionLocal() as auth_db:
+        user_data = await AuthService(auth_db).get_user(user_id)
+
+    if not user_data or not user_data.get("google_access_token"):
+        return None
+
+    settings = get_settings()
+    return process_calendar_events_from_extraction.si(
+        extraction.model_dump(),
+        journal_entry_id,
+        user_id,
+        user_data["google_access_token"],
+        user_data["google_refresh_token"],
+        str(user_data["google_token_expires_at"]) if user_data.get("google_token_expires_at") else None,
+        settings.google_client_id,
+        settings.google_client_secret,
+        timezone,  # Pass user's timezone to calendar task
+    )
+
+
+async def _settle_entry(journal_entry_id: int, status: ProcessingStatus, user_id: Optional[str] = None,
+                        seen: Optional[datetime] = None) -> None:
+    async with AsyncSessionLocal() as db:
+        entry = await db.get(JournalEntry, journal_entry_id)
+        if entry is None:
+            if user_id is not None:
+                # Deleted mid-pipeline: ingestion may have re-created what the delete cleaned up
+                await queue_journal_cleanup([(journal_entry_id, user_id)])
+            return
+        owner_id = entry.user_id
+
+        values = {"status": status}
+        if status == ProcessingStatus.FAILED:
+            # Downstream stores may be partially updated; the next run must rebuild them
+            values["extraction_segments"] = None
+        if not await _update_entry(db, journal_entry_id, seen, **values):
+            logger.info(f"Journal entry {journal_entry_id} was edited during ingestion, leaving its status to the newer run")
+
+    # Ingestion changed what chat can retrieve for this user
+    if status == ProcessingStatus.PROCESSED:
+        await invalidate_user_answers(owner_id)
+
+
+async def _update_entry(db: AsyncSession, journal_entry_id: int, seen: Optional[datetime], **values) -> bool:
+    """
+    Update an entry unless it was edited after `seen` (its `updated_at` when read).
+
+    Returns:
+        True if the row was updated
+    """
+    stmt = update(JournalEntry).where(JournalEntry.id == journal_entry_id)
+    if seen is not None:
+        stmt = stmt.where(JournalEntry.updated_at == seen)
+    result = await db.execute(stmt.values(**values).execution_options(synchronize_session=False))
+    await db.commit()
+    return result.rowcount > 0
@@ -0,0 +1,55 @@
+# Tasks for bulk journal imports
+import asyncio
+import logging
+from typing import List
+
+from app.celery import celery_app
+from app.core.config import get_settings
+from app.core.utils import run_async
+from app.services.import_service import ImportProgress
+from app.tasks.extraction_tasks import run_extraction_pipeline
+
+logger = logging.getLogger(__name__)
+
+
+@celery_app.task
+def extract_import_batch(job_id: str, entry_ids: List[int], user_id: str, timezone: str = "UTC", is_last: bool = False,
+                         final_status: str = "completed"):
+    """
+    Run extraction and downstream ingestion for one batch of imported entries.
+
+    Batches of a job are chained, so at most `import_extraction_concurrency`
+    extractions run for a job at any time.
+
+    Args:
+        job_id: Import job ID used for progress reporting
+        entry_ids: IDs of the imported journal entries in this batch
+        user_id: User ID owning the entries
+        timezone: User's IANA timezone
+        is_last: Whether this is the final batch of the job
+        final_status: Job status set after the final batch ("partial" if the upload failed midway)
+    """
+    run_async(_extract_import_batch(job_id, entry_ids, user_id, timezone, is_last, final_status))
+
+
+async def _extract_import_batch(job_id: str, entry_ids: List[int], user_id: str, timezone: str, is_last: bool,
+                                final_status: str):
+    settings = get_settings()
+    progress = ImportProgress()
+    await progress.set_status(job_id, "processing")
+
+    semaphore = asyncio.Semaphore(settings.import_extraction_concurrency)
+
+    async def process(entry_id: int):
+        async with semaphore:
+            try:
+                extracted = await run_extraction_pipeline(entry_id, user_id, timezone)
+            except Exception as e:
+                logger.error(f"Import extraction failed for journal_entry_id {entry_id}: {e}")
+                extracted = False
+            await progress.incr(job_id, "extracted" if extracted else "failed")
+
+    await asyncio.gather(*(process(entry_id) for entry_id in entry_ids))
+
+    if is_last:
+        await progress.set_status(job_id, final_status)
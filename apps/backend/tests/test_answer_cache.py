@@ -0,0 +1,87 @@
+import asyncio
+from datetime import datetime
+
+import fakeredis
+import pytest
+
+from app.core.config import get_settings
+from app.core.utils import local_date
+from app.services import answer_cache_service
+from app.services.answer_cache_service import SemanticAnswerCache, invalidate_user_answers
+
+DAY = "2026-03-02"
+
+
+@pytest.fixture
+def valkey(monkeypatch):
+    valkey = fakeredis.FakeAsyncRedis()
+    monkeypatch.setattr(answer_cache_service, "get_async_valkey", lambda: valkey)
+    settings = get_settings()
+    monkeypatch.setattr(settings, "chat_answer_cache_threshold", 0.95)
+    monkeypatch.setattr(settings, "chat_answer_cache_max_entries", 3)
+    monkeypatch.setattr(settings, "chat_answer_cache_ttl_seconds", 3600)
+    return valkey
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def test_similar_question_hits_and_dissimilar_misses(valkey):
+    cache = SemanticAnswerCache()
+    run(cache.store("u1", 0, DAY, [1.0, 0.0], "answer", latency=2.0))
+
+    # Scale does not matter, only the angle (cosine 0.98 and 0.71)
+    assert run(cache.lookup("u1", 0, DAY, [5.0, 1.0])) == "answer"
+    assert run(cache.lookup("u1", 0, DAY, [1.0, 1.0])) is None
+    assert (cache.hits, cache.misses, cache.stores) == (1, 1, 1)
+
+
+def test_most_similar_answer_wins(valkey):
+    cache = SemanticAnswerCache()
+    run(cache.store("u1", 0, DAY, [1.0, 0.1], "close", latency=1.0))
+    run(cache.store("u1", 0, DAY, [1.0, 0.0], "closest", latency=1.0))
+    run(cache.store("u1", 0, DAY, [1.0, 0.2], "newest", latency=1.0))
+
+    assert run(cache.lookup("u1", 0, DAY, [1.0, 0.0])) == "closest"
+
+
+def test_answers_are_scoped_to_user_generation_and_day(valkey):
+    cache = SemanticAnswerCache()
+    run(cache.store("u1", 0, DAY, [1.0, 0.0], "answer", latency=1.0))
+
+    assert run(cache.lookup("u2", 0, DAY, [1.0, 0.0])) is None
+    assert run(cache.lookup("u1", 1, DAY, [1.0, 0.0])) is None
+    assert run(cache.lookup("u1", 0, "2026-03-03", [1.0, 0.0])) is None
+
+
+def test_invalidation_orphans_cached_answers(valkey):
+    cache = SemanticAnswerCache()
+    generation = run(cache.generation("u1"))
+    run(cache.store("u1", generation, DAY, [1.0, 0.0], "answer", latency=1.0))
+
+    run(invalidate_user_answers("u1"))
+
+    assert run(cache.generation("u1")) == generation + 1
+    assert run(cache.lookup("u1", generation + 1, DAY, [1.0, 0.0])) is None
+
+
+def test_store_keeps_the_newest_entries_and_sets_a_ttl(valkey):
+    cache = SemanticAnswerCache()
+    for index in range(5):
+        run(cache.store("u1", 0, DAY, [1.0, float(index)], f"answer {index}", latency=1.0))
+
+    key = SemanticAnswerCache._entries_key("u1", 0, DAY)
+    assert run(valkey.llen(key)) == 3
+    assert 0 < run(valkey.ttl(key)) <= 3600
+    assert run(cache.lookup("u1", 0, DAY, [1.0, 0.0])) is None
+    assert run(cache.lookup("u1", 0, DAY, [1.0, 4.0])) == "answer 4"
+
+
+def test_local_date_follows_the_timezone():
+    late_evening_utc = datetime(2026, 3, 2, 22, 30)
+
+    assert local_date(late_evening_utc).isoformat() == "2026-03-02"
+    assert local_date(late_evening_utc, "Asia/Kolkata").isoformat() == "2026-03-03"
+    assert local_date(late_evening_utc, "America/New_York").isoformat() == "2026-03-02"
+    assert local_date(late_evening_utc, "Not/AZone").isoformat() == "2026-03-02"
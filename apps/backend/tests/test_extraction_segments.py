@@ -0,0 +1,140 @@
+from app.core.extraction_segments import diff_extractions, merge_extractions, segment_hash, split_segments
+from app.schemas.extraction import Entity, Event, ExtractionMetadata, ExtractionResult, Relationship, Todo
+
+
+def result(entities=(), relationships=(), todos=(), events=()) -> ExtractionResult:
+    return ExtractionResult(
+        metadata=ExtractionMetadata(),
+        entities=list(entities),
+        relationships=list(relationships),
+        todos=list(todos),
+        events=list(events),
+    )
+
+
+def paragraphs(count: int) -> list:
+    return [f"Paragraph {index} about the day, with some words in it." for index in range(count)]
+
+
+def test_segment_hash_ignores_whitespace():
+    assert segment_hash("Met  Alice\nat the cafe.") == segment_hash(" Met Alice at  the cafe. ")
+    assert segment_hash("Met Alice.") != segment_hash("Met Bob.")
+
+
+def test_split_segments_keeps_every_paragraph_in_order():
+    texts = paragraphs(40)
+    segments = split_segments("\n\n".join(texts), max_chars=10_000, boundary_modulus=4)
+
+    assert "\n\n".join(segments).split("\n\n") == texts
+
+
+def test_split_segments_respects_max_chars():
+    texts = paragraphs(40)
+    segments = split_segments("\n\n".join(texts), max_chars=200, boundary_modulus=1_000_000)
+
+    assert len(segments) > 1
+    assert all(len(segment) <= 200 for segment in segments)
+
+
+def test_split_segments_edit_only_changes_nearby_segments():
+    texts = paragraphs(60)
+    before = split_segments("\n\n".join(texts), max_chars=10_000, boundary_modulus=3)
+    texts[30] = "A completely rewritten paragraph."
+    after = split_segments("\n\n".join(texts), max_chars=10_000, boundary_modulus=3)
+
+    changed = set(after) - set(before)
+    assert len(changed) <= 2
+    assert len(set(after) & set(before)) >= len(after) - 2
+
+
+def test_merge_extractions_collapses_entities_and_remaps_references():
+    first = result(
+        entities=[Entity(id="a_e1", name="Alice", normalized_name="alice", type="person")],
+        todos=[Todo(id="a_t1", task="Call Alice", priority="high", related_entities=["a_e1"])],
+    )
+    second = result(
+        entities=[
+            Entity(id="b_e1", name="alice", type="Person", attributes={"role": "friend"}),
+            Entity(id="b_e2", name="Berlin", type="location"),
+        ],
+        relationships=[Relationship(source="b_e1", type="visited", target="b_e2", description="Trip")],
+        events=[Event(id="b_ev1", title="Trip", related_entities=["b_e1", "b_e2"])],
+    )
+
+    merged = merge_extractions([first, second])
+
+    assert [entity.id for entity in merged.entities] == ["a_e1", "b_e2"]
+    assert merged.entities[0].attributes == {"role": "friend"}
+    assert (merged.relationships[0].source, merged.relationships[0].target) == ("a_e1", "b_e2")
+    assert merged.events[0].related_entities == ["a_e1", "b_e2"]
+
+
+def test_merge_extractions_dedupes_relationships_todos_and_events():
+    rel = Relationship(source="e1", type="Knows", target="e2", description="Old friends")
+    first = result(
+        relationships=[rel],
+        todos=[Todo(id="t1", task="Buy  milk", priority="normal")],
+        events=[Event(id="ev1", title="Dinner", datetime="2026-01-02T19:00:00")],
+    )
+    second = result(
+        relationships=[rel.model_copy(update={"type": "knows"})],
+        todos=[Todo(id="t2", task="buy milk", priority="high")],
+        events=[
+            Event(id="ev2", title="dinner", datetime="2026-01-02T19:00:00"),
+            Event(id="ev3", title="Dinner", datetime="2026-01-03T19:00:00"),
+        ],
+    )
+
+    merged = merge_extractions([first, second])
+
+    assert [r.type for r in merged.relationships] == ["Knows"]
+    assert [todo.id for todo in merged.todos] == ["t1"]
+    assert [event.id for event in merged.events] == ["ev1", "ev3"]
+
+
+def test_diff_extractions_of_identical_results_is_empty():
+    extraction = result(
+        entities=[Entity(id="e1", name="Alice", type="person")],
+        todos=[Todo(id="t1", task="Call Alice", priority="high")],
+    )
+
+    changed, removed = diff_extractions(extraction, extraction.model_copy(deep=True))
+
+    assert changed.entities == [] and changed.todos == [] and changed.relationships == []
+    assert removed == {"entities": [], "todos": [], "events": [], "relationships": []}
+
+
+def test_diff_extractions_reports_changed_and_removed_items():
+    old = result(
+        entities=[Entity(id="e1", name="Alice", type="person"), Entity(id="e2", name="Bob", type="person")],
+        relationships=[Relationship(source="e1", type="knows", target="e2", description="Friends")],
+        todos=[Todo(id="t1", task="Call Bob", priority="high")],
+        events=[Event(id="ev1", title="Lunch")],
+    )
+    new = result(
+        entities=[Entity(id="e1", name="Alice", type="person", attributes={"mood": "happy"})],
+        todos=[Todo(id="t2", task="Write to Alice", priority="normal")],
+        events=[Event(id="ev1", title="Lunch")],
+    )
+
+    changed, removed = diff_extractions(old, new)
+
+    assert [entity.id for entity in changed.entities] == ["e1"]
+    assert [todo.id for todo in changed.todos] == ["t2"]
+    assert changed.events == []
+    assert removed == {
+        "entities": ["e2"],
+        "todos": ["t1"],
+        "events": [],
+        "relationships": [["e1", "knows", "e2"]],
+    }
+
+
+def test_diff_extractions_compares_relationship_types_case_insensitively():
+    old = result(relationships=[Relationship(source="e1", type="Knows", target="e2", description="Friends")])
+    new = result(relationships=[Relationship(source="e1", type="knows", target="e2", description="Friends")])
+
+    changed, removed = diff_extractions(old, new)
+
+    assert removed["relationships"] == []
+    assert [rel.type for rel in changed.relationships] == ["knows"]
@@ -0,0 +1,189 @@
+import asyncio
+import io
+import json
+import zipfile
+from types import SimpleNamespace
+
+import fakeredis
+import pytest
+
+from app.core.config import get_settings
+from app.services import import_service
+from app.services.import_service import JournalImportService
+
+MAX_CHARS = 100
+# Lines may be up to import_max_entry_chars * 4 + 1024 bytes
+MAX_LINE = MAX_CHARS * 4 + 1024
+
+
+class FakeResult:
+    def __init__(self, ids):
+        self.ids = ids
+
+    def scalars(self):
+        return SimpleNamespace(all=lambda: self.ids)
+
+
+class FakeDB:
+    """Records batch inserts; ids are assigned sequentially."""
+
+    def __init__(self):
+        self.batches = []
+        self.commits = 0
+        self.rollbacks = 0
+
+    async def execute(self, statement, rows):
+        self.batches.append([dict(row) for row in rows])
+        start = sum(len(batch) for batch in self.batches[:-1]) + 1
+        return FakeResult(list(range(start, start + len(rows))))
+
+    async def commit(self):
+        self.commits += 1
+
+    async def rollback(self):
+        self.rollbacks += 1
+
+
+@pytest.fixture
+def settings(monkeypatch):
+    settings = get_settings()
+    monkeypatch.setattr(settings, "import_max_entry_chars", MAX_CHARS)
+    monkeypatch.setattr(settings, "import_batch_size", 2)
+    monkeypatch.setattr(settings, "import_max_decompressed_bytes", 10_000)
+    return settings
+
+
+@pytest.fixture
+def service(monkeypatch, settings):
+    valkey = fakeredis.FakeAsyncRedis()
+    monkeypatch.setattr(import_service, "get_async_valkey", lambda: valkey)
+    service = JournalImportService(FakeDB())
+    # Extraction is queued through Celery; only the final status matters here
+    finished = []
+
+    async def finish(job_id, user_id, entry_ids, timezone, final_status="completed"):
+        finished.append((list(entry_ids), final_status))
+        await service.progress.set_status(job_id, final_status)
+        return await service.progress.get(job_id, user_id)
+
+    monkeypatch.setattr(service, "_finish", finish)
+    service.finished = finished
+    return service
+
+
+async def stream(*chunks):
+    for chunk in chunks:
+        yield chunk
+
+
+def lines(service, *chunks):
+    async def collect():
+        return [line async for line in service._iter_lines(stream(*chunks))]
+    return asyncio.run(collect())
+
+
+def record(content="Hello", **fields):
+    return json.dumps({"content": content, **fields}).encode()
+
+
+def make_zip(members):
+    data = io.BytesIO()
+    with zipfile.ZipFile(data, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+        for name, content in members.items():
+            archive.writestr(name, content)
+    return zipfile.ZipFile(io.BytesIO(data.getvalue()))
+
+
+def test_lines_split_across_chunks(service):
+    assert lines(service, b"a\nb", b"c\n", b"d") == [b"a", b"bc", b"d"]
+
+
+def test_oversized_line_inside_a_chunk_is_dropped(service):
+    oversized = b"x" * (MAX_LINE + 1)
+
+    assert lines(service, b"a\n" + oversized + b"\nb\n") == [b"a", None, b"b"]
+    assert lines(service, b"x" * MAX_LINE + b"\n") == [b"x" * MAX_LINE]
+
+
+def test_oversized_line_spanning_chunks_is_dropped_while_streaming(service):
+    chunk = b"x" * (MAX_LINE // 2 + 1)
+
+    assert lines(service, b"a\n" + chunk, chunk, chunk, b"x\nb") == [b"a", None, b"b"]
+    assert lines(service, chunk, chunk, chunk) == [None]
+
+
+def test_zip_records_by_member_type(service):
+    archive = make_zip({
+        "entries.ndjson": record("one") + b"\n" + record("two") + b"\n",
+        "single.json": record("three"),
+        "notes/day.md": "four",
+        "__MACOSX/._day.md": "metadata",
+        ".hidden.txt": "hidden",
+        "image.png": "binary",
+    })
+
+    records = list(service._iter_zip_records(archive))
+
+    assert records == [record("one") + b"\n", record("two") + b"\n", record("three"), {"title": "day", "content": "four"}]
+
+
+def test_oversized_zip_records_are_yielded_as_none(service):
+    archive = make_zip({
+        "entries.jsonl": b"x" * (MAX_LINE + 5) + b"\n" + record("after") + b"\n",
+        "big.txt": "y" * (MAX_CHARS * 4 + 1),
+    })
+
+    assert list(service._iter_zip_records(archive)) == [None, record("after") + b"\n", None]
+
+
+def test_zip_decompressed_size_is_capped(service, settings):
+    settings.import_max_decompressed_bytes = 1000
+    # Highly compressible, so the archive itself stays small
+    archive = make_zip({"entries.ndjson": (record("z" * 50) + b"\n") * 100})
+
+    with pytest.raises(ValueError, match="decompressed size"):
+        list(service._iter_zip_records(archive))
+
+
+def test_ndjson_import_skips_malformed_records(service):
+    body = b"\n".join([
+        record("first", title="T", created_at="2021-03-04T10:00:00+02:00"),
+        b"{not json",
+        b"[1, 2]",
+        record("  "),
+        record("late", created_at="yesterday"),
+        record("x" * (MAX_CHARS + 1)),
+        b"",
+        record("second"),
+        record("third"),
+    ])
+
+    status = asyncio.run(service.import_ndjson("u1", stream(body)))
+
+    assert (status.inserted, status.errors, status.status) == (3, 5, "completed")
+    assert [len(batch) for batch in service.db.batches] == [2, 1]
+    first = service.db.batches[0][0]
+    assert (first["user_id"], first["title"], first["content"]) == ("u1", "T", "first")
+    assert first["created_at"].isoformat() == "2021-03-04T08:00:00"
+    assert service.finished == [([1, 2, 3], "completed")]
+
+
+def test_failed_upload_settles_the_job_as_partial(service):
+    async def broken():
+        yield record("one") + b"\n" + record("two") + b"\n" + record("three") + b"\n"
+        raise ConnectionError("client went away")
+
+    with pytest.raises(ConnectionError):
+        asyncio.run(service.import_ndjson("u1", broken()))
+
+    # The full first batch was committed; the pending one is rolled back
+    assert service.db.rollbacks == 1
+    assert service.finished == [([1, 2], "partial")]
+
+
+def test_zip_import_over_the_upload_limit_fails(service, settings):
+    settings.import_max_zip_bytes = 10
+
+    with pytest.raises(ValueError, match="maximum upload size"):
+        asyncio.run(service.import_zip("u1", stream(b"x" * 6, b"x" * 6)))
+    assert service.finished == [([], "failed")]
@@ -0,0 +1,85 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from app.core import llm_usage
+from app.core.config import get_settings
+from app.core.llm_usage import LLM_LATENCY, LLMCall, record_llm_calls
+
+
+class FakeSession:
+    statements = []
+    commits = 0
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return False
+
+    async def execute(self, statement):
+        FakeSession.statements.append(statement)
+
+    async def commit(self):
+        FakeSession.commits += 1
+
+
+@pytest.fixture
+def session(monkeypatch):
+    FakeSession.statements, FakeSession.commits = [], 0
+    monkeypatch.setattr(llm_usage, "AsyncSessionLocal", FakeSession)
+    monkeypatch.setattr(get_settings(), "llm_usage_rollup_enabled", True)
+    return FakeSession
+
+
+def call(user_id, prompt, output, operation="extraction_batch"):
+    call = LLMCall(operation, user_id, "test-model")
+    call.observe(SimpleNamespace(usage_metadata=SimpleNamespace(
+        prompt_token_count=prompt, cached_content_token_count=None,
+        candidates_token_count=output, total_token_count=prompt + output,
+    )))
+    return call
+
+
+def latency_samples(operation):
+    return sum(
+        sample.value for metric in LLM_LATENCY.collect() for sample in metric.samples
+        if sample.name.endswith("_count") and sample.labels["operation"] == operation
+    )
+
+
+def test_calls_are_aggregated_into_one_upsert(session):
+    calls = [
+        (call("u1", 100, 10), "success"),
+        (call("u1", 200, 20), "error"),
+        (call("u2", 50, 5), "success"),
+    ]
+
+    asyncio.run(record_llm_calls(calls))
+
+    assert len(session.statements) == 1 and session.commits == 1
+    rows = session.statements[0].compile(dialect=postgresql.dialect()).params
+    assert {key: value for key, value in rows.items() if key.endswith("_m0")} == {
+        "day_m0": rows["day_m0"], "user_id_m0": "u1", "operation_m0": "extraction_batch", "model_m0": "test-model",
+        "calls_m0": 2, "failures_m0": 1, "prompt_tokens_m0": 300, "cached_tokens_m0": 0,
+        "output_tokens_m0": 30, "total_tokens_m0": 330, "latency_ms_m0": 0,
+    }
+    assert (rows["user_id_m1"], rows["calls_m1"], rows["total_tokens_m1"]) == ("u2", 1, 55)
+
+
+def test_unmeasured_latency_is_not_observed(session):
+    before = latency_samples("latency_test_batch")
+
+    asyncio.run(record_llm_calls([(call("u1", 1, 1, operation="latency_test_batch"), "success")]))
+    assert latency_samples("latency_test_batch") == before
+
+    asyncio.run(record_llm_calls([(call("u1", 1, 1, operation="latency_test_batch"), "success")], latency=1.5))
+    assert latency_samples("latency_test_batch") == before + 1
+
+
+def test_nothing_to_record(session):
+    asyncio.run(record_llm_calls([]))
+
+    assert session.statements == []
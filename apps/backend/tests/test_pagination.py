@@ -0,0 +1,20 @@
+from datetime import datetime
+
+import pytest
+
+from app.core.pagination import decode_cursor, encode_cursor
+
+
+def test_cursor_round_trip():
+    created_at = datetime(2026, 3, 4, 10, 30, 15, 123456)
+
+    cursor = encode_cursor(created_at, 42)
+
+    assert decode_cursor(cursor) == (created_at, 42)
+    assert "=" not in cursor
+
+
+@pytest.mark.parametrize("cursor", ["", "not-a-cursor", "eyJjIjoxfQ", "eyJpIjo1fQ"])
+def test_decode_cursor_rejects_malformed_tokens(cursor):
+    with pytest.raises(ValueError):
+        decode_cursor(cursor)
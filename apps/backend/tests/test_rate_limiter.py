@@ -0,0 +1,271 @@
+import asyncio
+import time
+from types import SimpleNamespace
+
+import fakeredis
+import pytest
+from google.genai import errors
+from valkey.exceptions import ValkeyError
+
+from app.core import rate_limiter
+from app.core.config import get_settings
+from app.core.rate_limiter import ACQUIRE_SCRIPT, GeminiRateLimiter, RateLimitTimeout
+
+MODEL = "test-model"
+KEYS = [f"gemini_rate:{MODEL}:rpm", f"gemini_rate:{MODEL}:tpm",
+        f"gemini_rate:{MODEL}:inflight", f"gemini_rate:{MODEL}:cooldown"]
+
+
+class Clock:
+    """Wall clock seen by the fake Valkey (TIME and key expiry)."""
+
+    def __init__(self):
+        self.now = 1_700_000_000.0
+
+    def __call__(self):
+        return self.now
+
+    def advance(self, seconds):
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(time, "time", clock)
+    return clock
+
+
+@pytest.fixture
+def valkey(monkeypatch, clock):
+    valkey = fakeredis.FakeAsyncRedis()
+    monkeypatch.setattr(rate_limiter, "get_async_valkey", lambda: valkey)
+    return valkey
+
+
+@pytest.fixture
+def limits(monkeypatch):
+    settings = get_settings()
+
+    def set_limits(rpm=1000, tpm=1_000_000, concurrency=32, lease_seconds=120):
+        monkeypatch.setattr(settings, "gemini_rpm_limit", rpm)
+        monkeypatch.setattr(settings, "gemini_tpm_limit", tpm)
+        monkeypatch.setattr(settings, "gemini_max_concurrency", concurrency)
+        monkeypatch.setattr(settings, "gemini_call_lease_seconds", lease_seconds)
+        monkeypatch.setattr(settings, "gemini_model", MODEL)
+
+    set_limits()
+    return set_limits
+
+
+@pytest.fixture
+def limiter(monkeypatch, clock):
+    # Deadlines follow the fake clock too
+    monkeypatch.setattr(rate_limiter, "time", SimpleNamespace(monotonic=clock, time=clock))
+    limiter = GeminiRateLimiter()
+    slept = []
+
+    async def sleep(delay):
+        # No jitter and no real waiting: time passes on the fake clock only
+        slept.append(delay)
+        limiter.wait_seconds += delay
+        clock.advance(delay)
+
+    monkeypatch.setattr(limiter, "_sleep", sleep)
+    limiter.slept = slept
+    return limiter
+
+
+def acquire(valkey, member="m", rpm=1000, tpm=1_000_000, tokens=1, concurrency=32, lease_ms=120_000):
+    """Run the admission script once; returns the suggested wait in ms (0 when admitted)."""
+    return asyncio.run(valkey.eval(ACQUIRE_SCRIPT, 4, *KEYS, rpm, tpm, tokens, concurrency, lease_ms, member))
+
+
+def api_error(code, retry_delay=None):
+    details = [{"@type": "type.googleapis.com/google.rpc.RetryInfo", "retryDelay": retry_delay}] if retry_delay else []
+    return errors.APIError(code, {"error": {"code": code, "message": "error", "status": "ERROR", "details": details}})
+
+
+def test_rpm_bucket_admits_its_capacity_then_waits(valkey):
+    assert [acquire(valkey, f"m{i}", rpm=3) for i in range(3)] == [0, 0, 0]
+    # One request refills every 60s / 3
+    assert acquire(valkey, "m3", rpm=3) == 20_000
+
+
+def test_rpm_bucket_refills_continuously(valkey, clock):
+    for i in range(6):
+        assert acquire(valkey, f"m{i}", rpm=6) == 0
+
+    clock.advance(9.999)
+    assert acquire(valkey, "early", rpm=6) == 1
+    clock.advance(0.001)
+    assert acquire(valkey, "on_time", rpm=6) == 0
+    assert acquire(valkey, "next", rpm=6) == 10_000
+
+
+def test_refill_is_capped_at_capacity(valkey, clock):
+    acquire(valkey, "first", rpm=2)
+    clock.advance(3600)
+
+    assert [acquire(valkey, f"m{i}", rpm=2) for i in range(3)] == [0, 0, 30_000]
+
+
+def test_tpm_bucket_debits_the_estimated_tokens(valkey, clock):
+    assert acquire(valkey, "a", tpm=600, tokens=500) == 0
+    # 100 tokens left; 200 more refill in 60s * 200 / 600
+    assert acquire(valkey, "b", tpm=600, tokens=300) == 20_000
+    clock.advance(20)
+    assert acquire(valkey, "b", tpm=600, tokens=300) == 0
+
+
+def test_request_larger_than_the_tpm_limit_waits_for_a_full_bucket(valkey, clock):
+    assert acquire(valkey, "a", tpm=600, tokens=10_000) == 0
+    assert acquire(valkey, "b", tpm=600, tokens=10_000) == 60_000
+    clock.advance(60)
+    assert acquire(valkey, "b", tpm=600, tokens=10_000) == 0
+
+
+def test_rejected_requests_do_not_consume_tokens(valkey):
+    acquire(valkey, "a", rpm=1)
+    for _ in range(5):
+        assert acquire(valkey, "b", rpm=1) == 60_000
+
+
+def test_in_flight_leases_bound_concurrency(valkey):
+    assert acquire(valkey, "a", concurrency=2) == 0
+    assert acquire(valkey, "b", concurrency=2) == 0
+    assert acquire(valkey, "c", concurrency=2) == 50
+
+    asyncio.run(valkey.zrem(KEYS[2], "a"))
+    assert acquire(valkey, "c", concurrency=2) == 0
+
+
+def test_expired_leases_free_their_slot(valkey, clock):
+    assert acquire(valkey, "crashed", concurrency=1, lease_ms=5000) == 0
+    assert acquire(valkey, "b", concurrency=1, lease_ms=5000) == 50
+
+    clock.advance(5.001)
+    assert acquire(valkey, "b", concurrency=1, lease_ms=5000) == 0
+
+
+def test_cooldown_blocks_admission_until_it_expires(valkey, clock):
+    asyncio.run(valkey.set(KEYS[3], "1", px=3000))
+
+    assert acquire(valkey) == 3000
+    clock.advance(3.001)
+    assert acquire(valkey) == 0
+
+
+def test_slot_waits_for_a_refill_and_releases_its_lease(valkey, limits, limiter):
+    limits(rpm=2)
+
+    async def scenario():
+        for _ in range(3):
+            async with limiter.slot(model=MODEL):
+                assert await valkey.zcard(KEYS[2]) == 1
+        return await valkey.zcard(KEYS[2])
+
+    assert asyncio.run(scenario()) == 0
+    assert limiter.admitted == 3
+    # Polls at most MAX_POLL_SECONDS at a time until the 30s refill
+    assert sum(limiter.slept) == pytest.approx(30)
+    assert max(limiter.slept) == rate_limiter.MAX_POLL_SECONDS
+
+
+def test_wait_beyond_the_deadline_times_out(valkey, limits, limiter):
+    limits(rpm=1)
+
+    async def scenario():
+        async with limiter.slot(model=MODEL):
+            pass
+        async with limiter.slot(model=MODEL, deadline=time.time() + 5):
+            pass
+
+    with pytest.raises(RateLimitTimeout):
+        asyncio.run(scenario())
+    assert limiter.admitted == 1
+
+
+def test_429_starts_a_shared_cooldown_and_retries(monkeypatch, valkey, limits, limiter, clock):
+    calls = []
+    cooldowns = []
+    sleep = limiter._sleep
+
+    async def record_cooldown(delay):
+        cooldowns.append(await valkey.pttl(KEYS[3]))
+        await sleep(delay)
+
+    monkeypatch.setattr(limiter, "_sleep", record_cooldown)
+
+    async def call():
+        calls.append(time.time())
+        if len(calls) == 1:
+            raise api_error(429, retry_delay="2s")
+        return "ok"
+
+    assert asyncio.run(limiter.run(call, model=MODEL)) == "ok"
+    assert limiter.throttled == 1
+    # Every process sees the pause through Valkey while this one sleeps it off
+    assert cooldowns == [2000]
+    assert calls[1] - calls[0] == pytest.approx(2)
+
+
+def test_429_without_retry_info_backs_off_exponentially():
+    assert GeminiRateLimiter._retry_delay(api_error(429), 0) == 1
+    assert GeminiRateLimiter._retry_delay(api_error(429), 3) == 8
+    assert GeminiRateLimiter._retry_delay(api_error(429), 10) == 60
+    assert GeminiRateLimiter._retry_delay(api_error(429, retry_delay="7.5s"), 3) == 7.5
+
+
+def test_other_api_errors_are_not_retried(valkey, limits, limiter):
+    async def call():
+        raise api_error(500)
+
+    with pytest.raises(errors.APIError):
+        asyncio.run(limiter.run(call, model=MODEL))
+    assert limiter.throttled == 0
+    assert asyncio.run(valkey.zcard(KEYS[2])) == 0
+
+
+def test_stream_holds_the_lease_until_the_stream_ends(valkey, limits, limiter):
+    async def open_stream():
+        async def chunks():
+            for chunk in ("a", "b"):
+                assert await valkey.zcard(KEYS[2]) == 1
+                yield chunk
+        return chunks()
+
+    async def scenario():
+        received = [chunk async for chunk in limiter.stream(open_stream, model=MODEL)]
+        return received, await valkey.zcard(KEYS[2])
+
+    assert asyncio.run(scenario()) == (["a", "b"], 0)
+
+
+class UnavailableValkey:
+    def register_script(self, script):
+        async def run(**kwargs):
+            raise ValkeyError("connection refused")
+        return run
+
+    async def zrem(self, *args):
+        raise ValkeyError("connection refused")
+
+    async def set(self, *args, **kwargs):
+        raise ValkeyError("connection refused")
+
+
+def test_degrades_to_local_limits_when_valkey_fails(monkeypatch, limits, limiter):
+    monkeypatch.setattr(rate_limiter, "get_async_valkey", lambda: UnavailableValkey())
+    attempts = []
+
+    async def call():
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise api_error(429, retry_delay="1s")
+        return "ok"
+
+    assert asyncio.run(limiter.run(call, model=MODEL)) == "ok"
+    assert limiter.admitted == 2
+    assert limiter.throttled == 1
+    assert limiter.slept == [1.0]
@@ -0,0 +1,104 @@
+import asyncio
+
+import pytest
+
+from app.core.resilience import CircuitBreaker, CircuitOpenError, ResilientCaller
+
+
+def test_breaker_opens_after_consecutive_failures():
+    breaker = CircuitBreaker(failure_threshold=3, reset_seconds=60)
+
+    for _ in range(2):
+        breaker.record_failure()
+    assert breaker.state == "closed" and breaker.allow()
+
+    breaker.record_failure()
+    assert breaker.state == "open"
+    assert not breaker.allow()
+    assert breaker.stats() == {"state": "open", "consecutive_failures": 3, "times_opened": 1}
+
+
+def test_success_resets_the_failure_count():
+    breaker = CircuitBreaker(failure_threshold=2, reset_seconds=60)
+
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+
+    assert breaker.state == "closed"
+
+
+def test_half_open_lets_one_trial_through():
+    breaker = CircuitBreaker(failure_threshold=1, reset_seconds=0)
+    breaker.record_failure()
+
+    assert breaker.allow()
+    assert breaker.state == "half_open"
+    assert not breaker.allow()
+
+
+def test_trial_success_closes_the_circuit():
+    breaker = CircuitBreaker(failure_threshold=1, reset_seconds=0)
+    breaker.record_failure()
+    breaker.allow()
+
+    breaker.record_success()
+
+    assert breaker.state == "closed"
+    assert breaker.allow() and breaker.allow()
+
+
+def test_trial_failure_reopens_the_circuit():
+    breaker = CircuitBreaker(failure_threshold=1, reset_seconds=60)
+    breaker.record_failure()
+    breaker.opened_at -= 60
+    breaker.allow()
+
+    breaker.record_failure()
+
+    assert breaker.state == "open"
+    assert not breaker.allow()
+    assert breaker.times_opened == 2
+
+
+def test_released_trial_lets_the_next_call_try():
+    breaker = CircuitBreaker(failure_threshold=1, reset_seconds=0)
+    breaker.record_failure()
+    breaker.allow()
+    trial = breaker.trials
+
+    breaker.release_trial(trial)
+
+    assert breaker.state == "half_open"
+    assert breaker.allow()
+    # Releasing an earlier trial must not free the current one
+    breaker.release_trial(trial)
+    assert not breaker.allow()
+
+
+def test_cancelled_trial_does_not_wedge_the_breaker():
+    breaker = CircuitBreaker(failure_threshold=1, reset_seconds=0)
+    caller = ResilientCaller("test", breaker)
+    breaker.record_failure()
+
+    async def scenario():
+        trial = asyncio.ensure_future(caller.call(lambda: asyncio.sleep(3600), hedge=False))
+        await asyncio.sleep(0)
+        assert not breaker.allow()
+        trial.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await trial
+        return await caller.call(lambda: asyncio.sleep(0, result="ok"), hedge=False)
+
+    assert asyncio.run(scenario()) == "ok"
+    assert breaker.state == "closed"
+
+
+def test_open_circuit_rejects_calls():
+    breaker = CircuitBreaker(failure_threshold=1, reset_seconds=60)
+    caller = ResilientCaller("test", breaker)
+    breaker.record_failure()
+
+    with pytest.raises(CircuitOpenError):
+        asyncio.run(caller.call(lambda: asyncio.sleep(0), hedge=False))
+    assert caller.rejected == 1
@@ -0,0 +1,177 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+import pytest
+
+from app.core import cache, security
+from app.core.cache import TTLCache
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+    def advance(self, seconds):
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(cache, "time", SimpleNamespace(monotonic=clock))
+    return clock
+
+
+def test_entries_expire_after_their_ttl(clock):
+    ttl_cache = TTLCache(max_entries=10, default_ttl=60)
+    ttl_cache.set("a", 1)
+    ttl_cache.set("b", 2, ttl=5)
+
+    clock.advance(4.9)
+    assert ttl_cache.get("b") == (True, 2)
+    clock.advance(0.1)
+    assert ttl_cache.get("b") == (False, None)
+    assert ttl_cache.get("a") == (True, 1)
+    clock.advance(55)
+    assert ttl_cache.get("a") == (False, None)
+    assert ttl_cache.stats()["size"] == 0
+
+
+def test_cached_none_is_a_hit(clock):
+    ttl_cache = TTLCache(max_entries=10, default_ttl=60)
+    ttl_cache.set("unknown", None)
+
+    assert ttl_cache.get("unknown") == (True, None)
+    assert ttl_cache.get("other") == (False, None)
+    assert (ttl_cache.hits, ttl_cache.misses) == (1, 1)
+
+
+def test_non_positive_ttl_is_not_stored(clock):
+    ttl_cache = TTLCache(max_entries=10, default_ttl=60)
+    ttl_cache.set("a", 1, ttl=0)
+    ttl_cache.set("b", 1, ttl=-5)
+
+    assert ttl_cache.stats()["size"] == 0
+
+
+def test_evicts_the_least_recently_used_entry(clock):
+    ttl_cache = TTLCache(max_entries=2, default_ttl=60)
+    ttl_cache.set("a", 1)
+    ttl_cache.set("b", 2)
+    ttl_cache.get("a")
+    ttl_cache.set("c", 3)
+
+    assert ttl_cache.get("b") == (False, None)
+    assert ttl_cache.get("a") == (True, 1)
+    assert ttl_cache.get("c") == (True, 3)
+    assert ttl_cache.evictions == 1
+
+
+def test_delete_where_removes_matching_values(clock):
+    ttl_cache = TTLCache(max_entries=10, default_ttl=60)
+    ttl_cache.set("s1", {"id": "u1"})
+    ttl_cache.set("s2", {"id": "u2"})
+    ttl_cache.set("s3", None)
+
+    assert ttl_cache.delete_where(lambda value: value is not None and value["id"] == "u1") == 1
+    assert ttl_cache.get("s1") == (False, None)
+    assert ttl_cache.get("s2") == (True, {"id": "u2"})
+    assert ttl_cache.get("s3") == (True, None)
+
+
+class Sessions:
+    """Stands in for the auth database lookup of verify_session_token."""
+
+    def __init__(self):
+        self.users = {}
+        self.loads = 0
+
+    def add(self, session_id, user_id, expires_in):
+        self.users[session_id] = (user_id, datetime.now(timezone.utc) + timedelta(seconds=expires_in))
+
+    async def load(self, db, session_id):
+        self.loads += 1
+        if session_id not in self.users:
+            return None
+        user_id, expires_at = self.users[session_id]
+        return {"id": user_id, "email": f"{user_id}@example.com", "session_expires_at": expires_at}
+
+
+@pytest.fixture
+def sessions(monkeypatch, clock):
+    sessions = Sessions()
+    monkeypatch.setattr(security, "_load_session", sessions.load)
+    monkeypatch.setattr(security, "_session_cache", TTLCache(max_entries=100, default_ttl=60))
+    monkeypatch.setattr(security.settings, "session_cache_ttl_seconds", 60)
+    monkeypatch.setattr(security.settings, "session_cache_negative_ttl_seconds", 5)
+    return sessions
+
+
+def verify(token):
+    return asyncio.run(security.verify_session_token(None, token))
+
+
+def test_session_lookups_are_cached_for_the_ttl(sessions, clock):
+    sessions.add("s1", "u1", expires_in=3600)
+
+    assert verify("s1.signature")["id"] == "u1"
+    assert verify("s1.other-signature")["id"] == "u1"
+    assert sessions.loads == 1
+
+    clock.advance(60)
+    verify("s1.signature")
+    assert sessions.loads == 2
+
+
+def test_callers_get_a_copy_of_the_cached_user(sessions):
+    sessions.add("s1", "u1", expires_in=3600)
+
+    verify("s1.signature")["email"] = "changed"
+
+    assert verify("s1.signature")["email"] == "u1@example.com"
+    assert "session_expires_at" not in verify("s1.signature")
+
+
+def test_cache_entry_never_outlives_the_session(sessions, clock):
+    sessions.add("s1", "u1", expires_in=10)
+    verify("s1.signature")
+
+    clock.advance(9)
+    verify("s1.signature")
+    assert sessions.loads == 1
+    clock.advance(2)
+    verify("s1.signature")
+    assert sessions.loads == 2
+
+
+def test_unknown_sessions_are_cached_briefly(sessions, clock):
+    assert verify("missing.signature") is None
+    assert verify("missing.signature") is None
+    assert sessions.loads == 1
+
+    sessions.add("missing", "u1", expires_in=3600)
+    clock.advance(5)
+    assert verify("missing.signature")["id"] == "u1"
+
+
+def test_invalidate_user_sessions_drops_only_that_user(sessions):
+    sessions.add("s1", "u1", expires_in=3600)
+    sessions.add("s2", "u1", expires_in=3600)
+    sessions.add("s3", "u2", expires_in=3600)
+    for session_id in ("s1", "s2", "s3"):
+        verify(f"{session_id}.signature")
+
+    assert security.invalidate_user_sessions("u1") == 2
+
+    for session_id in ("s1", "s2", "s3"):
+        verify(f"{session_id}.signature")
+    assert sessions.loads == 5
+
+
+def test_empty_token_is_rejected_without_a_lookup(sessions):
+    assert verify("") is None
+    assert sessions.loads == 0
@@ -0,0 +1,112 @@
+from contextlib import contextmanager
+from types import SimpleNamespace
+
+import pytest
+
+from app.services import vector_service
+from app.services.vector_service import VectorService
+
+
+class FakeTransaction:
+    def __init__(self):
+        self.deleted = []
+
+    def delete_vector(self, vector_id):
+        self.deleted.append(vector_id)
+
+
+class FakeVectors:
+    def __init__(self, by_document):
+        self.by_document = by_document
+        self.lookups = []
+
+    def get_by_document_id(self, document_id):
+        self.lookups.append(document_id)
+        return [SimpleNamespace(id=vector_id, document_id=document_id) for vector_id in self.by_document.get(document_id, [])]
+
+
+class FakeCollection:
+    """The subset of the Cosdata collection API that VectorService.delete_entries relies on."""
+
+    def __init__(self, by_document):
+        self.vectors = FakeVectors(by_document)
+        self.transactions = []
+
+    @contextmanager
+    def transaction(self):
+        txn = FakeTransaction()
+        self.transactions.append(txn)
+        yield txn
+
+
+@pytest.fixture
+def service():
+    # Skips __init__, which loads the embedding model
+    return VectorService.__new__(VectorService)
+
+
+def use_collection(monkeypatch, collection):
+    calls = []
+
+    def get_user_collection(user_id, create=True):
+        calls.append((user_id, create))
+        return collection
+
+    monkeypatch.setattr(vector_service, "get_user_collection", get_user_collection)
+    return calls
+
+
+def test_deletes_every_vector_of_the_entries_in_one_transaction(monkeypatch, service):
+    collection = FakeCollection({
+        "user_u1_journal_1": ["user_u1_journal_1_chunk_a", "user_u1_journal_1_chunk_b"],
+        "user_u1_journal_2": ["user_u1_journal_2_chunk_c"],
+    })
+    calls = use_collection(monkeypatch, collection)
+
+    assert service.delete_entries("u1", [1, 2, 3]) == 3
+
+    assert calls == [("u1", False)]
+    assert collection.vectors.lookups == ["user_u1_journal_1", "user_u1_journal_2", "user_u1_journal_3"]
+    assert len(collection.transactions) == 1
+    assert collection.transactions[0].deleted == [
+        "user_u1_journal_1_chunk_a", "user_u1_journal_1_chunk_b", "user_u1_journal_2_chunk_c",
+    ]
+
+
+def test_no_transaction_without_vectors(monkeypatch, service):
+    collection = FakeCollection({})
+    use_collection(monkeypatch, collection)
+
+    assert service.delete_entries("u1", [1]) == 0
+    assert collection.transactions == []
+
+
+def test_missing_collection_is_not_created(monkeypatch, service):
+    calls = use_collection(monkeypatch, None)
+
+    assert service.delete_entries("u1", [1]) == 0
+    assert calls == [("u1", False)]
+
+
+def test_lookup_errors_propagate(monkeypatch, service):
+    collection = FakeCollection({})
+
+    def fail(document_id):
+        raise Exception("Failed to get vectors by document ID")
+
+    collection.vectors.get_by_document_id = fail
+    use_collection(monkeypatch, collection)
+
+    with pytest.raises(Exception, match="document ID"):
+        service.delete_entries("u1", [1])
+    assert collection.transactions == []
+
+
+def test_sdk_provides_the_methods_used():
+    collections = pytest.importorskip("cosdata.api.collections")
+    from cosdata.api.transactions import Transaction
+    from cosdata.api.vectors import Vectors
+
+    assert callable(collections.Collection.transaction)
+    assert callable(Vectors.get_by_document_id)
+    assert callable(Transaction.delete_vector)
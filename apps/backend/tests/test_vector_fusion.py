@@ -0,0 +1,40 @@
+import pytest
+
+from app.services.vector_service import reciprocal_rank_fusion
+
+
+def hits(*ids, text=None):
+    return [{"id": vector_id, "score": 1.0, "text": text} for vector_id in ids]
+
+
+def test_documents_found_by_both_legs_rank_first():
+    fused = reciprocal_rank_fusion([(hits("a", "b", "c"), 1.0), (hits("c", "d"), 1.0)], k=60)
+
+    assert [result["id"] for result in fused][0] == "c"
+    assert {result["id"] for result in fused} == {"a", "b", "c", "d"}
+
+
+def test_fused_score_sums_weighted_reciprocal_ranks():
+    fused = reciprocal_rank_fusion([(hits("a", "b"), 1.0), (hits("b"), 0.5)], k=10)
+    scores = {result["id"]: result["score"] for result in fused}
+
+    assert scores["a"] == pytest.approx(1.0 / 11)
+    assert scores["b"] == pytest.approx(1.0 / 12 + 0.5 / 11)
+
+
+def test_weights_decide_between_legs():
+    dense, text = hits("dense_top"), hits("text_top")
+
+    assert reciprocal_rank_fusion([(dense, 1.0), (text, 2.0)])[0]["id"] == "text_top"
+    assert reciprocal_rank_fusion([(dense, 2.0), (text, 1.0)])[0]["id"] == "dense_top"
+
+
+def test_keeps_a_copy_that_carries_text():
+    fused = reciprocal_rank_fusion([(hits("a"), 1.0), (hits("a", text="chunk text"), 1.0)])
+
+    assert fused == [{"id": "a", "score": pytest.approx(2 / 61), "text": "chunk text"}]
+
+
+def test_empty_legs():
+    assert reciprocal_rank_fusion([]) == []
+    assert reciprocal_rank_fusion([([], 1.0)]) == []
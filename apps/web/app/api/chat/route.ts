@@ -50,6 +50,7 @@ export async function POST(request: NextRequest) {
       user_id: body.user_id,
       session_id: body.session_id ?? undefined,
       previous_chat: body.previous_chat ?? undefined,
+      timezone: typeof body.timezone === "string" ? body.timezone : undefined,
     };
 
     return proxyToBackend(request, payload);
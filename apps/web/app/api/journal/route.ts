@@ -40,11 +40,18 @@ async function proxyToBackend(
       parsedBody = responseBody;
     }
 
+    const responseHeaders = new Headers({
+      "Content-Type": response.headers.get("content-type") || "application/json",
+    });
+    // Token for the next page of a listing
+    const nextCursor = response.headers.get("x-next-cursor");
+    if (nextCursor) {
+      responseHeaders.set("X-Next-Cursor", nextCursor);
+    }
+
     return NextResponse.json(parsedBody, {
       status: response.status,
-      headers: {
-        "Content-Type": response.headers.get("content-type") || "application/json",
-      },
+      headers: responseHeaders,
     });
   } catch (error) {
     console.error("Backend proxy error:", error);
@@ -55,13 +62,16 @@ async function proxyToBackend(
   }
 }
 
-// GET /api/journal - List user's journal entries
+// GET /api/journal - List user's journal entries, newest first
 export async function GET(request: NextRequest) {
   const { searchParams } = new URL(request.url);
-  const skip = searchParams.get("skip") || "0";
   const limit = searchParams.get("limit") || "100";
+  const cursor = searchParams.get("cursor");
 
-  const queryParams = new URLSearchParams({ skip, limit });
+  const queryParams = new URLSearchParams({ limit });
+  if (cursor) {
+    queryParams.set("cursor", cursor);
+  }
 
   return proxyToBackend(request, "GET", `?${queryParams.toString()}`);
 }
@@ -58,6 +58,7 @@ export function useChat({ userId }: UseChatParams): UseChatReturn {
         user_id: userId,
         session_id: sessionId,
         previous_chat: buildTranscript(nextMessages),
+        timezone: Intl.DateTimeFormat().resolvedOptions().timeZone,
       };
 
       try {
@@ -11,24 +11,27 @@ import type {
 
 export interface UseJournalReturn {
   entries: JournalEntry[];
+  nextCursor: string | null;
   isLoading: boolean;
   error: string | null;
   createEntry: (data: CreateJournalEntryRequest) => Promise<JournalEntry | null>;
   updateEntry: (id: number, data: UpdateJournalEntryRequest) => Promise<JournalEntry | null>;
   deleteEntry: (id: number) => Promise<boolean>;
-  fetchEntries: (skip?: number, limit?: number) => Promise<void>;
+  fetchEntries: (cursor?: string | null, limit?: number) => Promise<void>;
   getEntry: (id: number) => Promise<JournalEntry | null>;
 }
 
 export function useJournal(): UseJournalReturn {
   const [entries, setEntries] = useState<JournalEntry[]>([]);
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
   const [isLoading, setIsLoading] = useState(false);
   const [error, setError] = useState<string | null>(null);
 
   const handleApiCall = useCallback(async <T>(
     url: string,
     options: RequestInit,
-    successMessage?: string
+    successMessage?: string,
+    onResponse?: (response: Response) => void
   ): Promise<T | null> => {
     setIsLoading(true);
     setError(null);
@@ -49,6 +52,7 @@ export function useJournal(): UseJournalReturn {
       }
 
       const data = await response.json();
+      onResponse?.(response);
 
       if (successMessage) {
         toast.success(successMessage);
@@ -116,18 +120,28 @@ export function useJournal(): UseJournalReturn {
     return false;
   }, [handleApiCall]);
 
-  const fetchEntries = useCallback(async (skip = 0, limit = 100): Promise<void> => {
-    const queryParams = new URLSearchParams({ skip: skip.toString(), limit: limit.toString() });
+  // Entries come newest first; pass `nextCursor` to append the following page
+  const fetchEntries = useCallback(async (cursor?: string | null, limit = 100): Promise<void> => {
+    const queryParams = new URLSearchParams({ limit: limit.toString() });
+    if (cursor) {
+      queryParams.set("cursor", cursor);
+    }
 
+    let pageCursor: string | null = null;
     const result = await handleApiCall<JournalEntry[]>(
       `/api/journal?${queryParams}`,
       {
         method: "GET",
+      },
+      undefined,
+      response => {
+        pageCursor = response.headers.get("X-Next-Cursor");
       }
     );
 
     if (result) {
-      setEntries(result);
+      setEntries(prev => (cursor ? [...prev, ...result] : result));
+      setNextCursor(pageCursor);
     }
   }, [handleApiCall]);
 
@@ -142,6 +156,7 @@ export function useJournal(): UseJournalReturn {
 
   return {
     entries,
+    nextCursor,
     isLoading,
     error,
     createEntry,
@@ -3,6 +3,7 @@ export interface ChatRequest {
   user_id: string;
   session_id?: string | null;
   previous_chat?: string | null;
+  timezone?: string; // User's IANA timezone; cached answers are scoped to the local day
 }
 
 export interface ChatResponse {
@@ -21,7 +21,7 @@ export interface UpdateJournalEntryRequest {
 }
 
 export interface JournalEntryFilters {
-  skip?: number;
+  cursor?: string; // Opaque token from the X-Next-Cursor header of the previous page
   limit?: number;
   startDate?: string;
   endDate?: string;